@@ -2,6 +2,7 @@ from flask import Flask, render_template, request, jsonify, redirect, url_for, f
 from flask_login import LoginManager, login_required, current_user
 from flask_migrate import Migrate
 from flask_mail import Mail
+from jinja2 import FileSystemBytecodeCache
 from datetime import datetime, date, timedelta
 import os
 import logging
@@ -15,10 +16,16 @@ app = Flask(__name__)
 # Configuration
 app.secret_key = os.environ.get("SESSION_SECRET")
 app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
+# Pool sizing, disconnect handling, pooler mode and timeouts come from DB_* env vars
+# Pool checkout waits are timed by a pool subclass so they survive dispose() and the per-fork pool reset
+from db_config import build_engine_options, init_db_config
+from metrics import timed_pool_options
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = timed_pool_options(app.config["SQLALCHEMY_DATABASE_URI"],
+                                                             build_engine_options(app.config["SQLALCHEMY_DATABASE_URI"]))
+
+# Optional read replica (REPLICA_DATABASE_URL) for views marked @read_replica
+from replica import replica_binds, init_replica
+app.config["SQLALCHEMY_BINDS"] = replica_binds()
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 
 # Session configuration
@@ -36,8 +43,20 @@ app.config['MAIL_DEFAULT_SENDER'] = os.environ.get('MAIL_DEFAULT_SENDER', 'norep
 # Initialize extensions
 mail = Mail(app)
 from models import db, User
-from utils import get_user_stats
+from serializers import FastJSONProvider
+app.json = FastJSONProvider(app)
+
+# Persist compiled templates so new workers skip Jinja compilation
+# (set after app.json, since creating the Jinja env captures its dumps)
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache(os.environ.get("JINJA_CACHE_DIR") or None)
+
 db.init_app(app)
+init_db_config(app, db)
+init_replica(app, db)
+
+# Server-side sessions: opaque id cookie, per-worker LRU in front of the sessions table (SESSION_STORE)
+from session_store import init_sessions
+init_sessions(app, db)
 migrate = Migrate(app, db)
 
 # Initialize Flask-Login
@@ -53,7 +72,8 @@ def load_user(user_id):
 
 # Register blueprints
 from blueprints.auth import auth_bp
-from blueprints.api import api_bp
+from blueprints.api import api_bp, build_initial_state
+from render_cache import render_cached_template
 from blueprints.strava import strava_bp
 from blueprints.password_reset import password_reset_bp
 
@@ -62,9 +82,56 @@ app.register_blueprint(api_bp)
 app.register_blueprint(strava_bp)
 app.register_blueprint(password_reset_bp)
 
-# Create database tables
-with app.app_context():
-    db.create_all()
+# Fingerprinted static assets built by scripts/build_assets.py
+from assets import init_assets
+init_assets(app)
+
+# Compress JSON and HTML responses for clients that accept gzip/brotli
+from compression import compress_response
+app.after_request(compress_response)
+
+# Prometheus /metrics: route latency, OpenAI/Strava timings, DB pool, cache hits
+from metrics import init_metrics
+init_metrics(app, db)
+
+# Sampled request traces with SQL, OpenAI/Strava and cache spans (TRACE_SAMPLE_RATE)
+from tracing import init_tracing
+init_tracing(app, db)
+
+# Opt-in per-worker sampling profiler: /admin/profiler endpoints or SIGUSR2
+from profiler import init_profiler
+init_profiler(app)
+
+# CLI: flask export-all --out exports/
+from exporter import export_all_command
+app.cli.add_command(export_all_command)
+
+# CLI: flask pregenerate-workouts (nightly draft workouts for tomorrow)
+from pregenerate import pregenerate_command
+app.cli.add_command(pregenerate_command)
+
+# CLI: flask recompute-records (rebuild PRs from full history, e.g. after an import)
+from records import recompute_records_command
+app.cli.add_command(recompute_records_command)
+
+# CLI: flask recompute-strength (rebuild the estimated-1RM series from full history)
+from strength import recompute_strength_command
+app.cli.add_command(recompute_strength_command)
+
+# CLI: flask import-legacy --user-data user_data.json --requests requests.jsonl --email you@example.com
+from importer import import_legacy_command
+app.cli.add_command(import_legacy_command)
+
+# CLI: flask purge-sessions (delete expired server-side sessions, daily)
+from session_store import purge_sessions_command
+app.cli.add_command(purge_sessions_command)
+
+# CLI: flask upgrade-schema (new tables, plus columns and indexes added to existing tables)
+from schema import init_schema, upgrade_schema_command
+app.cli.add_command(upgrade_schema_command)
+
+# Create database tables, and add new columns and indexes to existing ones
+init_schema(app, db)
 
 # Main routes
 @app.route("/")
@@ -80,18 +147,12 @@ def index():
         if not profile or not profile.name:
             # Show profile setup directly for new users
             logging.debug("Index: User needs profile setup, showing profile setup page")
-            return render_template("profile_setup.html")
+            return render_cached_template("profile_setup.html")
         
-        # Get user data from database for returning users
+        # Embed the complete first-screen state so the page needs no follow-up requests
         logging.debug(f"Loading main app for user: {current_user.email}")
         try:
-            # Simplified user data loading to avoid errors
-            user_data = {
-                'profile': {'name': profile.name, 'age': profile.age, 'gender': profile.gender},
-                'goals': {},
-                'stats': get_user_stats(current_user.id)
-            }
-            logging.debug(f"User data prepared: {user_data}")
+            user_data = build_initial_state(current_user)
             logging.debug("Rendering index.html template")
             return render_template("index.html", user_data=user_data)
         except Exception as e:
@@ -101,7 +162,7 @@ def index():
             return f"Error loading app: {str(e)}", 500
     else:
         logging.debug("User not authenticated, showing auth page")
-        return render_template("auth.html")
+        return render_cached_template("auth.html")
 
 @app.route("/profile-setup")
 @login_required
@@ -113,12 +174,12 @@ def profile_setup():
     if current_user.profile and current_user.profile.name:
         logging.debug("User already has profile, redirecting to main app")
         return redirect("/")
-    return render_template("profile_setup.html")
+    return render_cached_template("profile_setup.html")
 
 @app.route("/goals-setup")
 @login_required  
 def goals_setup():
-    return render_template("goals_setup.html")
+    return render_cached_template("goals_setup.html")
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file
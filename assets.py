@@ -0,0 +1,79 @@
+import os
+import json
+import logging
+import mimetypes
+from typing import Dict, Optional
+from flask import current_app, request, send_from_directory, abort
+from werkzeug.security import safe_join
+from compression import accepted_encodings
+
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Precompressed variants written by scripts/build_assets.py, best first
+PRECOMPRESSED = [('br', '.br'), ('gzip', '.gz')]
+
+class AssetManifest:
+    """Maps source static paths (e.g. js/app.js) to content-hashed build outputs"""
+
+    def __init__(self):
+        self.entries: Dict[str, str] = {}
+
+    def load(self, path: str) -> None:
+        try:
+            with open(path) as handle:
+                self.entries = json.load(handle)
+            logging.debug(f"Loaded {len(self.entries)} fingerprinted assets from {path}")
+        except FileNotFoundError:
+            self.entries = {}
+            logging.debug("No asset manifest found, serving unbuilt static files")
+
+    def __contains__(self, filename: str) -> bool:
+        return filename in self.entries
+
+    def get(self, filename: str) -> Optional[str]:
+        return self.entries.get(filename)
+
+# Global manifest instance
+asset_manifest = AssetManifest()
+
+def rewrite_static_url(endpoint, values):
+    """Point url_for('static', filename=...) at the fingerprinted build output"""
+    if endpoint != 'static':
+        return
+    hashed = asset_manifest.get(values.get('filename'))
+    if hashed:
+        values['filename'] = hashed
+
+def serve_dist_asset(filename):
+    """Serve a fingerprinted asset, preferring a precompressed variant"""
+    dist_dir = os.path.join(current_app.static_folder, DIST_DIR)
+    if safe_join(dist_dir, filename) is None:
+        abort(404)
+
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    accepted = accepted_encodings(request.headers.get('Accept-Encoding', ''))
+
+    encoding = ''
+    served = filename
+    for candidate, extension in PRECOMPRESSED:
+        if candidate in accepted and os.path.isfile(os.path.join(dist_dir, filename + extension)):
+            encoding = candidate
+            served = filename + extension
+            break
+
+    response = send_from_directory(dist_dir, served, mimetype=mimetype)
+    # Hashed names change whenever content does, so browsers never need to revalidate
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    response.vary.add('Accept-Encoding')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+def init_assets(app):
+    """Load the build manifest and wire fingerprinted URLs and serving into the app"""
+    asset_manifest.load(os.path.join(app.static_folder, DIST_DIR, MANIFEST_NAME))
+    app.url_defaults(rewrite_static_url)
+    app.add_url_rule(f"{app.static_url_path}/{DIST_DIR}/<path:filename>", 'dist_asset', serve_dist_asset)
+    app.context_processor(lambda: {'has_asset': asset_manifest.__contains__})
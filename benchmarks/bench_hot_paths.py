@@ -0,0 +1,138 @@
+"""Micro-benchmarks for the pure-Python hot paths behind the dashboard and progress pages.
+
+Covers get_user_stats, SQL vs Python streak computation over years of history, CacheManager get/set/invalidate, the Strava
+recovery aggregation, format_workout_response, the weekly/wellness bucketing
+loops and the local workout engine, each at several input sizes. Runs offline:
+SQLite in memory, no network.
+
+Run with: python benchmarks/bench_hot_paths.py [--max-size 10000] [-k cache] [--save-baseline]
+"""
+import random
+from collections import namedtuple
+from types import SimpleNamespace
+from datetime import date, timedelta
+
+from harness import Suite, create_app, main
+
+from cache_manager import CacheManager
+from strava_integration import StravaAPI
+from utils import get_user_stats, format_workout_response
+from blueprints.api import count_workouts_per_week, collect_wellness_series
+from workout_engine import local_workout
+from streaks import compute_streaks
+
+SIZES = [10, 100, 1000, 10000, 100000]
+HISTORY_DAYS = [365, 1825, 3650]  # one, five and ten years of daily training
+MOODS = ['great', 'good', 'okay', 'tired', 'stressed']
+
+suite = Suite('hot_paths')
+rng = random.Random(42)
+
+CheckInRow = namedtuple('CheckInRow', 'date energy_level motivation_level sleep_quality stress_level muscle_soreness mood')
+
+def recent_dates(count):
+    today = date.today()
+    return [today - timedelta(days=i) for i in range(count)]
+
+def seed_history(days):
+    """Push an app context and store a user training daily for `days` days, twice on some days"""
+    from models import db, User, Workout
+
+    app = create_app()
+    context = app.app_context()
+    context.push()
+    db.create_all()
+    user = User(email=f"bench{days}-{rng.random()}@thrshld.app", password_hash="x")
+    db.session.add(user)
+    db.session.flush()
+    dates = recent_dates(days)
+    dates += rng.sample(dates, days // 10)
+    db.session.bulk_insert_mappings(Workout, [
+        {'user_id': user.id, 'workout_name': "Daily Workout", 'workout_type': "generated", 'date_completed': day}
+        for day in dates
+    ])
+    db.session.commit()
+    return user.id
+
+@suite.case('utils.get_user_stats', [10, 100, 1000, 10000])
+def bench_user_stats(size):
+    user_id = seed_history(size)
+    return lambda: get_user_stats(user_id)
+
+@suite.case('streaks.compute_streaks[sql]', HISTORY_DAYS)
+def bench_streaks_sql(size):
+    # The window-function query Postgres runs, here on SQLite's window support
+    user_id = seed_history(size)
+    return lambda: compute_streaks(user_id, in_sql=True)
+
+@suite.case('streaks.compute_streaks[python]', HISTORY_DAYS)
+def bench_streaks_python(size):
+    user_id = seed_history(size)
+    return lambda: compute_streaks(user_id, in_sql=False)
+
+@suite.case('CacheManager.get', SIZES)
+def bench_cache_get(size):
+    manager = CacheManager()
+    for user_id in range(size):
+        manager.set(user_id, 'initial_state', {'user_id': user_id})
+    keys = [rng.randrange(size) for _ in range(1000)]
+    return lambda: [manager.get(user_id, 'initial_state') for user_id in keys]
+
+@suite.case('CacheManager.set', SIZES)
+def bench_cache_set(size):
+    manager = CacheManager()
+    payload = {'workout': 'x' * 512}
+    return lambda: [manager.set(user_id, 'workout', payload, context=str(user_id)) for user_id in range(size)]
+
+@suite.case('CacheManager.invalidate', SIZES)
+def bench_cache_invalidate(size):
+    # invalidate() scans every key, so its cost tracks total entries, not the user's
+    manager = CacheManager()
+    for user_id in range(size):
+        manager.set(user_id, 'initial_state', {'user_id': user_id})
+    return lambda: manager.invalidate(size + 1, 'initial_state')
+
+@suite.case('StravaAPI.get_recovery_metrics', SIZES)
+def bench_recovery_metrics(size):
+    activities = [{
+        'id': i, 'name': 'Morning Run', 'type': 'Run',
+        'distance': rng.uniform(3000, 15000), 'moving_time': rng.randint(900, 5400),
+        'suffer_score': rng.randint(20, 200)
+    } for i in range(size)]
+    api = StravaAPI()
+    # Shadow the HTTP-backed fetchers on this instance so only aggregation is timed
+    api.get_recent_activities = lambda limit=10: activities
+    api.get_athlete_stats = lambda: {'recent_run_totals': {'count': size}}
+    return api.get_recovery_metrics
+
+@suite.case('utils.format_workout_response', [10, 100, 1000, 10000])
+def bench_format_workout(size):
+    block = "1. Warm-up\n  - 5 minutes easy row  \n\n\n2. Main\n- Back Squat: 4x5 @ 112kg\n3. Cool-down\n- Stretch\n"
+    text = block * size
+    return lambda: format_workout_response(text)
+
+@suite.case('api.count_workouts_per_week', SIZES)
+def bench_weekly_buckets(size):
+    dates = recent_dates(size)
+    return lambda: count_workouts_per_week(dates)
+
+@suite.case('api.collect_wellness_series', SIZES)
+def bench_wellness_series(size):
+    rows = [CheckInRow(day, rng.randint(1, 10), rng.randint(1, 10), rng.randint(1, 10),
+                       rng.randint(1, 10), rng.randint(1, 10), rng.choice(MOODS))
+            for day in recent_dates(size)]
+    return lambda: collect_wellness_series(rows)
+
+@suite.case('workout_engine.local_workout', [1, 10, 100])
+def bench_local_workout(size):
+    profile = SimpleNamespace(experience_level='intermediate', preferred_intensity='high', training_days_per_week=4,
+                              squat_1rm=140.0, bench_1rm=100.0, deadlift_1rm=180.0, overhead_press_1rm=60.0,
+                              max_pull_ups=12)
+    goals = SimpleNamespace(workout_goal='strength_building', target_sessions_per_week=None,
+                            compound_lifts=['squat', 'bench-press', 'deadlift', 'pull_ups'])
+    statuses = [rng.choice(["Feeling great, slept well", "A bit sore from Tuesday", "Normal day"]) for _ in range(size)]
+    # One check-in is one call; the request budget for the local path is 10 ms
+    return lambda: [local_workout(profile, goals, status) for status in statuses]
+
+if __name__ == '__main__':
+    main(suite)
@@ -0,0 +1,89 @@
+"""Compare first-paint page weight before and after the static asset build.
+
+"Before" is what base.html loaded from CDNs plus the unbuilt local files;
+"after" is the fingerprinted output in static/dist (run scripts/build_assets.py first).
+
+Run with: python benchmarks/bench_page_weight.py
+"""
+import gzip
+import json
+import os
+import urllib.request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATIC = os.path.join(ROOT, 'static')
+
+BEFORE_REMOTE = [
+    ('tailwind play cdn', 'https://cdn.tailwindcss.com'),
+    ('chart.js (unpinned)', 'https://cdn.jsdelivr.net/npm/chart.js'),
+]
+BEFORE_LOCAL = ['css/style.css', 'js/app.js']
+
+def fetch(url):
+    try:
+        with urllib.request.urlopen(url, timeout=30) as response:
+            return response.read()
+    except OSError as e:
+        print(f"  could not fetch {url}: {e}")
+        return None
+
+def read(path):
+    with open(path, 'rb') as handle:
+        return handle.read()
+
+def sizes(content, precompressed_path=None):
+    """Raw, gzip and brotli sizes, using build outputs when they exist"""
+    gz_path = precompressed_path and precompressed_path + '.gz'
+    br_path = precompressed_path and precompressed_path + '.br'
+    gz = len(read(gz_path)) if gz_path and os.path.exists(gz_path) else len(gzip.compress(content, compresslevel=6))
+    if br_path and os.path.exists(br_path):
+        br = len(read(br_path))
+    else:
+        br = len(brotli.compress(content, quality=5)) if brotli else None
+    return len(content), gz, br
+
+def report(title, rows):
+    print(title)
+    totals = [0, 0, 0]
+    for name, (raw, gz, br) in rows:
+        print(f"  {name:<40} {raw:>9} raw {gz:>9} gz {br if br is not None else '-':>9} br")
+        totals[0] += raw
+        totals[1] += gz
+        totals[2] += br or 0
+    print(f"  {'total':<40} {totals[0]:>9} raw {totals[1]:>9} gz {totals[2] or '-':>9} br")
+    return totals
+
+def main():
+    before = []
+    for name, url in BEFORE_REMOTE:
+        content = fetch(url)
+        if content is not None:
+            before.append((name, sizes(content)))
+    for name in BEFORE_LOCAL:
+        before.append((name, sizes(read(os.path.join(STATIC, name)))))
+
+    manifest_path = os.path.join(STATIC, 'dist', 'manifest.json')
+    if not os.path.exists(manifest_path):
+        report("Before (no build found, run scripts/build_assets.py)", before)
+        return
+
+    with open(manifest_path) as handle:
+        manifest = json.load(handle)
+    after = []
+    for source, hashed in sorted(manifest.items()):
+        path = os.path.join(STATIC, hashed)
+        after.append((hashed, sizes(read(path), path)))
+
+    before_totals = report("Before: CDN + unversioned files (revalidated on every visit)", before)
+    after_totals = report("After: fingerprinted build (immutable, zero bytes on repeat visits)", after)
+    if before_totals[1]:
+        print(f"gzip transfer: {before_totals[1]} -> {after_totals[1]} bytes "
+              f"({100 - after_totals[1] * 100 / before_totals[1]:.0f}% smaller)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""Requests per second for anonymous pages with the render cache off and on.
+
+Drives the real app through Flask's test client against a throwaway SQLite
+database, so it measures app-side cost without network noise.
+
+Run with: python benchmarks/bench_render_cache.py [--requests 2000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+os.environ.setdefault("SESSION_SECRET", "bench")
+
+import logging
+from app import app
+from render_cache import render_cache
+
+PATHS = ['/', '/login']
+
+def measure(client, path, requests):
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = client.get(path)
+        assert response.status_code == 200, response.status_code
+    elapsed = time.perf_counter() - start
+    return requests / elapsed, elapsed / requests * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    client = app.test_client()
+
+    for enabled in (False, True):
+        app.config['RENDER_CACHE_ENABLED'] = enabled
+        render_cache.clear()
+        print(f"render cache {'on' if enabled else 'off'}")
+        for path in PATHS:
+            client.get(path)  # warm up templates and the cache
+            rps, micros = measure(client, path, args.requests)
+            print(f"  GET {path:<8} {rps:9.0f} req/s  {micros:8.1f} us/req")
+
+if __name__ == '__main__':
+    main()
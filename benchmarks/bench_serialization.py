@@ -0,0 +1,91 @@
+"""Micro-benchmarks comparing ORM to_dict() + stdlib JSON with the precompiled serializers.
+
+Run with: python benchmarks/bench_serialization.py [--rows 10000] [--repeat 5]
+"""
+import argparse
+import json
+import random
+import timeit
+from datetime import date, timedelta
+
+from harness import create_app
+
+from flask.json.provider import DefaultJSONProvider
+from models import db, User, Workout, CheckIn
+import serializers
+from serializers import FastJSONProvider, workout_serializer, checkin_serializer
+
+def seed(rows):
+    user = User(email="bench@thrshld.app", password_hash="x")
+    db.session.add(user)
+    db.session.flush()
+
+    start = date.today() - timedelta(days=rows)
+    db.session.bulk_insert_mappings(Workout, [{
+        'user_id': user.id,
+        'workout_name': "Daily Workout",
+        'workout_type': "generated",
+        'date_completed': start + timedelta(days=i),
+        'duration_minutes': random.randint(30, 90),
+        'exercises': [{'name': "Squat", 'sets': 5, 'reps': 5, 'weight': 100}],
+        'notes': "Warm-up, 5x5 squat at 80%, cool-down",
+    } for i in range(rows)])
+    db.session.bulk_insert_mappings(CheckIn, [{
+        'user_id': user.id,
+        'date': start + timedelta(days=i),
+        'energy_level': random.randint(1, 10),
+        'motivation_level': random.randint(1, 10),
+        'mood': "good",
+        'notes': "Feeling fine",
+    } for i in range(rows)])
+    db.session.commit()
+    return user.id
+
+def run(rows, repeat):
+    app = create_app()
+    stdlib = DefaultJSONProvider(app)
+    fast = FastJSONProvider(app)
+
+    with app.app_context():
+        db.create_all()
+        user_id = seed(rows)
+
+        def orm_path():
+            db.session.expunge_all()
+            workouts = Workout.query.filter_by(user_id=user_id).all()
+            checkins = CheckIn.query.filter_by(user_id=user_id).all()
+            return stdlib.dumps({
+                'workouts': [w.to_dict() for w in workouts],
+                'check_ins': [c.to_dict() for c in checkins],
+            })
+
+        def serializer_path():
+            return fast.dumps({
+                'workouts': workout_serializer.query(Workout.user_id == user_id),
+                'check_ins': checkin_serializer.query(CheckIn.user_id == user_id),
+            })
+
+        def tuples_path():
+            return fast.dumps({
+                'workouts': workout_serializer.serialize_tuples(workout_serializer.rows(Workout.user_id == user_id)),
+                'check_ins': checkin_serializer.serialize_tuples(checkin_serializer.rows(CheckIn.user_id == user_id)),
+            })
+
+        # Both paths must produce the same payload before timing them
+        assert json.loads(orm_path()) == json.loads(serializer_path())
+
+        cases = [("orm to_dict + stdlib json", orm_path), ("serializer + " + ('orjson' if serializers.use_orjson() else 'stdlib'), serializer_path),
+                 ("serializer tuples", tuples_path)]
+        baseline = None
+        print(f"{rows} workouts + {rows} check-ins, best of {repeat}")
+        for name, func in cases:
+            best = min(timeit.repeat(func, number=1, repeat=repeat))
+            baseline = baseline or best
+            print(f"  {name:<32} {best * 1000:9.2f} ms  {baseline / best:5.2f}x  {len(func())} bytes")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.rows, args.repeat)
@@ -0,0 +1,68 @@
+"""Cookie bytes and per-request session cost: Flask's signed cookie vs the server-side store.
+
+Uses a logged-in, Strava-connected session (the largest the app produces) and
+times open_session + save_session as Flask runs them around every request,
+for an unchanged session and for one that records a write (db_write_at).
+Runs offline against a throwaway SQLite database.
+
+Run with: python benchmarks/bench_sessions.py [--requests 5000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+os.environ.setdefault("SESSION_SECRET", "bench")
+
+import logging
+from flask.sessions import SecureCookieSessionInterface
+from app import app
+from session_store import ServerSessionInterface
+
+SESSION = {
+    '_user_id': '1042', '_fresh': True, '_permanent': True,
+    '_id': 'f' * 128,  # Flask-Login's session identifier (SHA-512 hex)
+    'strava_access_token': 'a' * 40, 'strava_refresh_token': 'r' * 40,
+    'strava_expires_at': 1767225600, 'strava_athlete_id': 123456789, 'user_id_for_strava': 1042,
+    'db_write_at': 1767220000.123456,
+}
+
+def cookie_for(interface):
+    """Save SESSION through the interface and return the Set-Cookie value a browser would send back"""
+    with app.test_request_context('/') as context:
+        session = interface.open_session(app, context.request)
+        session.update(SESSION)
+        session.permanent = True
+        response = app.response_class()
+        interface.save_session(app, session, response)
+        return response.headers['Set-Cookie'].split(';', 1)[0].split('=', 1)[1]
+
+def measure(interface, cookie, requests, write):
+    environ = {'HTTP_COOKIE': f"session={cookie}"}
+    with app.test_request_context('/', environ_base=environ) as context:
+        start = time.perf_counter()
+        for i in range(requests):
+            session = interface.open_session(app, context.request)
+            if write:
+                session['db_write_at'] = i
+            interface.save_session(app, session, app.response_class())
+        return (time.perf_counter() - start) / requests * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    for label, interface in (('signed cookie', SecureCookieSessionInterface()), ('server-side', ServerSessionInterface())):
+        cookie = cookie_for(interface)
+        read = measure(interface, cookie, args.requests, write=False)
+        written = measure(interface, cookie, args.requests // 10, write=True)
+        print(f"{label:<14} cookie {len(cookie):4d} bytes  unchanged {read:7.1f} us/req  with write {written:7.1f} us/req")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""Shared runner for micro-benchmark suites: calibrated timing, stored baselines and regression flags.
+
+Suites register cases with @suite.case(name, sizes) and call main(suite). Baselines
+live in benchmarks/baselines/<suite>.json and are per-machine, so they are not
+committed; record one with --save-baseline before changing a hot path, then rerun
+to see the ratio and any REGRESSION flags (--fail-on-regression for CI).
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+def create_app():
+    """A bare Flask app bound to an in-memory SQLite database, for offline runs"""
+    from flask import Flask
+    from models import db
+
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    return app
+
+class Suite:
+    """Collects benchmark cases; each case is a setup function returning the callable to time"""
+
+    def __init__(self, name):
+        self.name = name
+        self.cases = []
+
+    def case(self, name, sizes):
+        def register(setup):
+            self.cases.append((name, sizes, setup))
+            return setup
+        return register
+
+    def _time(self, func, rounds, min_time):
+        # Calibrate the loop count so each round lasts at least min_time
+        loops = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(loops):
+                func()
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+            loops *= 10 if elapsed < min_time / 10 else 2
+
+        timings = [elapsed / loops]
+        for _ in range(rounds - 1):
+            start = time.perf_counter()
+            for _ in range(loops):
+                func()
+            timings.append((time.perf_counter() - start) / loops)
+        return {'min': min(timings), 'mean': statistics.mean(timings),
+                'stdev': statistics.stdev(timings) if len(timings) > 1 else 0.0, 'loops': loops}
+
+    def run(self, only=None, rounds=5, min_time=0.05, max_size=None):
+        results = {}
+        for name, sizes, setup in self.cases:
+            if only and only.lower() not in name.lower():
+                continue
+            for size in sizes:
+                if max_size and size > max_size:
+                    continue
+                func = setup(size)
+                results[f"{name}[{size}]"] = self._time(func, rounds, min_time)
+        return results
+
+def format_seconds(value):
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if value >= scale:
+            return f"{value / scale:8.2f} {unit}"
+    return f"{value / 1e-9:8.2f} ns"
+
+def baseline_path(suite):
+    return os.path.join(BASELINE_DIR, f"{suite.name}.json")
+
+def main(suite, argv=None):
+    parser = argparse.ArgumentParser(description=f"Run the {suite.name} benchmark suite")
+    parser.add_argument('-k', dest='only', help='Only run cases whose name contains this string')
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.05, help='Minimum seconds per round')
+    parser.add_argument('--max-size', type=int, help='Skip sizes above this (quick runs)')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the new baseline')
+    parser.add_argument('--threshold', type=float, default=0.20, help='Slowdown vs baseline flagged as a regression')
+    parser.add_argument('--fail-on-regression', action='store_true', help='Exit non-zero when a regression is flagged')
+    args = parser.parse_args(argv)
+
+    results = suite.run(args.only, args.rounds, args.min_time, args.max_size)
+
+    baseline = {}
+    if os.path.exists(baseline_path(suite)):
+        with open(baseline_path(suite)) as handle:
+            baseline = json.load(handle)
+
+    regressions = []
+    print(f"{'case':<44} {'min':>11} {'mean':>11} {'stdev':>11}  vs baseline")
+    for name, result in results.items():
+        line = f"{name:<44} {format_seconds(result['min'])} {format_seconds(result['mean'])} {format_seconds(result['stdev'])}"
+        if name in baseline:
+            ratio = result['min'] / baseline[name]['min']
+            line += f"  {ratio:5.2f}x"
+            if ratio > 1 + args.threshold:
+                line += "  REGRESSION"
+                regressions.append(name)
+        print(line)
+
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        baseline.update(results)
+        with open(baseline_path(suite), 'w') as handle:
+            json.dump(baseline, handle, indent=2, sort_keys=True)
+        print(f"Saved baseline to {baseline_path(suite)}")
+
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+        if args.fail_on_regression:
+            sys.exit(1)
@@ -1,49 +1,29 @@
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, request, jsonify, session, Response, stream_with_context, current_app
 from flask_login import login_required, current_user, login_user
 from datetime import datetime, date, timedelta
 import requests
-import json
 import logging
-from sqlalchemy import func, and_
-from models import db, User, UserProfile, UserGoals, Workout, Exercise, CheckIn, BodyMeasurement, PersonalRecord
+from sqlalchemy import and_
+from models import db, User, UserProfile, Workout, Exercise, CheckIn, BodyMeasurement, PersonalRecord, DraftWorkout, StrengthEstimate
 from strava_integration import strava_api
-import os
+from serializers import workout_serializer, encode_series
+from pagination import PaginationError, parse_page_args, parse_date, keyset_page, encode_cursor
+from exporter import EXPORT_DATASETS, ExportError, parse_resume_token, export_user, compress_stream
+from compression import choose_encoding
+from cache_manager import cache
+from metrics import record_cache_lookup, record_workout_source
+from coach import WorkoutFormatError, ADJUSTED_NOTE, adjust_workout, adjust_draft
+from workout_engine import generate_workout, format_ai_workout, exercise_mappings, logged_exercise_mappings
+from records import detect_records, recompute_user
+from strength import update_estimates, recompute_estimates, near_maximal_lifts, refresh_profile_maxes
+from replica import read_replica
+from programmes import ensure_programme, session_for, format_session
+from utils import get_user_stats
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
-# OpenAI API Key
-OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "your-openai-api-key")
-
-def get_user_stats(user_id):
-    """Get user statistics"""
-    try:
-        total_workouts = Workout.query.filter_by(user_id=user_id).count()
-        
-        # Calculate current streak
-        recent_workouts = Workout.query.filter_by(user_id=user_id)\
-                                     .order_by(Workout.date_completed.desc())\
-                                     .limit(30).all()
-        
-        current_streak = 0
-        if recent_workouts:
-            current_date = date.today()
-            for workout in recent_workouts:
-                if workout.date_completed == current_date or workout.date_completed == current_date - timedelta(days=1):
-                    current_streak += 1
-                    current_date = workout.date_completed - timedelta(days=1)
-                else:
-                    break
-        
-        personal_records = PersonalRecord.query.filter_by(user_id=user_id).count()
-        
-        return {
-            'total_workouts': total_workouts,
-            'current_streak': current_streak,
-            'personal_records': personal_records
-        }
-    except Exception as e:
-        logging.error(f"Error getting user stats: {e}")
-        return {'total_workouts': 0, 'current_streak': 0, 'personal_records': 0}
+# Seconds the index page's embedded initial state is reused before rebuilding
+INITIAL_STATE_TTL = 60
 
 @api_bp.route("/check-in", methods=["POST"])
 @login_required
@@ -62,80 +42,60 @@ def check_in():
         checkin.notes = status
         db.session.add(checkin)
         
-        # Get user profile and goals for AI context
+        # Today's session from the user's stored programme (see programmes.py); regenerated only if 1RMs or goals changed
         profile = current_user.profile
-        goals = current_user.goals
-        
-        # Prepare AI prompt with user context
-        user_context = ""
-        if profile:
-            user_context += f"User: {profile.name}, Age: {profile.age}, Experience: {profile.experience_level or 'beginner'}, "
-            user_context += f"Training {profile.training_days_per_week or 3} days/week. "
-            
-            # Include 1RM data for strength programming
-            if profile.squat_1rm:
-                user_context += f"Squat 1RM: {profile.squat_1rm}kg, "
-            if profile.bench_1rm:
-                user_context += f"Bench 1RM: {profile.bench_1rm}kg, "
-            if profile.deadlift_1rm:
-                user_context += f"Deadlift 1RM: {profile.deadlift_1rm}kg, "
-            if profile.overhead_press_1rm:
-                user_context += f"Overhead Press 1RM: {profile.overhead_press_1rm}kg. "
-        
-        if goals:
-            user_context += f"Primary goal: {goals.workout_goal}. "
-            if goals.compound_lifts:
-                user_context += f"Focuses on: {', '.join(goals.compound_lifts)}. "
-        
-        prompt = f"""You are THRSHLD, an expert strength and conditioning coach. Based on this user's check-in, create a personalized workout.
-
-{user_context}
-
-User's Status Today: "{status}"
-
-Create a specific workout with:
-1. Warm-up (5-10 minutes)
-2. Main exercises with exact sets, reps, and weights (use their 1RM data for percentage-based programming)
-3. Cool-down
-
-Keep it concise and actionable. If they have 1RM data, use specific percentages (e.g., "Squat: 3 sets of 5 reps at 85% of {profile.squat_1rm if profile and profile.squat_1rm else 'your max'}kg").
-
-Match the workout intensity to their current state."""
-
-        # Call OpenAI API
-        response = requests.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {OPENAI_API_KEY}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": "gpt-4o",
-                "messages": [{"role": "user", "content": prompt}],
-                "max_tokens": 800,
-                "temperature": 0.7
-            },
-            timeout=30
-        )
-        
-        response.raise_for_status()
-        ai_response = response.json()
-        reply = ai_response['choices'][0]['message']['content']
+        programme = ensure_programme(current_user.id, profile, current_user.goals)
+        planned = session_for(programme, date.today())
+        record_cache_lookup('programme_session', planned is not None)
+        structured, workout_type = None, "generated"
+        if planned:
+            # A low-readiness day eases the stored rows as well as the text, so logs and analytics match the reply
+            structured, workout_type, source = adjust_workout(planned.to_dict(), status), "programme", 'programme'
+            reply = format_session(planned, structured['exercises'])
+        else:
+            # No programme session: serve the workout pre-generated overnight if there is one (see pregenerate.py)
+            draft = DraftWorkout.query.filter_by(user_id=current_user.id, for_date=date.today(), status='ready').first()
+            record_cache_lookup('workout_draft', draft is not None)
+            if draft and draft.workout:
+                structured, source = adjust_workout(draft.workout, status), 'draft'
+                reply = format_ai_workout(structured)
+            elif draft:
+                # Stored before drafts were structured
+                reply, source = adjust_draft(draft.content, status), 'draft'
+            if draft:
+                draft.status = 'served'
+                draft.served_at = datetime.utcnow()
+            else:
+                # Live coach, or the local engine if it is slow or down (see workout_engine.py)
+                reply, structured, source = generate_workout(current_user.id, profile, current_user.goals, status)
+                workout_type = "generated" if source == 'ai' else "local"
+        if structured and structured.get('adjusted'):
+            reply = f"{ADJUSTED_NOTE}\n\n{reply}"
+        record_workout_source(source)
         
         # Save workout
         workout = Workout()
         workout.user_id = current_user.id
-        workout.workout_name = "Daily Workout"
-        workout.workout_type = "generated"
+        workout.workout_name = structured['focus'] if structured else "Daily Workout"
+        workout.workout_type = workout_type
         workout.date_completed = date.today()
+        workout.exercises = structured['exercises'] if structured else None
         workout.notes = reply
         db.session.add(workout)
+        if structured:
+            # Prescribed exercises become Exercise rows so analytics see them, not just the text.
+            # PRs and e1RMs come only from sets the user logs (POST /api/workouts/<id>/log), never from the plan.
+            db.session.flush()
+            db.session.bulk_insert_mappings(Exercise, exercise_mappings(workout.id, structured['exercises']))
+        if planned:
+            planned.workout_id = workout.id
         db.session.commit()
+        cache.invalidate(current_user.id, 'initial_state')
 
         # Get updated stats
         stats = get_user_stats(current_user.id)
 
-        return jsonify({"reply": reply, "stats": stats})
+        return jsonify({"reply": reply, "workout": structured, "workout_id": workout.id, "stats": stats})
         
     except requests.exceptions.RequestException as e:
         logging.error(f"Network error calling OpenAI: {e}")
@@ -145,6 +105,61 @@ Match the workout intensity to their current state."""
         db.session.rollback()
         return jsonify({"error": "An unexpected error occurred. Please try again."}), 500
 
+@api_bp.route("/workouts/<int:workout_id>/log", methods=["POST"])
+@login_required
+def log_workout(workout_id):
+    """Record the sets actually performed for a workout; personal records and estimated 1RMs come from these only"""
+    try:
+        workout = Workout.query.filter_by(id=workout_id, user_id=current_user.id).first()
+        if workout is None:
+            return jsonify({"error": "Workout not found"}), 404
+        data = request.get_json(silent=True) or {}
+        try:
+            exercises = logged_exercise_mappings(workout.id, data.get('exercises'))
+        except WorkoutFormatError as e:
+            return jsonify({"error": str(e)}), 400
+
+        relogged = Exercise.query.filter_by(workout_id=workout.id, performed=True).delete()
+        if relogged:
+            # Replacing an earlier log can lower bests, so rebuild them instead of checking incrementally
+            db.session.bulk_insert_mappings(Exercise, exercises)
+            db.session.flush()
+            recompute_user(current_user.id)
+            records = PersonalRecord.query.filter_by(workout_id=workout.id).all()
+            latest = recompute_estimates(current_user.id)
+        else:
+            records = detect_records(current_user.id, workout.id, workout.date_completed, exercises)
+            latest = update_estimates(current_user.id, workout.id, workout.date_completed, exercises)
+            db.session.bulk_insert_mappings(Exercise, exercises)
+        profile = current_user.profile
+        if refresh_profile_maxes(profile, latest, near_maximal_lifts(profile, exercises)):
+            # Estimated maxes moved the profile's 1RMs, so re-resolve the programme's loads
+            ensure_programme(current_user.id, profile, current_user.goals)
+        CheckIn.query.filter_by(user_id=current_user.id, date=workout.date_completed).update({'workout_completed': True})
+        db.session.commit()
+        cache.invalidate(current_user.id, 'initial_state')
+
+        return jsonify({"records": [r.to_dict() for r in records], "stats": get_user_stats(current_user.id)})
+    except Exception as e:
+        logging.error(f"Error logging workout: {e}")
+        db.session.rollback()
+        return jsonify({"error": "Failed to log workout"}), 500
+
+@api_bp.route("/programme")
+@login_required
+def get_programme():
+    """Get the user's current training programme with every scheduled session"""
+    try:
+        programme = ensure_programme(current_user.id, current_user.profile, current_user.goals)
+        if programme is None:
+            return jsonify({"error": "Complete your profile to get a programme"}), 404
+        db.session.commit()
+        return jsonify(programme.to_dict())
+    except Exception as e:
+        logging.error(f"Error loading programme: {e}")
+        db.session.rollback()
+        return jsonify({"error": "Failed to load programme"}), 500
+
 @api_bp.route("/user-data")
 @login_required
 def get_user_data():
@@ -235,7 +250,10 @@ def set_profile():
             except ValueError:
                 pass
         
+        # New 1RMs re-resolve the programme's loads as a new version, in the same transaction
+        ensure_programme(current_user.id, profile, current_user.goals)
         db.session.commit()
+        cache.invalidate(current_user.id, 'initial_state')
         logging.debug(f"Profile saved successfully for user {current_user.email}")
         
         return jsonify({'success': True, 'message': 'Profile saved successfully!'})
@@ -249,59 +267,103 @@ def set_profile():
         return jsonify({'error': f'Failed to save profile: {str(e)}'}), 500
 
 # Progress Analytics Routes
+def count_workouts_per_week(workout_dates):
+    """Count workouts per week, keyed by the week's Monday as YYYY-W%U"""
+    weekly_data = {}
+    for workout_date in workout_dates:
+        week_start = workout_date - timedelta(days=workout_date.weekday())
+        week_key = week_start.strftime('%Y-W%U')
+        weekly_data[week_key] = weekly_data.get(week_key, 0) + 1
+    return weekly_data
+
+def collect_wellness_series(checkins):
+    """Split check-ins into per-metric (date, value) series plus a mood histogram"""
+    series = {
+        'energy_levels': [],
+        'motivation_levels': [],
+        'sleep_quality': [],
+        'stress_levels': [],
+        'muscle_soreness': []
+    }
+    mood_distribution = {}
+    
+    for checkin in checkins:
+        if checkin.energy_level:
+            series['energy_levels'].append((checkin.date, checkin.energy_level))
+        if checkin.motivation_level:
+            series['motivation_levels'].append((checkin.date, checkin.motivation_level))
+        if checkin.sleep_quality:
+            series['sleep_quality'].append((checkin.date, checkin.sleep_quality))
+        if checkin.stress_level:
+            series['stress_levels'].append((checkin.date, checkin.stress_level))
+        if checkin.muscle_soreness:
+            series['muscle_soreness'].append((checkin.date, checkin.muscle_soreness))
+        
+        if checkin.mood:
+            mood_distribution[checkin.mood] = mood_distribution.get(checkin.mood, 0) + 1
+    
+    return series, mood_distribution
+
+def build_progress_overview(user_id, stats):
+    """Build the progress overview payload from precomputed stats"""
+    # Get recent workouts (last 30 days)
+    thirty_days_ago = date.today() - timedelta(days=30)
+    recent_workouts = workout_serializer.rows(
+        Workout.user_id == user_id, Workout.date_completed >= thirty_days_ago,
+        order_by=Workout.date_completed.desc()
+    )
+    
+    # Calculate weekly workout frequency
+    weekly_data = count_workouts_per_week(w.date_completed for w in recent_workouts)
+    
+    # Get recent check-ins
+    recent_checkins = CheckIn.query.filter(
+        and_(CheckIn.user_id == user_id, CheckIn.date >= thirty_days_ago)
+    ).order_by(CheckIn.date.desc()).limit(7).all()
+    
+    # Calculate average metrics from check-ins
+    avg_energy = sum(c.energy_level for c in recent_checkins if c.energy_level) / len(recent_checkins) if recent_checkins else 0
+    avg_motivation = sum(c.motivation_level for c in recent_checkins if c.motivation_level) / len(recent_checkins) if recent_checkins else 0
+    
+    return {
+        'stats': stats,
+        'weekly_workout_data': weekly_data,
+        'avg_energy_level': round(avg_energy, 1),
+        'avg_motivation_level': round(avg_motivation, 1),
+        'recent_workouts': workout_serializer.serialize(recent_workouts[:5]),
+        'workout_consistency': len(recent_workouts) / 30 * 100  # percentage
+    }
+
 @api_bp.route("/progress/overview")
 @login_required
+@read_replica
 def progress_overview():
     """Get overall progress statistics"""
     try:
         user_id = current_user.id
-        
-        # Get basic stats
-        stats = get_user_stats(user_id)
-        
-        # Get recent workouts (last 30 days)
-        thirty_days_ago = date.today() - timedelta(days=30)
-        recent_workouts = Workout.query.filter(
-            and_(Workout.user_id == user_id, Workout.date_completed >= thirty_days_ago)
-        ).order_by(Workout.date_completed.desc()).all()
-        
-        # Calculate weekly workout frequency
-        weekly_data = {}
-        for workout in recent_workouts:
-            week_start = workout.date_completed - timedelta(days=workout.date_completed.weekday())
-            week_key = week_start.strftime('%Y-W%U')
-            weekly_data[week_key] = weekly_data.get(week_key, 0) + 1
-        
-        # Get recent check-ins
-        recent_checkins = CheckIn.query.filter(
-            and_(CheckIn.user_id == user_id, CheckIn.date >= thirty_days_ago)
-        ).order_by(CheckIn.date.desc()).limit(7).all()
-        
-        # Calculate average metrics from check-ins
-        avg_energy = sum(c.energy_level for c in recent_checkins if c.energy_level) / len(recent_checkins) if recent_checkins else 0
-        avg_motivation = sum(c.motivation_level for c in recent_checkins if c.motivation_level) / len(recent_checkins) if recent_checkins else 0
-        
-        return jsonify({
-            'stats': stats,
-            'weekly_workout_data': weekly_data,
-            'avg_energy_level': round(avg_energy, 1),
-            'avg_motivation_level': round(avg_motivation, 1),
-            'recent_workouts': [w.to_dict() for w in recent_workouts[:5]],
-            'workout_consistency': len(recent_workouts) / 30 * 100  # percentage
-        })
+        return jsonify(build_progress_overview(user_id, get_user_stats(user_id)))
     except Exception as e:
         logging.error(f"Error getting progress overview: {e}")
         return jsonify({"error": "Failed to load progress data"}), 500
 
 @api_bp.route("/progress/strength")
-@login_required 
+@login_required
+@read_replica
 def strength_progress():
     """Get strength progression data"""
     try:
         user_id = current_user.id
         
-        # Get personal records
-        records = PersonalRecord.query.filter_by(user_id=user_id).order_by(PersonalRecord.date_achieved.desc()).all()
+        page = parse_page_args(request.args)
+        next_positions = {}
+        
+        # Get personal records, newest first
+        records, position = keyset_page(
+            PersonalRecord.query.filter_by(user_id=user_id),
+            PersonalRecord.date_achieved, PersonalRecord.id, page, 'records', descending=True
+        )
+        if position:
+            next_positions['records'] = position
         
         # Group by exercise
         strength_data = {}
@@ -315,10 +377,28 @@ def strength_progress():
                 'type': record.record_type
             })
         
-        # Get exercise progression over time
-        exercises = Exercise.query.join(Workout).filter(
+        # Get exercise progression over time, selecting the workout date
+        # alongside each exercise instead of lazy-loading every workout
+        exercise_query = db.session.query(
+            Exercise.id, Exercise.exercise_name, Exercise.weight_per_set, Exercise.reps_per_set,
+            Workout.date_completed
+        ).join(Workout).filter(
             Workout.user_id == user_id
-        ).filter(Exercise.weight_per_set.isnot(None)).all()
+        ).filter(Exercise.weight_per_set.isnot(None), Exercise.performed.is_(True))
+        exercises, position = keyset_page(exercise_query, Workout.date_completed, Exercise.id, page, 'progression')
+        if position:
+            next_positions['progression'] = position
+        
+        # Rolling estimated 1RM per lift (see strength.py)
+        estimates, position = keyset_page(
+            StrengthEstimate.query.filter_by(user_id=user_id),
+            StrengthEstimate.date, StrengthEstimate.id, page, 'estimates'
+        )
+        if position:
+            next_positions['estimates'] = position
+        estimate_data = {}
+        for estimate in estimates:
+            estimate_data.setdefault(estimate.lift, []).append((estimate.date, estimate.rolling_e1rm_kg))
         
         progression_data = {}
         for exercise in exercises:
@@ -327,101 +407,214 @@ def strength_progress():
             
             max_weight = max(exercise.weight_per_set) if exercise.weight_per_set else 0
             progression_data[exercise.exercise_name].append({
-                'date': exercise.workout.date_completed.isoformat(),
+                'date': exercise.date_completed.isoformat(),
                 'max_weight': max_weight,
                 'total_volume': sum(exercise.weight_per_set) * sum(exercise.reps_per_set) if exercise.reps_per_set else 0
             })
         
         return jsonify({
             'personal_records': strength_data,
-            'progression_data': progression_data
+            'progression_data': progression_data,
+            'estimated_1rm': {lift: encode_series(points, request.args.get('format') == 'columnar')
+                              for lift, points in estimate_data.items()},
+            'next_cursor': encode_cursor(next_positions)
         })
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         logging.error(f"Error getting strength progress: {e}")
         return jsonify({"error": "Failed to load strength data"}), 500
 
 @api_bp.route("/progress/body-metrics")
 @login_required
+@read_replica
 def body_metrics():
     """Get body measurement progression"""
     try:
         user_id = current_user.id
         
-        measurements = BodyMeasurement.query.filter_by(user_id=user_id).order_by(BodyMeasurement.date.asc()).all()
+        columnar = request.args.get('format') == 'columnar'
+        page = parse_page_args(request.args)
+        
+        measurements, position = keyset_page(
+            BodyMeasurement.query.filter_by(user_id=user_id),
+            BodyMeasurement.date, BodyMeasurement.id, page, 'measurements'
+        )
+        latest = BodyMeasurement.query.filter_by(user_id=user_id)\
+                                      .order_by(BodyMeasurement.date.desc(), BodyMeasurement.id.desc()).first()
         
         weight_data = []
         body_fat_data = []
         measurement_data = {}
         
         for measurement in measurements:
-            date_str = measurement.date.isoformat()
-            
             if measurement.weight_kg:
-                weight_data.append({'date': date_str, 'value': measurement.weight_kg})
+                weight_data.append((measurement.date, measurement.weight_kg))
             
             if measurement.body_fat_percentage:
-                body_fat_data.append({'date': date_str, 'value': measurement.body_fat_percentage})
+                body_fat_data.append((measurement.date, measurement.body_fat_percentage))
             
             if measurement.measurements:
                 for key, value in measurement.measurements.items():
                     if key not in measurement_data:
                         measurement_data[key] = []
-                    measurement_data[key].append({'date': date_str, 'value': value})
+                    measurement_data[key].append((measurement.date, value))
         
         return jsonify({
-            'weight_progression': weight_data,
-            'body_fat_progression': body_fat_data,
-            'measurements': measurement_data,
-            'latest_measurement': measurements[-1].to_dict() if measurements else None
+            'weight_progression': encode_series(weight_data, columnar),
+            'body_fat_progression': encode_series(body_fat_data, columnar),
+            'measurements': {key: encode_series(points, columnar) for key, points in measurement_data.items()},
+            'latest_measurement': latest.to_dict() if latest else None,
+            'next_cursor': encode_cursor({'measurements': position} if position else {})
         })
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         logging.error(f"Error getting body metrics: {e}")
         return jsonify({"error": "Failed to load body metrics"}), 500
 
 @api_bp.route("/progress/wellness")
 @login_required
+@read_replica
 def wellness_trends():
     """Get wellness and check-in trends"""
     try:
         user_id = current_user.id
         
-        # Get last 90 days of check-ins
-        ninety_days_ago = date.today() - timedelta(days=90)
-        checkins = CheckIn.query.filter(
-            and_(CheckIn.user_id == user_id, CheckIn.date >= ninety_days_ago)
-        ).order_by(CheckIn.date.asc()).all()
-        
-        wellness_data = {
-            'energy_levels': [],
-            'motivation_levels': [],
-            'sleep_quality': [],
-            'stress_levels': [],
-            'muscle_soreness': [],
-            'mood_distribution': {}
-        }
+        columnar = request.args.get('format') == 'columnar'
         
-        for checkin in checkins:
-            date_str = checkin.date.isoformat()
-            
-            if checkin.energy_level:
-                wellness_data['energy_levels'].append({'date': date_str, 'value': checkin.energy_level})
-            if checkin.motivation_level:
-                wellness_data['motivation_levels'].append({'date': date_str, 'value': checkin.motivation_level})
-            if checkin.sleep_quality:
-                wellness_data['sleep_quality'].append({'date': date_str, 'value': checkin.sleep_quality})
-            if checkin.stress_level:
-                wellness_data['stress_levels'].append({'date': date_str, 'value': checkin.stress_level})
-            if checkin.muscle_soreness:
-                wellness_data['muscle_soreness'].append({'date': date_str, 'value': checkin.muscle_soreness})
-            
-            if checkin.mood:
-                wellness_data['mood_distribution'][checkin.mood] = wellness_data['mood_distribution'].get(checkin.mood, 0) + 1
+        # Defaults to the last 90 days of check-ins
+        page = parse_page_args(request.args, default_from=date.today() - timedelta(days=90))
+        checkins, position = keyset_page(
+            CheckIn.query.filter_by(user_id=user_id), CheckIn.date, CheckIn.id, page, 'check_ins'
+        )
+        
+        series, mood_distribution = collect_wellness_series(checkins)
+        
+        wellness_data = {key: encode_series(points, columnar) for key, points in series.items()}
+        wellness_data['mood_distribution'] = mood_distribution
+        wellness_data['next_cursor'] = encode_cursor({'check_ins': position} if position else {})
         
         return jsonify(wellness_data)
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         logging.error(f"Error getting wellness trends: {e}")
         return jsonify({"error": "Failed to load wellness data"}), 500
 
+# Dashboard Routes
+def build_recovery_section():
+    """Build the Strava recovery section of the dashboard"""
+    if not strava_api.is_connected():
+        return {'connected': False, 'metrics': None}
+    return {'connected': True, 'metrics': strava_api.get_recovery_metrics()}
+
+def build_dashboard_sections(user, include_recovery=True):
+    """Ordered (name, builder) pairs shared by /api/dashboard and the index render"""
+    user_id = user.id
+    profile = user.profile
+    goals = user.goals
+    shared = {}
+    
+    def stats_section():
+        # Computed once and reused by the overview section
+        if 'stats' not in shared:
+            shared['stats'] = get_user_stats(user_id)
+        return shared['stats']
+    
+    def latest_workout_section():
+        latest = workout_serializer.query(Workout.user_id == user_id,
+                                          order_by=Workout.date_completed.desc(), limit=1)
+        return latest[0] if latest else None
+    
+    # Ordered cheapest first so streamed clients can paint early;
+    # recovery goes last because it waits on the Strava API
+    sections = [
+        ('profile', lambda: profile.to_dict() if profile else {}),
+        ('goals', lambda: goals.to_dict() if goals else {}),
+        ('stats', stats_section),
+        ('latest_workout', latest_workout_section),
+        ('overview', lambda: build_progress_overview(user_id, stats_section())),
+    ]
+    if include_recovery:
+        sections.append(('recovery', build_recovery_section))
+    return sections
+
+def build_initial_state(user):
+    """Complete first-screen state embedded in the index render, cached briefly per user"""
+    state = cache.get(user.id, 'initial_state')
+    if state is None:
+        state = {name: build() for name, build in build_dashboard_sections(user, include_recovery=False)}
+        cache.set(user.id, 'initial_state', state, ttl=INITIAL_STATE_TTL)
+    
+    # Strava connection lives in the session, so it is never cached; the
+    # metrics themselves need the Strava API and are fetched by the client
+    return dict(state, recovery={'connected': strava_api.is_connected(), 'metrics': None})
+
+@api_bp.route("/dashboard")
+@login_required
+def dashboard():
+    """Get profile, goals, stats, progress and recovery data in one round trip"""
+    try:
+        sections = build_dashboard_sections(current_user)
+        
+        if request.args.get('stream') in ('1', 'true'):
+            def generate():
+                for name, build in sections:
+                    try:
+                        yield current_app.json.dumps({'section': name, 'data': build()}) + "\n"
+                    except Exception as e:
+                        logging.error(f"Error building dashboard section {name}: {e}")
+                        yield current_app.json.dumps({'section': name, 'error': f"Failed to load {name}"}) + "\n"
+            
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        
+        return jsonify({name: build() for name, build in sections})
+    except Exception as e:
+        logging.error(f"Error loading dashboard: {e}")
+        return jsonify({"error": "Failed to load dashboard"}), 500
+
+# Data Export Routes
+@api_bp.route("/export")
+@login_required
+@read_replica
+def export_data():
+    """Stream the user's full training history as NDJSON or CSV"""
+    try:
+        fmt = request.args.get('format', 'ndjson')
+        datasets = request.args.getlist('dataset') or list(EXPORT_DATASETS)
+        unknown = [name for name in datasets if name not in EXPORT_DATASETS]
+        if unknown:
+            return jsonify({"error": f"Unknown dataset: {', '.join(unknown)}"}), 400
+        
+        # Clients resume an interrupted download by passing the dataset and id
+        # of the last row they received, e.g. ?resume=check_ins:1234
+        resume = parse_resume_token(request.args.get('resume'))
+        chunks = export_user(
+            current_user.id, fmt, datasets,
+            date_from=parse_date(request.args.get('from'), 'from'),
+            date_to=parse_date(request.args.get('to'), 'to'),
+            resume=resume
+        )
+        
+        encoding = choose_encoding(request.headers.get('Accept-Encoding', ''))
+        if encoding:
+            chunks = compress_stream(chunks, encoding)
+        
+        extension = 'csv' if fmt == 'csv' else 'ndjson'
+        response = Response(stream_with_context(chunks),
+                            mimetype='text/csv' if fmt == 'csv' else 'application/x-ndjson')
+        response.headers['Content-Disposition'] = f'attachment; filename="thrshld-export.{extension}"'
+        response.vary.add('Accept-Encoding')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        return response
+    except (ExportError, PaginationError) as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logging.error(f"Error exporting data: {e}")
+        return jsonify({"error": "Failed to export data"}), 500
+
 # Strava Integration Routes
 @api_bp.route("/strava/recovery-metrics")
 @login_required
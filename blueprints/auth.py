@@ -4,6 +4,8 @@ from werkzeug.security import check_password_hash
 from datetime import timedelta
 import logging
 from models import db, User
+from blueprints.api import build_initial_state
+from render_cache import render_cached_template
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -21,7 +23,7 @@ def login():
         
         if not email or not password:
             flash("Email and password are required")
-            return render_template("auth.html")
+            return render_cached_template("auth.html")
         
         user = User.query.filter_by(email=email).first()
         logging.debug(f"User found: {user is not None}")
@@ -43,29 +45,24 @@ def login():
                 
                 if not has_profile or not has_name:
                     logging.debug("User needs profile setup, rendering profile setup template directly")
-                    return render_template("profile_setup.html")
+                    return render_cached_template("profile_setup.html")
                 else:
                     logging.debug("User has complete profile, loading main app directly")
                     # Load main app directly instead of redirecting
                     try:
-                        user_data = {
-                            'profile': {'name': user.profile.name, 'age': user.profile.age, 'gender': user.profile.gender},
-                            'goals': {},
-                            'stats': {'total_workouts': 0, 'current_streak': 0, 'personal_records': 0}
-                        }
-                        logging.debug(f"Rendering index.html with user data: {user_data}")
+                        user_data = build_initial_state(user)
                         return render_template("index.html", user_data=user_data)
                     except Exception as e:
                         logging.error(f"Error loading user data in login: {e}")
                         return render_template("index.html", user_data={'profile': {'name': user.profile.name}, 'goals': {}, 'stats': {}})
             else:
                 flash("Invalid email or password")
-                return render_template("auth.html")
+                return render_cached_template("auth.html")
         else:
             flash("Invalid email or password")
-            return render_template("auth.html")
+            return render_cached_template("auth.html")
     
-    return render_template("auth.html")
+    return render_cached_template("auth.html")
 
 @auth_bp.route("/register", methods=["POST"])
 def register():
@@ -78,15 +75,15 @@ def register():
     
     if not email or not password:
         flash("Email and password are required")
-        return render_template("auth.html")
+        return render_cached_template("auth.html")
     
     if password != confirm_password:
         flash("Passwords do not match")
-        return render_template("auth.html")
+        return render_cached_template("auth.html")
     
     if User.query.filter_by(email=email).first():
         flash("Email already registered")
-        return render_template("auth.html")
+        return render_cached_template("auth.html")
     
     # Create new user
     user = User()
@@ -2,6 +2,8 @@ import json
 import time
 import logging
 from typing import Optional, Dict, Any
+from metrics import record_cache_lookup
+from tracing import span
 
 class CacheManager:
     """Simple in-memory cache for AI responses and API data"""
@@ -16,8 +18,14 @@ class CacheManager:
     
     def get(self, user_id: int, request_type: str, context: str = "") -> Optional[Any]:
         """Get cached data if it exists and hasn't expired"""
-        key = self._generate_key(user_id, request_type, context)
-        
+        with span('cache.get', cache=request_type) as lookup:
+            data = self._lookup(self._generate_key(user_id, request_type, context))
+            hit = data is not None
+            lookup.set_tag('hit', hit)
+        record_cache_lookup(request_type, hit)
+        return data
+    
+    def _lookup(self, key: str) -> Optional[Any]:
         if key not in self.cache:
             return None
         
@@ -0,0 +1,289 @@
+import os
+import re
+import json
+import time
+import logging
+import threading
+import requests
+from collections import Counter
+from typing import Optional, Union, Tuple, List, Dict, Any
+from metrics import record_openai_call
+from tracing import span, inject_headers
+from programmes import LIFT_NAMES, round_load
+from prompt_builder import PromptBuilder, PromptReport
+
+# OpenAI API Key
+OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "your-openai-api-key")
+OPENAI_API_BASE = os.environ.get("OPENAI_API_BASE", "https://api.openai.com/v1")
+OPENAI_MODEL = os.environ.get("OPENAI_MODEL", "gpt-4o")
+OPENAI_TIMEOUT = 30  # seconds
+MAX_TOKENS = 800
+# Hard cap on the check-in prompt's context, excluding the static system prompt
+PROMPT_TOKEN_BUDGET = int(os.environ.get("PROMPT_TOKEN_BUDGET", "1200"))
+RECENT_WORKOUTS_IN_DETAIL = 3
+# Consecutive failures that open the breaker, and how long calls are then skipped
+OPENAI_FAILURE_THRESHOLD = int(os.environ.get("OPENAI_FAILURE_THRESHOLD", "3"))
+OPENAI_RETRY_AFTER = int(os.environ.get("OPENAI_RETRY_AFTER", "30"))
+
+# Check-in phrases that mean today's session should be eased off
+LOW_READINESS = re.compile(r"\b(tired|exhausted|drained|sore|sick|ill|injured|stressed|slept (badly|poorly)|poor sleep|no sleep)\b",
+                           re.IGNORECASE)
+LOW_READINESS_LOAD = 0.9  # share of the prescribed working load kept on a low-readiness day
+ADJUSTED_NOTE = ("Adjusted for today's check-in: working weights are about 10% lighter "
+                 "and each main lift has one set fewer.")
+
+# Structured Outputs schema for a check-in workout; exercises use the programme session shape plus notes
+EXERCISE_SCHEMA = {
+    "type": "object",
+    "additionalProperties": False,
+    "required": ["name", "lift", "sets", "reps", "percent_1rm", "load_kg", "rest_seconds", "notes"],
+    "properties": {
+        "name": {"type": "string"},
+        "lift": {"type": ["string", "null"], "enum": [*LIFT_NAMES, None]},
+        "sets": {"type": "integer"},
+        "reps": {"type": "integer"},
+        "percent_1rm": {"type": ["number", "null"]},
+        "load_kg": {"type": ["number", "null"]},
+        "rest_seconds": {"type": ["integer", "null"]},
+        "notes": {"type": ["string", "null"]},
+    },
+}
+WORKOUT_SCHEMA = {
+    "type": "object",
+    "additionalProperties": False,
+    "required": ["focus", "warm_up", "exercises", "cool_down", "notes"],
+    "properties": {
+        "focus": {"type": "string"},
+        "warm_up": {"type": "string"},
+        "exercises": {"type": "array", "items": EXERCISE_SCHEMA},
+        "cool_down": {"type": "string"},
+        "notes": {"type": ["string", "null"]},
+    },
+}
+WORKOUT_RESPONSE_FORMAT = {"type": "json_schema", "json_schema": {"name": "workout", "strict": True, "schema": WORKOUT_SCHEMA}}
+
+# Static, so every check-in shares this prefix and OpenAI can serve it from its prompt cache
+CHECKIN_SYSTEM_PROMPT = """You are THRSHLD, an expert strength and conditioning coach. Based on the user's profile, \
+recent training and today's check-in, create a personalized workout for today.
+
+Create a specific workout with:
+1. Warm-up (5-10 minutes)
+2. Main exercises with exact sets, reps, and weights (use their 1RM data for percentage-based programming)
+3. Cool-down
+
+Keep it concise and actionable. If they have 1RM data, use specific percentages (e.g., "Squat: 3 sets of 5 reps at 85% \
+of a 140kg 1RM = 120kg"). Match the workout intensity to their current state and recent training load; avoid repeating \
+yesterday's main lift.
+
+Reply in JSON. Put each main exercise in "exercises" with the lift it trains (or null for accessories), sets, reps, \
+the percentage of 1RM and the resulting load in kg where they apply, and rest in seconds."""
+
+class WorkoutFormatError(ValueError):
+    """The coach's reply did not match WORKOUT_SCHEMA"""
+
+class CircuitOpen(requests.exceptions.RequestException):
+    """Raised instead of calling OpenAI while the breaker is open"""
+
+class OpenAIHealth:
+    """Per-process circuit breaker for the chat completions API"""
+
+    def __init__(self):
+        self.failures = 0
+        self.open_until = 0.0
+        self.lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self.open_until
+
+    def record_success(self) -> None:
+        self.failures = 0
+
+    def record_failure(self, reason) -> None:
+        with self.lock:
+            self.failures += 1
+            if self.failures >= OPENAI_FAILURE_THRESHOLD and self.available:
+                logging.warning(f"OpenAI failing, skipping calls for {OPENAI_RETRY_AFTER}s: {reason}")
+                self.open_until = time.monotonic() + OPENAI_RETRY_AFTER
+
+# Global OpenAI health instance
+openai_health = OpenAIHealth()
+
+def build_user_context(profile, goals) -> str:
+    """Describe the user's profile, 1RMs and goals for the coaching prompt"""
+    user_context = ""
+    if profile:
+        user_context += f"User: {profile.name}, Age: {profile.age}, Experience: {profile.experience_level or 'beginner'}, "
+        user_context += f"Training {profile.training_days_per_week or 3} days/week. "
+
+        # Include 1RM data for strength programming
+        if profile.squat_1rm:
+            user_context += f"Squat 1RM: {profile.squat_1rm}kg, "
+        if profile.bench_1rm:
+            user_context += f"Bench 1RM: {profile.bench_1rm}kg, "
+        if profile.deadlift_1rm:
+            user_context += f"Deadlift 1RM: {profile.deadlift_1rm}kg, "
+        if profile.overhead_press_1rm:
+            user_context += f"Overhead Press 1RM: {profile.overhead_press_1rm}kg. "
+
+    if goals:
+        user_context += f"Primary goal: {goals.workout_goal}. "
+        if goals.compound_lifts:
+            user_context += f"Focuses on: {', '.join(goals.compound_lifts)}. "
+    return user_context
+
+def describe_workout(workout, detail: bool = True) -> str:
+    line = f"{workout.date_completed.isoformat()} {workout.workout_name}"
+    exercises = [e for e in (workout.exercises or []) if isinstance(e, dict) and e.get('name')] if detail else []
+    if exercises:
+        line += ": " + ", ".join(f"{e['name']} {e.get('sets')}x{e.get('reps')}"
+                                 + (f" at {e['load_kg']:g}kg" if e.get('load_kg') else "") for e in exercises)
+    return line
+
+def build_checkin_messages(profile, goals, status: str, workouts, checkins) -> Tuple[List[Dict[str, str]], PromptReport]:
+    """Check-in prompt under PROMPT_TOKEN_BUDGET; workouts and check-ins newest first"""
+    builder = PromptBuilder(CHECKIN_SYSTEM_PROMPT, PROMPT_TOKEN_BUDGET)
+    builder.add('profile', build_user_context(profile, goals), priority=1)
+
+    recent, older = workouts[:RECENT_WORKOUTS_IN_DETAIL], workouts[RECENT_WORKOUTS_IN_DETAIL:]
+    if recent:
+        builder.add('recent_workouts', "Most recent sessions:\n" + "\n".join(describe_workout(w) for w in recent), priority=2,
+                    summary="Most recent sessions: " + "; ".join(describe_workout(w, detail=False) for w in recent))
+    if older:
+        names = Counter(w.workout_name for w in older)
+        builder.add('older_workouts', "Earlier sessions:\n" + "\n".join(describe_workout(w, detail=False) for w in older),
+                    priority=4, summary=f"Earlier: {len(older)} sessions since {older[-1].date_completed.isoformat()}, "
+                                        f"mostly {', '.join(name for name, _ in names.most_common(3))}.")
+    if checkins:
+        low = sum(1 for c in checkins if c.notes and LOW_READINESS.search(c.notes))
+        builder.add('checkins', "Previous check-ins:\n" + "\n".join(
+                        f"{c.date.isoformat()}: {c.notes or c.mood or 'no notes'}" for c in checkins), priority=3,
+                    summary=f"Previous check-ins: {len(checkins)} in the last week, {low} reporting low readiness.")
+
+    builder.add('status', f'User\'s Status Today: "{status}"', priority=0)
+    return builder.build()
+
+def build_commentary_prompt(user_context: str, status: str, workout: str) -> str:
+    return f"""You are THRSHLD, an expert strength and conditioning coach. This workout has already been planned for the user; do not change it.
+
+{user_context}
+
+User's Status Today: "{status}"
+
+Workout:
+{workout}
+
+In two or three sentences, tell them what to focus on today and how to adjust if they feel worse or better than expected."""
+
+def completion_body(prompt: Union[str, List[Dict[str, str]]], max_tokens: int = MAX_TOKENS,
+                    response_format: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Chat completions request body, shared by live calls and batch jobs; prompt is text or a message list"""
+    body = {
+        "model": OPENAI_MODEL,
+        "messages": prompt if isinstance(prompt, list) else [{"role": "user", "content": prompt}],
+        "max_tokens": max_tokens,
+        "temperature": 0.7
+    }
+    if response_format:
+        body["response_format"] = response_format
+    return body
+
+def api_headers() -> Dict[str, str]:
+    return {"Authorization": f"Bearer {OPENAI_API_KEY}"}
+
+def request_completion(prompt: Union[str, List[Dict[str, str]]], timeout: float = OPENAI_TIMEOUT, max_tokens: int = MAX_TOKENS,
+                       response_format: Optional[Dict[str, Any]] = None) -> Tuple[str, Dict[str, Any]]:
+    """Call the chat completions API; returns (reply, usage) and raises requests exceptions"""
+    if not openai_health.available:
+        record_openai_call(0.0, 'circuit_open')
+        raise CircuitOpen("OpenAI circuit breaker is open")
+    started = time.perf_counter()
+    try:
+        with span('openai POST chat/completions', kind='CLIENT', **{'peer.service': 'openai', 'model': OPENAI_MODEL}) as call:
+            response = requests.post(
+                f"{OPENAI_API_BASE}/chat/completions",
+                headers=inject_headers({**api_headers(), "Content-Type": "application/json"}),
+                json=completion_body(prompt, max_tokens, response_format),
+                timeout=timeout
+            )
+            call.set_tag('http.status_code', response.status_code)
+        response.raise_for_status()
+    except requests.exceptions.Timeout as e:
+        record_openai_call(time.perf_counter() - started, 'timeout')
+        openai_health.record_failure(e)
+        raise
+    except requests.exceptions.RequestException as e:
+        record_openai_call(time.perf_counter() - started, 'error')
+        openai_health.record_failure(e)
+        raise
+    openai_health.record_success()
+    ai_response = response.json()
+    usage = ai_response.get('usage') or {}
+    record_openai_call(time.perf_counter() - started, 'ok', usage)
+    return ai_response['choices'][0]['message']['content'], usage
+
+def _number(value, low, high, integer=False) -> bool:
+    if isinstance(value, bool) or not isinstance(value, int if integer else (int, float)):
+        return False
+    return low <= value <= high
+
+def parse_workout(content: str) -> Dict[str, Any]:
+    """Decode and check a structured workout reply; raises WorkoutFormatError"""
+    try:
+        workout = json.loads(content)
+    except ValueError as e:
+        raise WorkoutFormatError(f"Reply is not JSON: {e}")
+    if not isinstance(workout, dict) or not isinstance(workout.get("exercises"), list) or not workout["exercises"]:
+        raise WorkoutFormatError("Reply has no exercises")
+    for field in ("focus", "warm_up", "cool_down"):
+        if not isinstance(workout.get(field), str):
+            raise WorkoutFormatError(f"Reply is missing {field}")
+
+    exercises = []
+    for exercise in workout["exercises"]:
+        if not isinstance(exercise, dict) or not isinstance(exercise.get("name"), str) or not exercise["name"].strip():
+            raise WorkoutFormatError("Exercise without a name")
+        name = exercise["name"].strip()
+        if not _number(exercise.get("sets"), 1, 20, integer=True) or not _number(exercise.get("reps"), 1, 100, integer=True):
+            raise WorkoutFormatError(f"{name}: sets must be 1-20 and reps 1-100")
+        for field, high in (("load_kg", 1000), ("percent_1rm", 110), ("rest_seconds", 900)):
+            if exercise.get(field) is not None and not _number(exercise[field], 0, high, integer=field == "rest_seconds"):
+                raise WorkoutFormatError(f"{name}: {field} must be between 0 and {high}")
+        lift = exercise.get("lift")
+        exercises.append({"name": name[:100], "lift": lift if lift in LIFT_NAMES else None,
+                          "sets": exercise["sets"], "reps": exercise["reps"],
+                          "percent_1rm": exercise.get("percent_1rm"), "load_kg": exercise.get("load_kg"),
+                          "rest_seconds": exercise.get("rest_seconds"), "notes": exercise.get("notes") or None})
+    return {"focus": workout["focus"].strip()[:100] or "Daily Workout", "warm_up": workout["warm_up"],
+            "exercises": exercises, "cool_down": workout["cool_down"], "notes": workout.get("notes") or None}
+
+def request_workout(prompt: Union[str, List[Dict[str, str]]], timeout: float = OPENAI_TIMEOUT) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Structured workout from the coach; returns (workout, usage)"""
+    reply, usage = request_completion(prompt, timeout, response_format=WORKOUT_RESPONSE_FORMAT)
+    return parse_workout(reply), usage
+
+def adjust_workout(workout: Dict[str, Any], status: str) -> Dict[str, Any]:
+    """A structured session eased for a low-readiness check-in; adds adjusted=True when anything changed"""
+    if not LOW_READINESS.search(status):
+        return workout
+    exercises = []
+    for exercise in workout['exercises']:
+        exercise = dict(exercise)
+        if exercise['lift']:
+            exercise['sets'] = max(1, exercise['sets'] - 1)
+            if exercise['load_kg']:
+                exercise['load_kg'] = round_load(exercise['load_kg'] * LOW_READINESS_LOAD)
+            if exercise['percent_1rm']:
+                exercise['percent_1rm'] = round(exercise['percent_1rm'] * LOW_READINESS_LOAD, 1)
+        exercises.append(exercise)
+    return {**workout, 'exercises': exercises, 'adjusted': True}
+
+def adjust_draft(draft: str, status: str) -> str:
+    """Cheap local adjustment of a pre-generated workout to today's check-in.
+
+    Drafts are stored as text only, so this can only prepend advice; structured sessions go through adjust_workout.
+    """
+    if LOW_READINESS.search(status):
+        return ("Adjusted for today's check-in: keep the warm-up and cool-down as written, "
+                "reduce working weights by about 10% and drop the final set of each main exercise.\n\n" + draft)
+    return draft
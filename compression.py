@@ -0,0 +1,77 @@
+import gzip
+import logging
+from flask import request
+
+# brotli is optional - gzip is used when it is not installed
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/html', 'text/css', 'text/plain', 'text/javascript', 'application/javascript'}
+MIN_COMPRESS_SIZE = 500  # bytes; smaller bodies aren't worth the CPU
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Encodings a '*' in Accept-Encoding stands for, unless listed on their own
+WILDCARD_ENCODINGS = ('br', 'gzip')
+
+def accepted_encodings(accept_encoding: str) -> set:
+    """Parse an Accept-Encoding header into the set of encoding names with a non-zero q-value"""
+    qualities = {}
+    for part in accept_encoding.split(','):
+        name, *params = [piece.strip() for piece in part.split(';')]
+        if not name:
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.lower()] = quality
+
+    accepted = {name for name, quality in qualities.items() if quality > 0}
+    if '*' in accepted:
+        accepted |= {name for name in WILDCARD_ENCODINGS if name not in qualities}
+    return accepted
+
+def choose_encoding(accept_encoding: str) -> str:
+    """Pick the best supported content encoding the client accepts"""
+    accepted = accepted_encodings(accept_encoding)
+    if brotli and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return ''
+
+def compress_response(response):
+    """Compress eligible responses according to the request's Accept-Encoding"""
+    if (response.status_code != 200
+            or response.direct_passthrough
+            or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+
+    encoding = choose_encoding(request.headers.get('Accept-Encoding', ''))
+    if not encoding:
+        return response
+
+    body = response.get_data()
+    if len(body) < MIN_COMPRESS_SIZE:
+        return response
+
+    if encoding == 'br':
+        compressed = brotli.compress(body, quality=BROTLI_QUALITY)
+    else:
+        compressed = gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    logging.debug(f"Compressed {request.path} with {encoding}: {len(body)} -> {len(compressed)} bytes")
+    return response
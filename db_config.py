@@ -0,0 +1,114 @@
+import os
+import logging
+from typing import Any, Dict, Mapping, Optional
+from sqlalchemy import event
+from sqlalchemy.pool import NullPool
+
+# Disconnect handling: 'pessimistic' pings on every checkout (pool_pre_ping);
+# 'optimistic' skips the round trip and relies on pool_recycle plus SQLAlchemy
+# invalidating the whole pool when a query hits a dropped connection
+DISCONNECT_MODES = ('pessimistic', 'optimistic')
+
+# 'pgbouncer' means an external pooler in transaction mode sits in front of Postgres
+POOLERS = ('none', 'pgbouncer')
+
+DEFAULT_MAX_CONNECTIONS = 100  # Postgres' default max_connections
+DEFAULT_POOL_TIMEOUT = 10  # seconds to wait for a pooled connection before erroring
+DEFAULT_POOL_RECYCLE = 300
+DEFAULT_STATEMENT_TIMEOUT_MS = 30000
+DEFAULT_CONNECT_TIMEOUT = 10
+
+def _int(env: Mapping[str, str], name: str, default: Optional[int] = None) -> Optional[int]:
+    value = env.get(name)
+    return int(value) if value not in (None, '') else default
+
+def _choice(env: Mapping[str, str], name: str, choices, default: str) -> str:
+    value = env.get(name, default).lower()
+    if value not in choices:
+        raise ValueError(f"{name} must be one of {', '.join(choices)}, got {value!r}")
+    return value
+
+def worker_concurrency(env: Mapping[str, str] = os.environ) -> Optional[tuple]:
+    """(workers, threads) this deployment runs, or None outside gunicorn (dev server, CLI)"""
+    workers = _int(env, 'GUNICORN_WORKERS') or _int(env, 'WEB_CONCURRENCY')
+    if not workers:
+        return None
+    # gunicorn.conf.py exports both from each worker's final config
+    return workers, _int(env, 'GUNICORN_THREADS') or 1
+
+def pool_sizing(workers: int, threads: int, max_connections: int) -> tuple:
+    """Per-process (pool_size, max_overflow) that keeps all workers within max_connections.
+
+    Each gunicorn worker has its own pool and a thread holds at most one
+    connection, so a pool of `threads` never makes a request wait; overflow
+    absorbs CLI commands and streamed responses that outlive their thread's
+    next request, but only up to this worker's share of the server limit.
+    """
+    per_worker = max(1, max_connections // max(workers, 1))
+    pool_size = min(threads, per_worker)
+    max_overflow = max(0, min(threads, per_worker - pool_size))
+    if pool_size < threads:
+        logging.warning(f"DB pool of {pool_size} is smaller than {threads} threads per worker; "
+                        f"requests will queue for connections (raise DB_MAX_CONNECTIONS or use a pooler)")
+    return pool_size, max_overflow
+
+def build_engine_options(database_url: Optional[str], env: Mapping[str, str] = os.environ) -> Dict[str, Any]:
+    """SQLALCHEMY_ENGINE_OPTIONS for this deployment, driven by DB_* environment variables"""
+    disconnect_mode = _choice(env, 'DB_DISCONNECT_MODE', DISCONNECT_MODES, 'pessimistic')
+    pooler = _choice(env, 'DB_POOLER', POOLERS, 'none')
+
+    options: Dict[str, Any] = {
+        "pool_recycle": _int(env, 'DB_POOL_RECYCLE', DEFAULT_POOL_RECYCLE),
+        "pool_pre_ping": disconnect_mode == 'pessimistic',
+    }
+    if not database_url or not database_url.startswith('postgresql'):
+        # SQLite (tests, load tests) keeps SQLAlchemy's own pool choice
+        return options
+
+    connect_args: Dict[str, Any] = {
+        'connect_timeout': _int(env, 'DB_CONNECT_TIMEOUT', DEFAULT_CONNECT_TIMEOUT),
+        'application_name': env.get('DB_APPLICATION_NAME', 'thrshld'),
+    }
+    statement_timeout = _int(env, 'DB_STATEMENT_TIMEOUT_MS', DEFAULT_STATEMENT_TIMEOUT_MS)
+
+    if pooler == 'pgbouncer':
+        # The pooler owns pooling, and server connections change between
+        # transactions, so hold nothing open and set no session state
+        options.update(poolclass=NullPool, pool_pre_ping=False)
+        options.pop('pool_recycle')
+    else:
+        concurrency = worker_concurrency(env)
+        if concurrency:
+            pool_size, max_overflow = pool_sizing(*concurrency, _int(env, 'DB_MAX_CONNECTIONS', DEFAULT_MAX_CONNECTIONS))
+            options.update(pool_size=pool_size, max_overflow=max_overflow)
+        # Explicit sizes win over the computed ones (and over SQLAlchemy's 5 + 10 outside gunicorn)
+        for option, name in (('pool_size', 'DB_POOL_SIZE'), ('max_overflow', 'DB_MAX_OVERFLOW')):
+            if _int(env, name) is not None:
+                options[option] = _int(env, name)
+        options.update(
+            pool_timeout=_int(env, 'DB_POOL_TIMEOUT', DEFAULT_POOL_TIMEOUT),
+            # Reuse the most recent connection so idle extras age out server-side
+            pool_use_lifo=True,
+        )
+        if statement_timeout:
+            connect_args['options'] = f"-c statement_timeout={statement_timeout}"
+
+    options['connect_args'] = connect_args
+    return options
+
+def _set_local_statement_timeout(timeout_ms: int):
+    def on_begin(conn):
+        # SET LOCAL lasts for this transaction only, so it is safe under transaction pooling
+        conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+    return on_begin
+
+def init_db_config(app, db, env: Mapping[str, str] = os.environ) -> None:
+    """Attach per-transaction settings that can't be expressed as engine options"""
+    with app.app_context():
+        engine = db.engine
+        statement_timeout = _int(env, 'DB_STATEMENT_TIMEOUT_MS', DEFAULT_STATEMENT_TIMEOUT_MS)
+        # PgBouncer rejects the startup 'options' parameter, so the timeout is set per transaction instead
+        if engine.dialect.name == 'postgresql' and _choice(env, 'DB_POOLER', POOLERS, 'none') == 'pgbouncer' and statement_timeout:
+            event.listen(engine, 'begin', _set_local_statement_timeout(statement_timeout))
+
+        logging.info(f"DB engine: {engine.dialect.name}, {type(engine.pool).__name__} ({engine.pool.status()})")
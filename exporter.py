@@ -0,0 +1,181 @@
+import csv
+import io
+import os
+import time
+import zlib
+import logging
+from collections import namedtuple
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import select
+from models import db, User, Workout, Exercise, CheckIn, BodyMeasurement, PersonalRecord
+from serializers import (workout_serializer, exercise_serializer, checkin_serializer,
+                         measurement_serializer, personal_record_serializer)
+
+YIELD_PER = 1000  # rows fetched per server-side cursor round trip
+FLUSH_BYTES = 64 * 1024  # buffer size before handing a chunk to the compressor/socket
+
+ExportDataset = namedtuple('ExportDataset', ['serializer', 'id_column', 'user_column', 'date_column', 'join'])
+
+EXPORT_DATASETS = {
+    'workouts': ExportDataset(workout_serializer, Workout.id, Workout.user_id, Workout.date_completed, None),
+    'exercises': ExportDataset(exercise_serializer, Exercise.id, Workout.user_id, Workout.date_completed, Workout),
+    'check_ins': ExportDataset(checkin_serializer, CheckIn.id, CheckIn.user_id, CheckIn.date, None),
+    'measurements': ExportDataset(measurement_serializer, BodyMeasurement.id, BodyMeasurement.user_id, BodyMeasurement.date, None),
+    'personal_records': ExportDataset(personal_record_serializer, PersonalRecord.id, PersonalRecord.user_id, PersonalRecord.date_achieved, None),
+}
+
+class ExportError(ValueError):
+    """Raised when export parameters are invalid"""
+
+def parse_resume_token(token: Optional[str]) -> Optional[Tuple[str, int]]:
+    """Parse a '<dataset>:<last id>' token taken from the last row a client received"""
+    if not token:
+        return None
+    name, _, last_id = token.partition(':')
+    if name not in EXPORT_DATASETS or not last_id.isdigit():
+        raise ExportError("'resume' must look like '<dataset>:<id>'")
+    return name, int(last_id)
+
+def iter_dataset_rows(name: str, user_id: int, date_from: Optional[date] = None, date_to: Optional[date] = None,
+                      after_id: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Stream one dataset for a user through a server-side cursor in id order"""
+    dataset = EXPORT_DATASETS[name]
+    stmt = dataset.serializer.select()
+    if dataset.join is not None:
+        stmt = stmt.join(dataset.join)
+    stmt = stmt.where(dataset.user_column == user_id)
+    if date_from:
+        stmt = stmt.where(dataset.date_column >= date_from)
+    if date_to:
+        stmt = stmt.where(dataset.date_column <= date_to)
+    if after_id:
+        stmt = stmt.where(dataset.id_column > after_id)
+    stmt = stmt.order_by(dataset.id_column).execution_options(yield_per=YIELD_PER)
+
+    to_dict = dataset.serializer.to_dict
+    for row in db.session.execute(stmt):
+        yield to_dict(row)
+
+def iter_export_rows(user_id: int, datasets: List[str], date_from: Optional[date] = None,
+                     date_to: Optional[date] = None, resume: Optional[Tuple[str, int]] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yield (dataset, row) pairs across datasets, skipping everything up to the resume point"""
+    skipping = resume is not None
+    for name in datasets:
+        after_id = None
+        if skipping:
+            if name != resume[0]:
+                continue
+            skipping = False
+            after_id = resume[1]
+        for row in iter_dataset_rows(name, user_id, date_from, date_to, after_id):
+            yield name, row
+
+def ndjson_lines(rows: Iterable[Tuple[str, Dict[str, Any]]]) -> Iterator[str]:
+    dumps = current_app.json.dumps
+    for name, row in rows:
+        yield dumps({'dataset': name, **row}) + "\n"
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ''
+    if isinstance(value, (list, dict)):
+        return current_app.json.dumps(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+def csv_lines(name: str, rows: Iterable[Tuple[str, Dict[str, Any]]], header: bool = True) -> Iterator[str]:
+    """Encode a single dataset as CSV, one line at a time"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_DATASETS[name].serializer.fields)
+    for _, row in rows:
+        writer.writerow([_csv_value(value) for value in row.values()])
+        if buffer.tell() >= FLUSH_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def chunked(lines: Iterable[str]) -> Iterator[bytes]:
+    """Group small lines into larger chunks to keep per-write overhead low"""
+    parts = []
+    size = 0
+    for line in lines:
+        parts.append(line)
+        size += len(line)
+        if size >= FLUSH_BYTES:
+            yield ''.join(parts).encode()
+            parts = []
+            size = 0
+    if parts:
+        yield ''.join(parts).encode()
+
+def compress_stream(chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    """Compress a byte stream incrementally with gzip or brotli"""
+    if encoding == 'br':
+        import brotli
+        compressor = brotli.Compressor(quality=5)
+        for chunk in chunks:
+            output = compressor.process(chunk)
+            if output:
+                yield output
+        yield compressor.finish()
+        return
+
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip container
+    for chunk in chunks:
+        output = compressor.compress(chunk)
+        if output:
+            yield output
+    yield compressor.flush()
+
+def export_user(user_id: int, fmt: str, datasets: List[str], date_from: Optional[date] = None,
+                date_to: Optional[date] = None, resume: Optional[Tuple[str, int]] = None) -> Iterator[bytes]:
+    """Stream a user's history as uncompressed NDJSON or CSV bytes"""
+    if fmt == 'csv':
+        if len(datasets) != 1:
+            raise ExportError("CSV export needs exactly one 'dataset'")
+        rows = iter_export_rows(user_id, datasets, date_from, date_to, resume)
+        return chunked(csv_lines(datasets[0], rows, header=resume is None))
+    if fmt == 'ndjson':
+        return chunked(ndjson_lines(iter_export_rows(user_id, datasets, date_from, date_to, resume)))
+    raise ExportError("'format' must be 'ndjson' or 'csv'")
+
+@click.command('export-all')
+@click.option('--out', 'out_dir', default='exports', help='Directory to write one file per user (and dataset for CSV).')
+@click.option('--format', 'fmt', type=click.Choice(['ndjson', 'csv']), default='ndjson')
+@click.option('--gzip/--no-gzip', 'use_gzip', default=True)
+@with_appcontext
+def export_all_command(out_dir, fmt, use_gzip):
+    """Bulk export every user's training history for offline processing."""
+    os.makedirs(out_dir, exist_ok=True)
+    started = time.time()
+    users = 0
+    total_bytes = 0
+
+    user_ids = db.session.execute(select(User.id).order_by(User.id).execution_options(yield_per=YIELD_PER)).scalars()
+    for user_id in user_ids:
+        jobs = [(list(EXPORT_DATASETS), f"user_{user_id}.ndjson")] if fmt == 'ndjson' else \
+               [([name], f"user_{user_id}_{name}.csv") for name in EXPORT_DATASETS]
+        for datasets, filename in jobs:
+            chunks = export_user(user_id, fmt, datasets)
+            if use_gzip:
+                chunks = compress_stream(chunks, 'gzip')
+                filename += '.gz'
+            with open(os.path.join(out_dir, filename), 'wb') as handle:
+                for chunk in chunks:
+                    handle.write(chunk)
+                    total_bytes += len(chunk)
+        users += 1
+        # Keep the identity map from growing across users
+        db.session.expunge_all()
+
+    elapsed = time.time() - started
+    logging.info(f"Exported {users} users ({total_bytes} bytes) in {elapsed:.1f}s")
+    click.echo(f"Exported {users} users to {out_dir} ({total_bytes} bytes, {elapsed:.1f}s)")
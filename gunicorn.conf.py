@@ -0,0 +1,25 @@
+# Loaded automatically by gunicorn from the working directory
+import os
+import shutil
+import tempfile
+
+# prometheus_client aggregates across workers through files in this directory;
+# it must exist (and start empty) before any worker imports the app
+if not os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = tempfile.mkdtemp(prefix='thrshld-metrics-')
+else:
+    shutil.rmtree(os.environ['PROMETHEUS_MULTIPROC_DIR'], ignore_errors=True)
+    os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+def post_fork(server, worker):
+    """Tell the app how many workers and threads share the database (see db_config.py)"""
+    os.environ['GUNICORN_WORKERS'] = str(server.cfg.workers)
+    os.environ['GUNICORN_THREADS'] = str(server.cfg.threads)
+
+def child_exit(server, worker):
+    """Drop a dead worker's live gauges so they stop counting toward totals"""
+    try:
+        from prometheus_client import multiprocess
+    except ImportError:
+        return
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,231 @@
+import json
+import time
+import itertools
+import hashlib
+import logging
+from collections import namedtuple
+from datetime import date, datetime
+from typing import Optional, Iterator, List, Dict, Any
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import insert, select
+from models import db, User, UserProfile, UserGoals, Workout, CheckIn, LegacyImport
+from utils import validate_profile_data
+
+RECORD_CHUNK = 500  # legacy records per transaction
+INSERT_CHUNK = 1000  # rows per executemany
+# Never matches a password; imported accounts choose one through the reset flow
+UNUSABLE_PASSWORD = '!'
+LEGACY_GOAL = 'general_fitness'  # the old app only had a free-text goal, kept in specific_targets
+
+LegacyRecord = namedtuple('LegacyRecord', 'source position email data')
+
+class ImportRejected(ValueError):
+    pass
+
+def row_key(email: str, kind: str, day: Optional[date], content: str) -> str:
+    """Identity of one imported check-in or workout, so editing a document only loads its new entries"""
+    # The legacy date, not the --date fallback, so re-running on another day doesn't duplicate undated entries
+    return hashlib.sha256(f"{email}\n{kind}\n{day or ''}\n{content}".encode()).hexdigest()
+
+def _json_lines(f, path: str) -> Iterator[Dict[str, Any]]:
+    for number, line in enumerate(f, start=1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                logging.warning(f"Skipping {path} line {number}: {e}")
+
+def read_records(path: str, source: str, default_email: Optional[str]) -> Iterator[LegacyRecord]:
+    """Records from a .jsonl file, streamed a line at a time, or from one JSON document or array"""
+    with open(path, encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            items = _json_lines(f, path)
+        else:
+            document = json.load(f)
+            items = document if isinstance(document, list) else [document]
+        for position, data in enumerate(items, start=1):
+            email = (data.get('email') or default_email or '').strip()
+            yield LegacyRecord(source, position, email, data)
+
+def parse_legacy_date(value) -> Optional[date]:
+    # The old app wrote the string 'null' for check-ins it never dated
+    if not value or value == 'null':
+        return None
+    return datetime.fromisoformat(str(value)).date()
+
+def workout_title(response: str) -> str:
+    for line in response.splitlines():
+        title = line.strip().strip('*#').strip()
+        if title:
+            return title.removeprefix('Workout Plan:').strip()[:100] or "Imported Workout"
+    return "Imported Workout"
+
+def profile_row(user_id: int, profile: Dict[str, Any]) -> Dict[str, Any]:
+    """A user_profiles row from the legacy profile, which used the same keys as the profile form"""
+    def number(key, kind=float):
+        return kind(profile[key]) if profile.get(key) else None
+
+    return dict(user_id=user_id, name=profile['name'].strip(), age=number('age', int), gender=profile.get('gender') or None,
+                height_cm=number('height'), weight_kg=number('weight'),
+                date_of_birth=parse_legacy_date(profile.get('date_of_birth')),
+                experience_level=profile.get('experience') or None, primary_activity=profile.get('primary_activity') or None,
+                training_location=profile.get('training_location') or None,
+                training_days_per_week=number('training_days', int), squat_1rm=number('squat_1rm'),
+                bench_1rm=number('bench_1rm'), deadlift_1rm=number('deadlift_1rm'),
+                overhead_press_1rm=number('overhead_press_1rm'), max_pull_ups=number('max_pull_ups', int))
+
+def checkin_row(email: str, notes: str, day: Optional[date], default_date: date) -> Dict[str, Any]:
+    return dict(user_id=email, date=day or default_date, notes=notes, planned_workout=True,
+                source_key=row_key(email, 'check_in', day, notes))
+
+def user_data_rows(record: LegacyRecord, user_id, default_date: date, rows: Dict[str, List[Dict[str, Any]]],
+                   has_profile: set, has_goals: set):
+    """Profile, goals, check-ins and workouts from one pre-database user_data.json document; existing profiles and goals win"""
+    data = record.data
+    profile = data.get('profile') or {}
+    valid, error = validate_profile_data(profile)
+    if not valid:
+        raise ImportRejected(error)
+    if user_id not in has_profile:
+        rows['profiles'].append(profile_row(user_id, profile))
+        has_profile.add(user_id)
+    if data.get('goal') and user_id not in has_goals:
+        rows['goals'].append(dict(user_id=user_id, workout_goal=LEGACY_GOAL, specific_targets=[data['goal']]))
+        has_goals.add(user_id)
+    for entry in data.get('check_ins') or []:
+        if entry.get('status'):
+            rows['check_ins'].append(checkin_row(user_id, entry['status'], parse_legacy_date(entry.get('date')), default_date))
+    for entry in data.get('history') or []:
+        if entry.get('response'):
+            day = parse_legacy_date(entry.get('date'))
+            rows['workouts'].append(dict(user_id=user_id, workout_name=workout_title(entry['response']),
+                                         workout_type='generated', notes=entry['response'], date_completed=day or default_date,
+                                         source_key=row_key(user_id, 'workout', day, entry['response'])))
+
+def request_rows(record: LegacyRecord, user_id, default_date: date, rows: Dict[str, List[Dict[str, Any]]]):
+    """A check-in from one requests.jsonl programme request"""
+    data = record.data
+    text = "\n\n".join(part.strip() for part in (data.get('title'), data.get('body') or data.get('status')) if part)
+    if not text:
+        raise ImportRejected("Request has no title or body")
+    rows['check_ins'].append(checkin_row(user_id, text, parse_legacy_date(data.get('date')), default_date))
+
+def insert_rows(model, rows: List[Dict[str, Any]]) -> int:
+    # A Core executemany compiles once and is batched into multi-row VALUES by the driver layer;
+    # insert().values([...]) compiles a fresh statement per chunk, which dominated import time
+    for start in range(0, len(rows), INSERT_CHUNK):
+        db.session.execute(insert(model.__table__), rows[start:start + INSERT_CHUNK])
+    return len(rows)
+
+def already_imported(source: str, keys: List[str]) -> set:
+    done = set()
+    for start in range(0, len(keys), INSERT_CHUNK):
+        done.update(db.session.scalars(select(LegacyImport.source_key).where(
+            LegacyImport.source == source, LegacyImport.source_key.in_(keys[start:start + INSERT_CHUNK]))))
+    return done
+
+def import_chunk(records: List[LegacyRecord], default_date: date) -> Dict[str, int]:
+    """Load one chunk of records in a single transaction; check-ins and workouts already imported are skipped"""
+    counts = {'records': 0, 'skipped': 0, 'rejected': 0, 'rows': 0}
+    source = records[0].source
+    fresh = []
+    for record in records:
+        if record.email:
+            fresh.append(record)
+        else:
+            counts['rejected'] += 1
+            logging.warning(f"Skipping {source} record {record.position}: no email (pass --email)")
+    if not fresh:
+        return counts
+
+    # Rows are staged with the email in user_id; accounts are created only for records that pass validation
+    emails = {r.email for r in fresh}
+    users = dict(db.session.execute(select(User.email, User.id).where(User.email.in_(emails))).all())
+    has_profile = set(db.session.scalars(select(User.email).join(UserProfile).where(User.email.in_(emails))))
+    has_goals = set(db.session.scalars(select(User.email).join(UserGoals).where(User.email.in_(emails))))
+
+    rows = {'profiles': [], 'goals': [], 'check_ins': [], 'workouts': []}
+    for record in fresh:
+        # Staged per record, so a record rejected halfway leaves nothing behind
+        staged = {name: [] for name in rows}
+        try:
+            if source == 'user_data':
+                user_data_rows(record, record.email, default_date, staged, has_profile.copy(), has_goals.copy())
+            else:
+                request_rows(record, record.email, default_date, staged)
+        except (ImportRejected, ValueError, TypeError) as e:
+            counts['rejected'] += 1
+            logging.warning(f"Skipping {source} record {record.position} for {record.email}: {e}")
+            continue
+        for name, staged_rows in staged.items():
+            rows[name] += staged_rows
+        has_profile.update(row['user_id'] for row in staged['profiles'])
+        has_goals.update(row['user_id'] for row in staged['goals'])
+        counts['records'] += 1
+
+    # Check-ins and workouts are keyed one by one, so an edited document only adds its new entries
+    done = already_imported(source, [row['source_key'] for name in ('check_ins', 'workouts') for row in rows[name]])
+    imported = []
+    for name in ('check_ins', 'workouts'):
+        new = []
+        for row in rows[name]:
+            key = row.pop('source_key')
+            if key in done:
+                counts['skipped'] += 1
+            else:
+                done.add(key)
+                new.append(row)
+                imported.append(dict(source=source, source_key=key, user_id=row['user_id']))
+        rows[name] = new
+
+    created = sorted({row['user_id'] for row in itertools.chain(*rows.values())} - users.keys())
+    if created:
+        counts['rows'] += insert_rows(User, [dict(email=email, password_hash=UNUSABLE_PASSWORD) for email in created])
+        users.update(db.session.execute(select(User.email, User.id).where(User.email.in_(created))).all())
+    for row in itertools.chain(imported, *rows.values()):
+        row['user_id'] = users[row['user_id']]
+
+    for model, name in ((UserProfile, 'profiles'), (UserGoals, 'goals'), (CheckIn, 'check_ins'), (Workout, 'workouts')):
+        counts['rows'] += insert_rows(model, rows[name])
+    counts['rows'] += insert_rows(LegacyImport, imported)
+    db.session.commit()
+    return counts
+
+def import_file(path: str, source: str, default_email: Optional[str], default_date: date) -> Dict[str, int]:
+    totals = {'records': 0, 'skipped': 0, 'rejected': 0, 'rows': 0}
+    chunk = []
+    for record in read_records(path, source, default_email):
+        chunk.append(record)
+        if len(chunk) >= RECORD_CHUNK:
+            for key, value in import_chunk(chunk, default_date).items():
+                totals[key] += value
+            chunk = []
+    if chunk:
+        for key, value in import_chunk(chunk, default_date).items():
+            totals[key] += value
+    return totals
+
+@click.command('import-legacy')
+@click.option('--user-data', 'user_data_paths', multiple=True, type=click.Path(exists=True, dir_okay=False),
+              help='Pre-database user_data.json document, or a .jsonl archive of them. Repeatable.')
+@click.option('--requests', 'request_paths', multiple=True, type=click.Path(exists=True, dir_okay=False),
+              help='JSONL log of programme requests, imported as check-ins. Repeatable.')
+@click.option('--email', default=None, help='Account for records that carry no email of their own.')
+@click.option('--date', 'default_date', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Date for undated legacy entries (default: today).')
+@with_appcontext
+def import_legacy_command(user_data_paths, request_paths, email, default_date):
+    """Bulk-load legacy user_data.json and requests.jsonl files. Safe to re-run: imported entries are skipped."""
+    if not user_data_paths and not request_paths:
+        raise click.UsageError("Pass at least one --user-data or --requests file.")
+    default_date = default_date.date() if default_date else date.today()
+
+    for source, paths in (('user_data', user_data_paths), ('requests', request_paths)):
+        for path in paths:
+            started = time.time()
+            totals = import_file(path, source, email, default_date)
+            elapsed = time.time() - started
+            click.echo(f"{path}: read {totals['records']} records ({totals['rejected']} rejected, "
+                       f"{totals['skipped']} entries already imported), {totals['rows']} rows in {elapsed:.2f}s, "
+                       f"{totals['rows'] / max(elapsed, 1e-9):.0f} rows/s")
@@ -0,0 +1,203 @@
+"""Scripted load test reporting p50/p95/p99 latency and RPS per endpoint.
+
+Against a running server:
+    python loadtest/run.py --base-url http://127.0.0.1:5000 --duration 60 --concurrency 20
+
+Self-contained (seeds SQLite, starts the OpenAI/Strava stubs and gunicorn):
+    python loadtest/run.py --spawn --seed-users 50 --workers 2 --threads 4
+
+Results are written to loadtest/results/<git sha>.json; pass --compare <file>
+to print the change against an earlier run.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+
+from seed import PASSWORD, user_email
+from stubs import start_stub_server
+
+# (scenario, weight) - how often each virtual user picks a scenario
+SCENARIO_WEIGHTS = [('index', 20), ('dashboard', 30), ('progress', 30), ('recovery', 15), ('check_in', 5)]
+PROGRESS_PATHS = ['/api/progress/overview', '/api/progress/strength', '/api/progress/body-metrics', '/api/progress/wellness']
+
+class Recorder:
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def record(self, name, elapsed, ok):
+        with self.lock:
+            self.samples[name].append(elapsed)
+            if not ok:
+                self.errors[name] += 1
+
+def timed(session, recorder, name, method, url, **kwargs):
+    start = time.perf_counter()
+    try:
+        response = session.request(method, url, timeout=60, **kwargs)
+        ok = response.status_code < 400
+    except requests.RequestException:
+        ok = False
+    recorder.record(name, time.perf_counter() - start, ok)
+
+def virtual_user(base_url, user_index, recorder, deadline, rng):
+    session = requests.Session()
+    timed(session, recorder, 'POST /login', 'POST', f"{base_url}/login",
+          data={'email': user_email(user_index), 'password': PASSWORD})
+    # Connect Strava through the stubbed OAuth exchange so recovery calls do real work
+    timed(session, recorder, 'GET /strava/callback', 'GET', f"{base_url}/strava/callback", params={'code': 'stub'})
+
+    scenarios = [name for name, _ in SCENARIO_WEIGHTS]
+    weights = [weight for _, weight in SCENARIO_WEIGHTS]
+    while time.time() < deadline:
+        scenario = rng.choices(scenarios, weights)[0]
+        if scenario == 'index':
+            timed(session, recorder, 'GET /', 'GET', f"{base_url}/")
+        elif scenario == 'dashboard':
+            timed(session, recorder, 'GET /api/dashboard', 'GET', f"{base_url}/api/dashboard")
+        elif scenario == 'progress':
+            for path in PROGRESS_PATHS:
+                timed(session, recorder, f"GET {path}", 'GET', f"{base_url}{path}")
+        elif scenario == 'recovery':
+            timed(session, recorder, 'GET /api/strava/recovery-metrics', 'GET', f"{base_url}/api/strava/recovery-metrics")
+        elif scenario == 'check_in':
+            timed(session, recorder, 'POST /api/check-in', 'POST', f"{base_url}/api/check-in",
+                  json={'status': rng.choice(['Feeling strong', 'Bit tired, slept badly', 'Sore legs from yesterday'])})
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+def summarize(recorder, elapsed):
+    report = {}
+    for name, samples in sorted(recorder.samples.items()):
+        ordered = sorted(samples)
+        report[name] = {
+            'count': len(ordered),
+            'errors': recorder.errors[name],
+            'rps': round(len(ordered) / elapsed, 2),
+            'p50_ms': round(percentile(ordered, 0.50) * 1000, 1),
+            'p95_ms': round(percentile(ordered, 0.95) * 1000, 1),
+            'p99_ms': round(percentile(ordered, 0.99) * 1000, 1),
+        }
+    return report
+
+def print_report(report, previous=None):
+    print(f"{'endpoint':<38} {'count':>7} {'err':>5} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, row in report.items():
+        line = (f"{name:<38} {row['count']:>7} {row['errors']:>5} {row['rps']:>8.1f} "
+                f"{row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f}")
+        before = (previous or {}).get(name)
+        if before and before['p95_ms']:
+            change = (row['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100
+            line += f"  p95 {change:+.0f}%"
+        print(line)
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def wait_for(url, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            requests.get(url, timeout=2)
+            return
+        except requests.RequestException:
+            time.sleep(0.25)
+    sys.exit(f"Server at {url} did not come up within {timeout}s")
+
+def spawn(args):
+    """Start the stubs, seed a database and launch gunicorn; returns the process"""
+    start_stub_server(port=args.stub_port, openai_latency=args.openai_latency,
+                      strava_latency=args.strava_latency, error_rate=args.error_rate)
+    stub_url = f"http://127.0.0.1:{args.stub_port}"
+    env = dict(os.environ,
+               DATABASE_URL=os.environ.get('DATABASE_URL') or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'loadtest.db')}",
+               SESSION_SECRET=os.environ.get('SESSION_SECRET', 'loadtest'),
+               OPENAI_API_BASE=f"{stub_url}/v1", OPENAI_API_KEY='stub',
+               STRAVA_BASE_URL=stub_url, STRAVA_CLIENT_ID='stub', STRAVA_CLIENT_SECRET='stub')
+
+    subprocess.run([sys.executable, os.path.join(HERE, 'seed.py'), '--users', str(args.seed_users),
+                    '--days', str(args.seed_days)], cwd=ROOT, env=env, check=True)
+    port = args.base_url.rsplit(':', 1)[-1].strip('/')
+    process = subprocess.Popen(['gunicorn', '--bind', f'127.0.0.1:{port}', '--workers', str(args.workers),
+                                '--threads', str(args.threads), '--log-level', 'warning', 'main:app'],
+                               cwd=ROOT, env=env)
+    wait_for(f"{args.base_url}/login")
+    return process
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://127.0.0.1:5000')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to run')
+    parser.add_argument('--concurrency', type=int, default=10, help='Virtual users')
+    parser.add_argument('--users', type=int, default=None, help='Seeded users to log in as (default: --seed-users)')
+    parser.add_argument('--spawn', action='store_true', help='Seed SQLite and start stubs + gunicorn locally')
+    parser.add_argument('--seed-users', type=int, default=50)
+    parser.add_argument('--seed-days', type=int, default=365)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--stub-port', type=int, default=8900)
+    parser.add_argument('--openai-latency', type=float, default=1.0)
+    parser.add_argument('--strava-latency', type=float, default=0.15)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--out', default=os.path.join(HERE, 'results'))
+    parser.add_argument('--compare', help='Earlier results file to diff against')
+    args = parser.parse_args()
+
+    process = spawn(args) if args.spawn else None
+    try:
+        recorder = Recorder()
+        user_pool = args.users or args.seed_users
+        deadline = time.time() + args.duration
+        started = time.time()
+        threads = [threading.Thread(target=virtual_user,
+                                    args=(args.base_url.rstrip('/'), i % user_pool, recorder, deadline, random.Random(i)))
+                   for i in range(args.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.time() - started
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+    report = summarize(recorder, elapsed)
+    previous = None
+    if args.compare:
+        with open(args.compare) as handle:
+            previous = json.load(handle)['endpoints']
+    print_report(report, previous)
+
+    revision = git_revision()
+    os.makedirs(args.out, exist_ok=True)
+    path = os.path.join(args.out, f"{revision}.json")
+    with open(path, 'w') as handle:
+        json.dump({'revision': revision, 'timestamp': int(time.time()), 'duration': round(elapsed, 1),
+                   'concurrency': args.concurrency, 'endpoints': report}, handle, indent=2)
+    print(f"Saved results to {path}")
+
+if __name__ == '__main__':
+    main()
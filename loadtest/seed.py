@@ -0,0 +1,126 @@
+"""Seed synthetic users with realistic training histories for load tests.
+
+Every user gets the same password (see PASSWORD) and the email
+loadtest+<n>@thrshld.app, so scenarios can log in as any of them.
+
+Run with: python loadtest/seed.py --users 200 --days 365
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.security import generate_password_hash
+
+PASSWORD = 'loadtest-password'
+EMAIL_TEMPLATE = 'loadtest+{}@thrshld.app'
+
+LIFTS = [('Back Squat', 'squat_1rm'), ('Bench Press', 'bench_1rm'),
+         ('Deadlift', 'deadlift_1rm'), ('Overhead Press', 'overhead_press_1rm')]
+MOODS = ['great', 'good', 'okay', 'tired', 'stressed']
+GOALS = ['build-muscle', 'lose-weight', 'strength', 'endurance']
+
+def user_email(n):
+    return EMAIL_TEMPLATE.format(n)
+
+def seed(users, days, seed_value=42):
+    from app import app
+    from models import db, User, UserProfile, UserGoals, Workout, Exercise, CheckIn, BodyMeasurement, PersonalRecord
+
+    rng = random.Random(seed_value)
+    # Hashing is deliberately slow, so every synthetic user shares one hash
+    password_hash = generate_password_hash(PASSWORD)
+    today = date.today()
+    started = time.time()
+    rows = 0
+
+    with app.app_context():
+        db.create_all()
+        existing = {email for (email,) in db.session.query(User.email).filter(User.email.like('loadtest+%'))}
+
+        for n in range(users):
+            email = user_email(n)
+            if email in existing:
+                continue
+
+            user = User(email=email, password_hash=password_hash)
+            db.session.add(user)
+            db.session.flush()
+
+            maxes = {field: rng.randint(60, 220) for _, field in LIFTS}
+            db.session.add(UserProfile(
+                user_id=user.id, name=f"Load Test {n}", age=rng.randint(18, 60), gender=rng.choice(['male', 'female']),
+                weight_kg=rng.uniform(55, 110), height_cm=rng.uniform(155, 200),
+                experience_level=rng.choice(['beginner', 'intermediate', 'advanced']),
+                training_days_per_week=rng.randint(2, 6), preferred_intensity=rng.choice(['low', 'moderate', 'high']),
+                **maxes
+            ))
+            db.session.add(UserGoals(
+                user_id=user.id, workout_goal=rng.choice(GOALS),
+                compound_lifts=[lift for lift, _ in rng.sample(LIFTS, 2)]
+            ))
+
+            workouts = []
+            checkins = []
+            measurements = []
+            weight = rng.uniform(60, 100)
+            for offset in range(days, 0, -1):
+                day = today - timedelta(days=offset)
+                checkins.append(dict(
+                    user_id=user.id, date=day, energy_level=rng.randint(1, 10), motivation_level=rng.randint(1, 10),
+                    sleep_quality=rng.randint(1, 10), stress_level=rng.randint(1, 10),
+                    muscle_soreness=rng.randint(1, 10), mood=rng.choice(MOODS), notes="Feeling ready to train"
+                ))
+                if rng.random() < 0.6:
+                    workouts.append(dict(
+                        user_id=user.id, workout_name="Daily Workout", workout_type="generated", date_completed=day,
+                        duration_minutes=rng.randint(30, 90), notes="Warm-up, main lifts, cool-down"
+                    ))
+                if offset % 7 == 0:
+                    weight += rng.uniform(-0.5, 0.5)
+                    measurements.append(dict(
+                        user_id=user.id, date=day, weight_kg=round(weight, 1),
+                        body_fat_percentage=round(rng.uniform(10, 25), 1), measurements={'waist': rng.randint(70, 100)}
+                    ))
+
+            db.session.bulk_insert_mappings(Workout, workouts)
+            db.session.bulk_insert_mappings(CheckIn, checkins)
+            db.session.bulk_insert_mappings(BodyMeasurement, measurements)
+            db.session.flush()
+
+            workout_rows = db.session.query(Workout.id, Workout.date_completed).filter_by(user_id=user.id).all()
+            exercises = []
+            records = []
+            for workout_id, day in workout_rows:
+                lift, field = rng.choice(LIFTS)
+                top = maxes[field] * rng.uniform(0.6, 0.9)
+                exercises.append(dict(
+                    workout_id=workout_id, exercise_name=lift, exercise_type='compound', sets_completed=5,
+                    reps_per_set=[5] * 5, weight_per_set=[round(top, 1)] * 5, rest_between_sets=120,
+                    performed=True
+                ))
+                if rng.random() < 0.05:
+                    records.append(dict(
+                        user_id=user.id, exercise_name=lift, record_type='max_weight', value=round(top, 1),
+                        unit='kg', date_achieved=day, workout_id=workout_id
+                    ))
+            db.session.bulk_insert_mappings(Exercise, exercises)
+            db.session.bulk_insert_mappings(PersonalRecord, records)
+            db.session.commit()
+
+            rows += 3 + len(workouts) + len(checkins) + len(measurements) + len(exercises) + len(records)
+
+    elapsed = time.time() - started
+    print(f"Seeded {users} users, {rows} rows in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):.0f} rows/s)")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--days', type=int, default=365, help='Days of history per user')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    seed(args.users, args.days, args.seed)
@@ -0,0 +1,187 @@
+"""Local stand-ins for the OpenAI chat completions/Batch and Strava v3 APIs.
+
+Point the app at them with:
+    OPENAI_API_BASE=http://127.0.0.1:8900/v1 STRAVA_BASE_URL=http://127.0.0.1:8900
+
+Run with: python loadtest/stubs.py --port 8900 --openai-latency 1.5 --error-rate 0.01
+"""
+import argparse
+import itertools
+import json
+import logging
+import random
+import threading
+import time
+from flask import Flask, Response, jsonify, request
+from werkzeug.serving import make_server
+
+STUB_WORKOUT = """1. Warm-up (8 minutes)
+- 5 minutes easy row
+- Dynamic hip and shoulder mobility
+
+2. Main exercises
+- Back Squat: 4 sets of 5 reps at 80% of 140kg = 112kg
+- Romanian Deadlift: 3 sets of 8 reps at 60kg
+- Walking Lunges: 3 sets of 12 reps
+
+3. Cool-down
+- 5 minutes easy bike
+- Hamstring and quad stretches"""
+
+# Reply to requests that ask for the structured workout schema
+STUB_WORKOUT_JSON = json.dumps({
+    'focus': 'Lower Body Strength',
+    'warm_up': '5 minutes easy row, dynamic hip and shoulder mobility',
+    'exercises': [
+        {'name': 'Back Squat', 'lift': 'squat', 'sets': 4, 'reps': 5, 'percent_1rm': 80, 'load_kg': 112,
+         'rest_seconds': 180, 'notes': None},
+        {'name': 'Romanian Deadlift', 'lift': None, 'sets': 3, 'reps': 8, 'percent_1rm': None, 'load_kg': 60,
+         'rest_seconds': 120, 'notes': None},
+        {'name': 'Walking Lunges', 'lift': None, 'sets': 3, 'reps': 12, 'percent_1rm': None, 'load_kg': None,
+         'rest_seconds': 60, 'notes': 'Bodyweight'},
+    ],
+    'cool_down': '5 minutes easy bike, hamstring and quad stretches',
+    'notes': None,
+})
+
+def create_stub_app(openai_latency=1.0, strava_latency=0.15, error_rate=0.0, seed=None):
+    app = Flask(__name__)
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    def maybe_fail(latency):
+        # Jitter the delay so percentiles look like a real dependency
+        time.sleep(max(0.0, rng.gauss(latency, latency * 0.2)))
+        with lock:
+            failed = rng.random() < error_rate
+        if failed:
+            return jsonify({'error': {'message': 'stub failure', 'type': 'server_error'}}), 503
+        return None
+
+    @app.post('/v1/chat/completions')
+    def chat_completions():
+        failure = maybe_fail(openai_latency)
+        if failure:
+            return failure
+        return jsonify(completion(request.get_json(silent=True) or {}))
+
+    def completion(body):
+        prompt = ''.join(m.get('content', '') for m in body.get('messages', []))
+        prompt_tokens = max(1, len(prompt) // 4)
+        content = STUB_WORKOUT_JSON if body.get('response_format') else STUB_WORKOUT
+        completion_tokens = len(content) // 4
+        return {
+            'id': 'chatcmpl-stub',
+            'object': 'chat.completion',
+            'model': body.get('model', 'gpt-4o'),
+            'choices': [{'index': 0, 'finish_reason': 'stop',
+                         'message': {'role': 'assistant', 'content': content}}],
+            'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                      'total_tokens': prompt_tokens + completion_tokens}
+        }
+
+    # Batch API: files are kept in memory and a batch completes as soon as it is created
+    files = {}
+    batches = {}
+    ids = itertools.count(1)
+
+    @app.post('/v1/files')
+    def upload_file():
+        file_id = f"file-{next(ids)}"
+        files[file_id] = request.files['file'].read().decode()
+        return jsonify({'id': file_id, 'object': 'file', 'purpose': request.form.get('purpose')})
+
+    @app.get('/v1/files/<file_id>/content')
+    def file_content(file_id):
+        return Response(files[file_id], mimetype='application/jsonl')
+
+    @app.post('/v1/batches')
+    def create_batch():
+        body = request.get_json()
+        output = []
+        for line in files[body['input_file_id']].splitlines():
+            item = json.loads(line)
+            with lock:
+                failed = rng.random() < error_rate
+            if failed:
+                output.append({'custom_id': item['custom_id'], 'response': {'status_code': 503, 'body': {}}})
+            else:
+                output.append({'custom_id': item['custom_id'],
+                               'response': {'status_code': 200, 'body': completion(item['body'])}})
+        output_id = f"file-{next(ids)}"
+        files[output_id] = '\n'.join(json.dumps(row) for row in output)
+        batch_id = f"batch-{next(ids)}"
+        batches[batch_id] = {'id': batch_id, 'object': 'batch', 'status': 'completed', 'output_file_id': output_id,
+                             'request_counts': {'total': len(output)}}
+        return jsonify(batches[batch_id])
+
+    @app.get('/v1/batches/<batch_id>')
+    def get_batch(batch_id):
+        return jsonify(batches[batch_id])
+
+    @app.post('/oauth/token')
+    def oauth_token():
+        failure = maybe_fail(strava_latency)
+        if failure:
+            return failure
+        return jsonify({
+            'access_token': 'stub-access-token',
+            'refresh_token': 'stub-refresh-token',
+            'expires_at': int(time.time()) + 6 * 3600,
+            'athlete': {'id': 12345}
+        })
+
+    @app.get('/api/v3/athlete/activities')
+    def activities():
+        failure = maybe_fail(strava_latency)
+        if failure:
+            return failure
+        per_page = int(request.args.get('per_page', 10))
+        now = int(time.time())
+        response = jsonify([{
+            'id': 1000 + i,
+            'name': 'Morning Run',
+            'type': 'Run',
+            'distance': rng.uniform(3000, 15000),
+            'moving_time': rng.randint(900, 5400),
+            'suffer_score': rng.randint(20, 200),
+            'start_date': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(now - i * 86400))
+        } for i in range(per_page)])
+        _rate_limit_headers(response)
+        return response
+
+    @app.get('/api/v3/athletes/<int:athlete_id>/stats')
+    def athlete_stats(athlete_id):
+        failure = maybe_fail(strava_latency)
+        if failure:
+            return failure
+        response = jsonify({'recent_run_totals': {'count': 5, 'distance': 42000.0, 'moving_time': 14400}})
+        _rate_limit_headers(response)
+        return response
+
+    def _rate_limit_headers(response):
+        # Strava reports 15-minute and daily limits/usage as "short,long"
+        response.headers['X-RateLimit-Limit'] = '200,2000'
+        response.headers['X-RateLimit-Usage'] = f"{rng.randint(0, 150)},{rng.randint(0, 1500)}"
+
+    return app
+
+def start_stub_server(host='127.0.0.1', port=8900, **options):
+    """Start the stubs on a background thread and return the server"""
+    # Per-request access logs would drown out the load test report
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server(host, port, create_stub_app(**options), threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--openai-latency', type=float, default=1.0, help='Mean seconds per chat completion')
+    parser.add_argument('--strava-latency', type=float, default=0.15, help='Mean seconds per Strava call')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of calls answered with 503')
+    args = parser.parse_args()
+    app = create_stub_app(args.openai_latency, args.strava_latency, args.error_rate)
+    make_server(args.host, args.port, app, threaded=True).serve_forever()
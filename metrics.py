@@ -0,0 +1,215 @@
+import os
+import re
+import time
+import hmac
+import logging
+from typing import Optional, Dict, Any
+from flask import Response, g, jsonify, request
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+
+try:
+    from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram,
+                                   generate_latest, multiprocess)
+except ImportError:  # metrics become no-ops and /metrics reports itself unavailable
+    CONTENT_TYPE_LATEST = REGISTRY = CollectorRegistry = Counter = Gauge = Histogram = None
+    generate_latest = multiprocess = None
+
+# Set by gunicorn.conf.py; each worker then writes its samples to mmap'd files there
+MULTIPROC_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+
+# Bearer token for /metrics and the other ops endpoints, which refuse every request until it is set
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+OPENAI_BUCKETS = (0.5, 1, 2, 4, 8, 12, 16, 20, 30)
+
+class _NoopMetric:
+    """Stands in for every metric when prometheus_client is not installed"""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, value):
+        pass
+
+    def inc(self, amount=1):
+        pass
+
+    def dec(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+def _metric(factory, *args, **kwargs):
+    if factory is None:
+        return _NoopMetric()
+    return factory(*args, **kwargs)
+
+def _gauge(*args, multiprocess_mode='livesum', **kwargs):
+    if Gauge is None:
+        return _NoopMetric()
+    return Gauge(*args, multiprocess_mode=multiprocess_mode, **kwargs)
+
+REQUEST_LATENCY = _metric(Histogram, 'thrshld_http_request_duration_seconds', 'Request latency by route',
+                          ['method', 'route', 'status'], buckets=REQUEST_BUCKETS)
+
+OPENAI_LATENCY = _metric(Histogram, 'thrshld_openai_request_duration_seconds', 'OpenAI chat completion latency',
+                         ['outcome'], buckets=OPENAI_BUCKETS)
+OPENAI_TOKENS = _metric(Counter, 'thrshld_openai_tokens', 'OpenAI tokens used', ['kind'])
+
+STRAVA_REQUESTS = _metric(Counter, 'thrshld_strava_requests', 'Strava API calls', ['endpoint', 'status'])
+STRAVA_LATENCY = _metric(Histogram, 'thrshld_strava_request_duration_seconds', 'Strava API latency',
+                         ['endpoint'], buckets=REQUEST_BUCKETS)
+# All workers share one Strava app limit, so report the lowest headroom any live worker saw
+STRAVA_RATE_LIMIT_REMAINING = _gauge('thrshld_strava_rate_limit_remaining', 'Strava requests left in the window',
+                                     ['window'], multiprocess_mode='livemin')
+
+DB_POOL_CHECKOUT_WAIT = _metric(Histogram, 'thrshld_db_pool_checkout_wait_seconds',
+                                'Time spent waiting for a pooled DB connection',
+                                buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30))
+DB_POOL_TIMEOUTS = _metric(Counter, 'thrshld_db_pool_checkout_timeouts', 'Checkouts that gave up after pool_timeout')
+DB_POOL_CONNECTIONS = _gauge('thrshld_db_pool_connections', 'DB pool connections by state', ['state'])
+
+CACHE_REQUESTS = _metric(Counter, 'thrshld_cache_requests', 'Cache lookups by result', ['cache', 'result'])
+PROMPT_TOKENS = _metric(Histogram, 'thrshld_prompt_tokens', 'Check-in prompt tokens by section', ['section'],
+                        buckets=(16, 32, 64, 128, 256, 512, 1024, 2048, 4096))
+PROMPT_SECTIONS = _metric(Counter, 'thrshld_prompt_sections', 'Prompt sections kept, summarized or dropped',
+                          ['section', 'outcome'])
+WORKOUTS_SERVED = _metric(Counter, 'thrshld_checkin_workouts', 'Check-in workouts by where they came from', ['source'])
+
+# Strava paths carry ids and query strings; collapse them so labels stay bounded
+_ID_SEGMENT = re.compile(r'/\d+(?=/|$)')
+
+def strava_endpoint_label(endpoint: str) -> str:
+    return _ID_SEGMENT.sub('/:id', endpoint.split('?', 1)[0])
+
+def record_cache_lookup(cache_name: str, hit: bool) -> None:
+    CACHE_REQUESTS.labels(cache_name, 'hit' if hit else 'miss').inc()
+
+def record_workout_source(source: str) -> None:
+    WORKOUTS_SERVED.labels(source).inc()
+
+def record_openai_call(elapsed: float, outcome: str, usage: Optional[Dict[str, Any]] = None) -> None:
+    OPENAI_LATENCY.labels(outcome).observe(elapsed)
+    if usage:
+        OPENAI_TOKENS.labels('prompt').inc(usage.get('prompt_tokens', 0))
+        OPENAI_TOKENS.labels('completion').inc(usage.get('completion_tokens', 0))
+        # Prompt tokens served from OpenAI's prefix cache
+        OPENAI_TOKENS.labels('cached').inc((usage.get('prompt_tokens_details') or {}).get('cached_tokens') or 0)
+
+def record_prompt(report) -> None:
+    PROMPT_TOKENS.labels('system').observe(report.system_tokens)
+    PROMPT_TOKENS.labels('context').observe(report.context_tokens)
+    for section, (tokens, outcome) in report.sections.items():
+        PROMPT_SECTIONS.labels(section, outcome).inc()
+        if outcome != 'dropped':
+            PROMPT_TOKENS.labels(section).observe(tokens)
+
+def record_strava_call(endpoint: str, elapsed: float, response=None) -> None:
+    label = strava_endpoint_label(endpoint)
+    STRAVA_LATENCY.labels(label).observe(elapsed)
+    STRAVA_REQUESTS.labels(label, str(response.status_code) if response is not None else 'error').inc()
+    if response is None:
+        return
+
+    # Strava reports the 15-minute and daily windows as "short,long"
+    limit = response.headers.get('X-RateLimit-Limit')
+    usage = response.headers.get('X-RateLimit-Usage')
+    if limit and usage:
+        try:
+            for window, cap, used in zip(('15min', 'daily'), limit.split(','), usage.split(',')):
+                STRAVA_RATE_LIMIT_REMAINING.labels(window).set(int(cap) - int(used))
+        except ValueError:
+            logging.debug(f"Unparseable Strava rate limit headers: {limit!r} {usage!r}")
+
+def _on_checkout(engine):
+    DB_POOL_CONNECTIONS.labels('checked_out').inc()
+    pool = engine.pool
+    if hasattr(pool, 'overflow'):
+        # QueuePool counts overflow from -pool_size; only connections beyond the pool matter
+        DB_POOL_CONNECTIONS.labels('overflow').set(max(0, pool.overflow()))
+
+_timed_pools: Dict[type, type] = {}
+
+def timed_pool_class(pool_class: type) -> type:
+    """Subclass of pool_class that times each checkout; dispose() and recreate() keep the class"""
+    if pool_class not in _timed_pools:
+        # The pool has no "checkout requested" event, so time the blocking get every Pool subclass implements
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                return super(timed, self)._do_get()
+            except exc.TimeoutError:
+                DB_POOL_TIMEOUTS.inc()
+                raise
+            finally:
+                DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+
+        timed = type(f'Timed{pool_class.__name__}', (pool_class,), {'_do_get': _do_get})
+        _timed_pools[pool_class] = timed
+    return _timed_pools[pool_class]
+
+def timed_pool_options(database_url: Optional[str], options: Dict[str, Any]) -> Dict[str, Any]:
+    """Engine options whose pool times checkouts, for SQLALCHEMY_ENGINE_OPTIONS"""
+    if generate_latest is None or not database_url:
+        return options
+    url = make_url(database_url)
+    pool_class = options.get('poolclass') or url.get_dialect().get_pool_class(url)
+    return {**options, 'poolclass': timed_pool_class(pool_class)}
+
+def instrument_engine(engine) -> None:
+    """Track pool size and connections in use"""
+    pool = engine.pool
+    if hasattr(pool, 'size'):
+        DB_POOL_CONNECTIONS.labels('size').set(pool.size())
+    # Counted up and down rather than read from the pool, whose checkin event
+    # fires before the connection is actually returned
+    event.listen(engine, 'checkout', lambda *args: _on_checkout(engine))
+    event.listen(engine, 'checkin', lambda *args: DB_POOL_CONNECTIONS.labels('checked_out').dec())
+
+def authorized() -> bool:
+    """Whether the request may see ops endpoints; never, unless METRICS_TOKEN is set"""
+    if not METRICS_TOKEN:
+        return False
+    supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+    return hmac.compare_digest(supplied, METRICS_TOKEN)
+
+def _start_timer():
+    g.request_started = time.perf_counter()
+
+def _observe_request(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        # Unmatched URLs share one label so 404 scans can't explode cardinality
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_LATENCY.labels(request.method, route, str(response.status_code)).observe(time.perf_counter() - started)
+    return response
+
+def metrics_view():
+    # Route names, pool sizes and rate-limit headroom are reconnaissance, so there is no open default
+    if not METRICS_TOKEN:
+        return jsonify({'error': 'Set METRICS_TOKEN to enable /metrics'}), 403
+    if not authorized():
+        return jsonify({'error': 'Unauthorized'}), 401
+    if generate_latest is None:
+        return jsonify({'error': 'prometheus_client is not installed'}), 503
+
+    if MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
+
+def init_metrics(app, db) -> None:
+    app.before_request(_start_timer)
+    app.after_request(_observe_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
+
+    with app.app_context():
+        instrument_engine(db.engine)
+
+    if generate_latest is None:
+        logging.warning("prometheus_client not installed; /metrics is disabled")
@@ -1,12 +1,13 @@
 from datetime import datetime, date, timedelta
 from flask_sqlalchemy import SQLAlchemy
+from replica import RoutingSession
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from itsdangerous import URLSafeTimedSerializer
 import json
 import secrets
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(UserMixin, db.Model):
     __tablename__ = 'users'
@@ -137,6 +138,10 @@ class UserGoals(db.Model):
 
 class Workout(db.Model):
     __tablename__ = 'workouts'
+    __table_args__ = (
+        # Backs the (user_id, date) keyset pagination on history endpoints
+        db.Index('ix_workouts_user_date_completed', 'user_id', 'date_completed', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -185,6 +190,8 @@ class Exercise(db.Model):
     time_seconds = db.Column(db.Integer)  # Duration of exercise
     rest_between_sets = db.Column(db.Integer)  # Rest time in seconds
     personal_record = db.Column(db.Boolean, default=False)
+    # Sets the user logged as done; prescribed sessions are stored with False and never count towards records
+    performed = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
     notes = db.Column(db.Text)
 
     def to_dict(self):
@@ -200,11 +207,16 @@ class Exercise(db.Model):
             'time_seconds': self.time_seconds,
             'rest_between_sets': self.rest_between_sets,
             'personal_record': self.personal_record,
+            'performed': self.performed,
             'notes': self.notes
         }
 
 class CheckIn(db.Model):
     __tablename__ = 'check_ins'
+    __table_args__ = (
+        # Backs the (user_id, date) keyset pagination on history endpoints
+        db.Index('ix_check_ins_user_date', 'user_id', 'date', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -237,6 +249,10 @@ class CheckIn(db.Model):
 
 class BodyMeasurement(db.Model):
     __tablename__ = 'body_measurements'
+    __table_args__ = (
+        # Backs the (user_id, date) keyset pagination on history endpoints
+        db.Index('ix_body_measurements_user_date', 'user_id', 'date', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -263,11 +279,15 @@ class BodyMeasurement(db.Model):
 
 class PersonalRecord(db.Model):
     __tablename__ = 'personal_records'
+    __table_args__ = (
+        # Backs the (user_id, date) keyset pagination on history endpoints
+        db.Index('ix_personal_records_user_date_achieved', 'user_id', 'date_achieved', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     exercise_name = db.Column(db.String(100), nullable=False)
-    record_type = db.Column(db.String(20), nullable=False)  # max_weight, max_reps, fastest_time, longest_distance
+    record_type = db.Column(db.String(20), nullable=False)  # max_weight, max_reps, estimated_1rm, fastest_time, longest_distance
     value = db.Column(db.Float, nullable=False)
     unit = db.Column(db.String(10))  # kg, lbs, seconds, km, miles
     date_achieved = db.Column(db.Date, nullable=False)
@@ -284,4 +304,150 @@ class PersonalRecord(db.Model):
             'unit': self.unit,
             'date_achieved': self.date_achieved.isoformat() if self.date_achieved else None,
             'notes': self.notes
-        }
\ No newline at end of file
+        }
+class PersonalBest(db.Model):
+    __tablename__ = 'personal_bests'
+    __table_args__ = (
+        # The PR engine's index: one current best per user, exercise, record type and weight/distance
+        db.UniqueConstraint('user_id', 'exercise_key', 'record_type', 'qualifier', name='uq_personal_bests_user_exercise_type'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    exercise_key = db.Column(db.String(100), nullable=False)  # lower-cased exercise name
+    record_type = db.Column(db.String(20), nullable=False)  # max_weight, max_reps, estimated_1rm, fastest_time, longest_distance
+    qualifier = db.Column(db.Float, nullable=False, default=0)  # kg for max_reps, km for fastest_time, else 0
+    value = db.Column(db.Float, nullable=False)
+    date_achieved = db.Column(db.Date, nullable=False)
+    personal_record_id = db.Column(db.Integer, db.ForeignKey('personal_records.id'))
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationships
+    record = db.relationship('PersonalRecord')
+
+class StrengthEstimate(db.Model):
+    __tablename__ = 'strength_estimates'
+    __table_args__ = (
+        # One point per user, lift and day; also serves the rolling-window lookups
+        db.UniqueConstraint('user_id', 'lift', 'date', name='uq_strength_estimates_user_lift_date'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    lift = db.Column(db.String(20), nullable=False)  # squat, bench_press, deadlift, overhead_press
+    date = db.Column(db.Date, nullable=False)
+    e1rm_kg = db.Column(db.Float, nullable=False)  # best estimate from that day's sets
+    rolling_e1rm_kg = db.Column(db.Float, nullable=False)  # best daily estimate over the rolling window
+    workout_id = db.Column(db.Integer, db.ForeignKey('workouts.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'lift': self.lift,
+            'date': self.date.isoformat() if self.date else None,
+            'e1rm_kg': self.e1rm_kg,
+            'rolling_e1rm_kg': self.rolling_e1rm_kg
+        }
+
+class DraftWorkout(db.Model):
+    __tablename__ = 'draft_workouts'
+    __table_args__ = (
+        # One draft per user per day; also makes nightly batch reruns idempotent
+        db.UniqueConstraint('user_id', 'for_date', name='uq_draft_workouts_user_date'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    for_date = db.Column(db.Date, nullable=False)
+    content = db.Column(db.Text, nullable=False)
+    workout = db.Column(db.JSON)  # parsed WORKOUT_SCHEMA reply; None for drafts stored as text only
+    model = db.Column(db.String(50))
+    prompt_tokens = db.Column(db.Integer)
+    completion_tokens = db.Column(db.Integer)
+    status = db.Column(db.String(20), default='ready')  # ready, served
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    served_at = db.Column(db.DateTime)
+
+class Programme(db.Model):
+    __tablename__ = 'programmes'
+    __table_args__ = (
+        # Check-ins look up the user's active programme
+        db.Index('ix_programmes_user_status', 'user_id', 'status'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    name = db.Column(db.String(100), nullable=False)
+    version = db.Column(db.Integer, nullable=False, default=1)
+    weeks = db.Column(db.Integer, nullable=False)
+    start_date = db.Column(db.Date, nullable=False)
+    status = db.Column(db.String(20), default='active')  # active, superseded
+    inputs_hash = db.Column(db.String(64), nullable=False)  # 1RMs and goals the plan was resolved against
+    inputs = db.Column(db.JSON)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Relationships
+    sessions = db.relationship('ProgrammeSession', backref='programme', cascade='all, delete-orphan',
+                               order_by='ProgrammeSession.scheduled_date')
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'version': self.version,
+            'weeks': self.weeks,
+            'start_date': self.start_date.isoformat() if self.start_date else None,
+            'status': self.status,
+            'inputs': self.inputs or {},
+            'sessions': [s.to_dict() for s in self.sessions]
+        }
+
+class ProgrammeSession(db.Model):
+    __tablename__ = 'programme_sessions'
+    __table_args__ = (
+        # One session per programme per day; also serves the check-in lookup by date
+        db.UniqueConstraint('programme_id', 'scheduled_date', name='uq_programme_sessions_programme_date'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    programme_id = db.Column(db.Integer, db.ForeignKey('programmes.id'), nullable=False)
+    week = db.Column(db.Integer, nullable=False)
+    day = db.Column(db.Integer, nullable=False)  # session number within the week, from 1
+    scheduled_date = db.Column(db.Date, nullable=False)
+    phase = db.Column(db.String(20))  # accumulation, intensification, realization, deload
+    focus = db.Column(db.String(100))
+    exercises = db.Column(db.JSON)  # Array of {name, lift, sets, reps, percent_1rm, load_kg, rest_seconds}
+    workout_id = db.Column(db.Integer, db.ForeignKey('workouts.id'))  # Set once the session is served
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'week': self.week,
+            'day': self.day,
+            'scheduled_date': self.scheduled_date.isoformat() if self.scheduled_date else None,
+            'phase': self.phase,
+            'focus': self.focus,
+            'exercises': self.exercises or [],
+            'workout_id': self.workout_id
+        }
+
+class LegacyImport(db.Model):
+    __tablename__ = 'legacy_imports'
+    __table_args__ = (
+        # Makes re-running the importer skip every check-in and workout it has already loaded
+        db.UniqueConstraint('source', 'source_key', name='uq_legacy_imports_source_key'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    source = db.Column(db.String(20), nullable=False)  # user_data, requests
+    source_key = db.Column(db.String(64), nullable=False)  # importer.row_key of one check-in or workout
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    imported_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class StoredSession(db.Model):
+    __tablename__ = 'sessions'
+    
+    id = db.Column(db.String(64), primary_key=True)  # SHA-256 of the cookie's session id, never the id itself
+    data = db.Column(db.Text, nullable=False)  # Flask's tagged JSON
+    version = db.Column(db.Integer, nullable=False, default=1)  # bumped on every write; the cookie carries it
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
@@ -0,0 +1,94 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+class PaginationError(ValueError):
+    """Raised when pagination or date range parameters are invalid"""
+
+def parse_date(value: Optional[str], name: str) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise PaginationError(f"'{name}' must be a date in YYYY-MM-DD format")
+
+def parse_page_args(args, default_from: Optional[date] = None) -> Dict[str, Any]:
+    """Read limit, cursor and from/to range parameters from request args"""
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise PaginationError("'limit' must be an integer")
+    if limit < 1:
+        raise PaginationError("'limit' must be at least 1")
+
+    date_from = parse_date(args.get('from'), 'from') or default_from
+    date_to = parse_date(args.get('to'), 'to')
+    if date_from and date_to and date_from > date_to:
+        raise PaginationError("'from' must not be after 'to'")
+
+    return {
+        'limit': min(limit, MAX_PAGE_SIZE),
+        'cursor': decode_cursor(args.get('cursor')),
+        'from': date_from,
+        'to': date_to
+    }
+
+def encode_cursor(positions: Dict[str, Tuple[date, int]]) -> Optional[str]:
+    """Encode per-stream (date, id) keyset positions as an opaque token"""
+    if not positions:
+        return None
+    payload = {name: [position[0].isoformat(), position[1]] for name, position in positions.items()}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode().rstrip('=')
+
+def decode_cursor(token: Optional[str]) -> Dict[str, Tuple[date, int]]:
+    if not token:
+        return {}
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return {name: (datetime.strptime(value[0], '%Y-%m-%d').date(), int(value[1]))
+                for name, value in payload.items()}
+    except (ValueError, TypeError, KeyError, IndexError, AttributeError):
+        raise PaginationError("Invalid cursor")
+
+def keyset_page(query, date_column, id_column, page: Dict[str, Any], stream: str,
+                descending: bool = False) -> Tuple[List[Any], Optional[Tuple[date, int]]]:
+    """Fetch one page ordered by (date, id), returning rows and the next keyset position.
+
+    Rows must expose the date and id columns under their column names, so both
+    ORM entities and column tuples work. Only limit + 1 rows are ever loaded.
+    A stream whose cursor was exhausted on a previous page returns no rows.
+    """
+    cursor = page['cursor']
+    if cursor and stream not in cursor:
+        return [], None
+
+    if page['from']:
+        query = query.filter(date_column >= page['from'])
+    if page['to']:
+        query = query.filter(date_column <= page['to'])
+
+    if stream in cursor:
+        position = tuple_(date_column, id_column)
+        after = tuple_(*cursor[stream])
+        query = query.filter(position < after if descending else position > after)
+
+    if descending:
+        query = query.order_by(date_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(date_column.asc(), id_column.asc())
+
+    limit = page['limit']
+    rows = query.limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, (getattr(last, date_column.key), getattr(last, id_column.key))
@@ -0,0 +1,199 @@
+import os
+import json
+import time
+import logging
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, timedelta
+import click
+import requests
+from flask.cli import with_appcontext
+from sqlalchemy import func, select, union
+from models import db, UserProfile, UserGoals, Workout, CheckIn, DraftWorkout, Programme, ProgrammeSession
+from coach import (OPENAI_API_BASE, OPENAI_MODEL, WORKOUT_RESPONSE_FORMAT, WorkoutFormatError, api_headers,
+                   build_checkin_messages, completion_body, parse_workout, request_workout)
+from workout_engine import HISTORY_DAYS, HISTORY_WORKOUTS, HISTORY_CHECKINS, format_ai_workout
+
+ID_CHUNK = 1000  # ids per IN (...) clause
+INSERT_CHUNK = 200
+BATCH_POLL_INTERVAL = 10  # seconds
+BATCH_TERMINAL = {'completed', 'failed', 'expired', 'cancelled'}
+
+# USD per million tokens; the Batch API bills half
+PRICE_INPUT_PER_M = float(os.environ.get('OPENAI_PRICE_INPUT_PER_M', '2.50'))
+PRICE_OUTPUT_PER_M = float(os.environ.get('OPENAI_PRICE_OUTPUT_PER_M', '10.00'))
+BATCH_DISCOUNT = 0.5
+
+DraftRequest = namedtuple('DraftRequest', 'user_id prompt')
+DraftResult = namedtuple('DraftResult', 'user_id workout usage error')
+
+class BatchError(Exception):
+    pass
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def active_user_ids(for_date, active_days):
+    """Users who checked in or trained recently, have no draft for for_date and aren't following a programme then"""
+    since = for_date - timedelta(days=active_days)
+    recent = union(
+        select(CheckIn.user_id).where(CheckIn.date >= since),
+        select(Workout.user_id).where(Workout.date_completed >= since),
+    ).subquery()
+    drafted = select(DraftWorkout.user_id).where(DraftWorkout.for_date == for_date)
+    # Inside an active block the calendar decides: a session day serves the programme, a rest day serves nothing
+    in_block = (select(Programme.user_id).join(ProgrammeSession, ProgrammeSession.programme_id == Programme.id)
+                .where(Programme.status == 'active', Programme.start_date <= for_date,
+                       ProgrammeSession.scheduled_date >= for_date))
+    query = (select(recent.c.user_id).where(recent.c.user_id.not_in(drafted), recent.c.user_id.not_in(in_block))
+             .order_by(recent.c.user_id))
+    return list(db.session.scalars(query))
+
+def gather_requests(user_ids, for_date):
+    """Build every user's draft prompt, the same way as a live check-in, from a handful of bulk queries"""
+    requests_out = []
+    for ids in _chunks(user_ids, ID_CHUNK):
+        profiles = {p.user_id: p for p in UserProfile.query.filter(UserProfile.user_id.in_(ids))}
+        goals = {g.user_id: g for g in UserGoals.query.filter(UserGoals.user_id.in_(ids))}
+
+        workouts, checkins = defaultdict(list), defaultdict(list)
+        for workout in (Workout.query.filter(Workout.user_id.in_(ids),
+                                             Workout.date_completed >= for_date - timedelta(days=HISTORY_DAYS))
+                        .order_by(Workout.user_id, Workout.date_completed.desc(), Workout.id.desc())):
+            if len(workouts[workout.user_id]) < HISTORY_WORKOUTS:
+                workouts[workout.user_id].append(workout)
+        for checkin in (CheckIn.query.filter(CheckIn.user_id.in_(ids), CheckIn.date >= for_date - timedelta(days=7),
+                                             CheckIn.date < for_date)
+                        .order_by(CheckIn.user_id, CheckIn.date.desc(), CheckIn.id.desc())):
+            if len(checkins[checkin.user_id]) < HISTORY_CHECKINS:
+                checkins[checkin.user_id].append(checkin)
+
+        status = f"Planning the session for {for_date:%A %d %B}, before that day's check-in."
+        for user_id in ids:
+            messages, _ = build_checkin_messages(profiles.get(user_id), goals.get(user_id), status,
+                                                 workouts[user_id], checkins[user_id])
+            requests_out.append(DraftRequest(user_id, messages))
+    return requests_out
+
+def run_concurrent(draft_requests, concurrency):
+    """Live chat completions, at most `concurrency` in flight"""
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {pool.submit(request_workout, item.prompt): item.user_id for item in draft_requests}
+        for future in as_completed(futures):
+            try:
+                workout, usage = future.result()
+                yield DraftResult(futures[future], workout, usage, None)
+            except (requests.exceptions.RequestException, WorkoutFormatError) as e:
+                yield DraftResult(futures[future], None, None, str(e))
+
+def run_batch(draft_requests, poll_interval=BATCH_POLL_INTERVAL):
+    """One OpenAI Batch API job covering every request; cheaper, finishes within 24h"""
+    lines = [json.dumps({'custom_id': f"user-{item.user_id}", 'method': 'POST', 'url': '/v1/chat/completions',
+                         'body': completion_body(item.prompt, response_format=WORKOUT_RESPONSE_FORMAT)})
+             for item in draft_requests]
+    upload = requests.post(f"{OPENAI_API_BASE}/files", headers=api_headers(), data={'purpose': 'batch'},
+                           files={'file': ('drafts.jsonl', '\n'.join(lines).encode())}, timeout=120)
+    upload.raise_for_status()
+
+    response = requests.post(f"{OPENAI_API_BASE}/batches", headers=api_headers(), timeout=30, json={
+        'input_file_id': upload.json()['id'], 'endpoint': '/v1/chat/completions', 'completion_window': '24h'})
+    response.raise_for_status()
+    batch = response.json()
+    logging.info(f"Submitted batch {batch['id']} with {len(lines)} requests")
+
+    while batch['status'] not in BATCH_TERMINAL:
+        time.sleep(poll_interval)
+        response = requests.get(f"{OPENAI_API_BASE}/batches/{batch['id']}", headers=api_headers(), timeout=30)
+        response.raise_for_status()
+        batch = response.json()
+    if batch['status'] != 'completed' or not batch.get('output_file_id'):
+        raise BatchError(f"Batch {batch['id']} ended with status {batch['status']}")
+
+    output = requests.get(f"{OPENAI_API_BASE}/files/{batch['output_file_id']}/content", headers=api_headers(), timeout=120)
+    output.raise_for_status()
+    answered = set()
+    for line in output.text.splitlines():
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        user_id = int(record['custom_id'].split('-', 1)[1])
+        answered.add(user_id)
+        result = record.get('response') or {}
+        if result.get('status_code') == 200:
+            body = result['body']
+            try:
+                workout = parse_workout(body['choices'][0]['message']['content'])
+            except WorkoutFormatError as e:
+                yield DraftResult(user_id, None, None, str(e))
+                continue
+            yield DraftResult(user_id, workout, body.get('usage') or {}, None)
+        else:
+            yield DraftResult(user_id, None, None, str(record.get('error') or result.get('status_code')))
+
+    for item in draft_requests:
+        if item.user_id not in answered:
+            yield DraftResult(item.user_id, None, None, 'missing from batch output')
+
+def store_drafts(results, for_date):
+    """Insert successful drafts in chunks; returns (stored, failed, prompt_tokens, completion_tokens)"""
+    stored = failed = prompt_tokens = completion_tokens = 0
+    pending = []
+
+    def flush():
+        db.session.bulk_insert_mappings(DraftWorkout, pending)
+        db.session.commit()
+        pending.clear()
+
+    for result in results:
+        if result.error:
+            failed += 1
+            logging.warning(f"Draft for user {result.user_id} failed: {result.error}")
+            continue
+        prompt_tokens += result.usage.get('prompt_tokens', 0)
+        completion_tokens += result.usage.get('completion_tokens', 0)
+        pending.append(dict(user_id=result.user_id, for_date=for_date, content=format_ai_workout(result.workout),
+                            workout=result.workout, model=OPENAI_MODEL,
+                            prompt_tokens=result.usage.get('prompt_tokens'),
+                            completion_tokens=result.usage.get('completion_tokens'), status='ready'))
+        stored += 1
+        if len(pending) >= INSERT_CHUNK:
+            flush()
+    if pending:
+        flush()
+    return stored, failed, prompt_tokens, completion_tokens
+
+def estimate_cost(prompt_tokens, completion_tokens, batch):
+    cost = (prompt_tokens * PRICE_INPUT_PER_M + completion_tokens * PRICE_OUTPUT_PER_M) / 1_000_000
+    return cost * BATCH_DISCOUNT if batch else cost
+
+@click.command('pregenerate-workouts')
+@click.option('--date', 'for_date', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='Day to generate drafts for (default: tomorrow).')
+@click.option('--mode', type=click.Choice(['concurrent', 'batch']), default='concurrent',
+              help='Live calls with bounded concurrency, or one Batch API job.')
+@click.option('--concurrency', default=8, show_default=True, help='Live calls in flight (concurrent mode).')
+@click.option('--active-days', default=14, show_default=True, help='Only users active within this many days.')
+@click.option('--limit', type=int, default=None, help='Cap the number of users (for trial runs).')
+@with_appcontext
+def pregenerate_command(for_date, mode, concurrency, active_days, limit):
+    """Pre-generate next-day draft workouts so check-ins can skip the live AI call. Run nightly."""
+    for_date = for_date.date() if for_date else date.today() + timedelta(days=1)
+    started = time.time()
+
+    user_ids = active_user_ids(for_date, active_days)[:limit]
+    draft_requests = gather_requests(user_ids, for_date)
+    gathered = time.time()
+    click.echo(f"Gathered context for {len(draft_requests)} users in {gathered - started:.1f}s")
+    if not draft_requests:
+        return
+
+    results = run_batch(draft_requests) if mode == 'batch' else run_concurrent(draft_requests, concurrency)
+    stored, failed, prompt_tokens, completion_tokens = store_drafts(results, for_date)
+
+    elapsed = time.time() - started
+    cost = estimate_cost(prompt_tokens, completion_tokens, mode == 'batch')
+    click.echo(f"Stored {stored} drafts for {for_date.isoformat()} ({failed} failed) in {elapsed:.1f}s, "
+               f"{stored / max(elapsed, 1e-9):.1f} users/s")
+    click.echo(f"Tokens: {prompt_tokens} prompt + {completion_tokens} completion; "
+               f"estimated ${cost:.4f} total, ${cost / max(stored, 1):.5f} per user")
@@ -0,0 +1,211 @@
+import os
+import sys
+import time
+import signal
+import logging
+import threading
+from collections import Counter
+from typing import Dict, Optional
+from flask import Blueprint, Response, jsonify, request
+from metrics import METRICS_TOKEN, authorized
+
+# Default sampling interval; 200 Hz keeps overhead around 1% of one core
+DEFAULT_INTERVAL = float(os.environ.get('PROFILER_INTERVAL', '0.005'))
+MAX_WINDOW = 600  # seconds an endpoint-started capture may run before stopping itself
+PROFILER_DIR = os.environ.get('PROFILER_DIR', 'profiles')
+# Workers toggle on this signal, e.g. kill -USR2 <worker pid>; gunicorn workers leave it unused
+PROFILER_SIGNAL = getattr(signal, os.environ.get('PROFILER_SIGNAL', 'SIGUSR2'), None)
+
+ROOT = os.path.dirname(os.path.abspath(__file__)) + os.sep
+
+profiler_bp = Blueprint('profiler', __name__, url_prefix='/admin/profiler')
+
+class SamplingProfiler:
+    """Statistical profiler sampling every request thread's stack, tagged by route"""
+
+    def __init__(self):
+        # thread ident -> URL rule of the request it is serving
+        self.thread_routes: Dict[int, str] = {}
+        self.samples: Counter = Counter()
+        self.labels: Dict[object, str] = {}
+        self.lock = threading.Lock()
+        self.thread: Optional[threading.Thread] = None
+        self.stop_event = threading.Event()
+        self.interval = DEFAULT_INTERVAL
+        self.all_threads = False
+        self.started_at = None
+        self.stopped_at = None
+        self.sample_count = 0
+
+    @property
+    def running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, seconds: Optional[float] = None, interval: Optional[float] = None, all_threads: bool = False) -> bool:
+        """Begin a capture; without seconds it runs until stop() (signal or autostart)"""
+        with self.lock:
+            if self.running:
+                return False
+            self.samples = Counter()
+            self.sample_count = 0
+            self.interval = interval or DEFAULT_INTERVAL
+            self.all_threads = all_threads
+            self.started_at = time.time()
+            self.stopped_at = None
+            self.stop_event.clear()
+            deadline = time.monotonic() + min(seconds, MAX_WINDOW) if seconds else None
+            self.thread = threading.Thread(target=self._run, args=(deadline,), name='sampling-profiler', daemon=True)
+            self.thread.start()
+        logging.info(f"Sampling profiler started in worker {os.getpid()} every {self.interval * 1000:.1f} ms")
+        return True
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+
+    def _label(self, code) -> str:
+        label = self.labels.get(code)
+        if label is None:
+            filename = code.co_filename
+            if filename.startswith(ROOT):
+                filename = filename[len(ROOT):]
+            else:
+                filename = filename.rsplit('site-packages' + os.sep, 1)[-1]
+            label = f"{code.co_name} ({filename}:{code.co_firstlineno})"
+            self.labels[code] = label
+        return label
+
+    def _sample(self) -> None:
+        own = threading.get_ident()
+        routes = self.thread_routes
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            route = routes.get(ident)
+            if route is None and not self.all_threads:
+                continue
+
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            stack.append(route or 'idle')
+            stack.reverse()
+            self.samples[';'.join(stack)] += 1
+        self.sample_count += 1
+
+    def _run(self, deadline: Optional[float]) -> None:
+        while not self.stop_event.wait(self.interval):
+            self._sample()
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+        self.stopped_at = time.time()
+        logging.info(f"Sampling profiler stopped after {self.sample_count} samples")
+
+    def collapsed(self, route: Optional[str] = None) -> str:
+        """Stacks in Brendan Gregg's collapsed format, for flamegraph.pl or speedscope"""
+        samples = list(self.samples.items())
+        lines = [f"{stack} {count}" for stack, count in sorted(samples)
+                 if route is None or stack.split(';', 1)[0] == route]
+        return '\n'.join(lines) + '\n'
+
+    def status(self) -> dict:
+        routes = Counter()
+        for stack, count in list(self.samples.items()):
+            routes[stack.split(';', 1)[0]] += count
+        return {
+            'pid': os.getpid(),
+            'running': self.running,
+            'interval': self.interval,
+            'started_at': self.started_at,
+            'stopped_at': self.stopped_at,
+            'samples': self.sample_count,
+            'routes': dict(routes.most_common()),
+        }
+
+    def dump(self) -> str:
+        os.makedirs(PROFILER_DIR, exist_ok=True)
+        path = os.path.join(PROFILER_DIR, f"profile-{os.getpid()}-{int(time.time())}.collapsed")
+        with open(path, 'w') as handle:
+            handle.write(self.collapsed())
+        return path
+
+# Global profiler instance (one per worker process)
+profiler = SamplingProfiler()
+
+def _track_route():
+    # Always tracked (a dict store) so requests already in flight are tagged when a capture starts
+    profiler.thread_routes[threading.get_ident()] = request.url_rule.rule if request.url_rule else 'unmatched'
+
+def _untrack_route(exc):
+    profiler.thread_routes.pop(threading.get_ident(), None)
+
+def _toggle(signum, frame):
+    if profiler.running:
+        # Signal handlers run on the main thread; finish the capture off it
+        def stop_and_dump():
+            profiler.stop()
+            logging.info(f"Profile written to {profiler.dump()}")
+        threading.Thread(target=stop_and_dump, daemon=True).start()
+    else:
+        profiler.start()
+
+@profiler_bp.before_request
+def require_token():
+    # Stacks reveal code paths, so these endpoints never run unauthenticated
+    if not METRICS_TOKEN:
+        return jsonify({'error': 'Set METRICS_TOKEN to enable the profiler endpoints'}), 403
+    if not authorized():
+        return jsonify({'error': 'Unauthorized'}), 401
+
+@profiler_bp.route('', methods=['GET'])
+def profiler_status():
+    return jsonify(profiler.status())
+
+@profiler_bp.route('/start', methods=['POST'])
+def start_profiler():
+    try:
+        seconds = float(request.args.get('seconds', 30))
+        interval = float(request.args['interval']) if 'interval' in request.args else None
+    except ValueError:
+        return jsonify({'error': 'seconds and interval must be numbers'}), 400
+    if not 0 < seconds <= MAX_WINDOW:
+        return jsonify({'error': f'seconds must be between 0 and {MAX_WINDOW}'}), 400
+    if interval is not None and not 0.001 <= interval <= 1:
+        return jsonify({'error': 'interval must be between 0.001 and 1 seconds'}), 400
+
+    started = profiler.start(seconds, interval, request.args.get('all_threads') == '1')
+    if not started:
+        return jsonify({'error': 'Profiler already running', **profiler.status()}), 409
+    return jsonify(profiler.status())
+
+@profiler_bp.route('/stop', methods=['POST'])
+def stop_profiler():
+    profiler.stop()
+    return jsonify(profiler.status())
+
+@profiler_bp.route('/profile', methods=['GET'])
+def download_profile():
+    """Collapsed stacks for this worker, optionally limited to one route (?route=/api/check-in)"""
+    route = request.args.get('route')
+    response = Response(profiler.collapsed(route), mimetype='text/plain')
+    response.headers['Content-Disposition'] = f'attachment; filename="profile-{os.getpid()}.collapsed"'
+    response.headers['X-Profiler-Pid'] = str(os.getpid())
+    return response
+
+def init_profiler(app) -> None:
+    app.before_request(_track_route)
+    app.teardown_request(_untrack_route)
+    app.register_blueprint(profiler_bp)
+
+    if PROFILER_SIGNAL is not None:
+        try:
+            signal.signal(PROFILER_SIGNAL, _toggle)
+        except ValueError:
+            # Not on the main thread (e.g. imported by a test runner); the endpoints still work
+            logging.debug("Profiler signal handler not installed")
+
+    # Continuous low-rate profiling from boot, e.g. PROFILER_AUTOSTART=1 PROFILER_INTERVAL=0.02
+    if os.environ.get('PROFILER_AUTOSTART') == '1':
+        profiler.start()
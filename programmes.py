@@ -0,0 +1,207 @@
+import json
+import hashlib
+import logging
+from collections import namedtuple
+from datetime import date, timedelta
+from typing import Optional, List, Dict, Any
+from models import db, Programme, ProgrammeSession
+
+LOAD_INCREMENT = 2.5  # kg; smallest common plate jump
+BEGINNER_OFFSET = 5  # percentage points taken off every prescription for beginners
+SECONDARY_OFFSET = 10  # the session's second lift runs this much lighter
+
+Week = namedtuple('Week', 'phase sets reps percent')
+
+# Three four-week waves; every fourth week is a deload
+STRENGTH_BLOCK = [
+    Week('accumulation', 4, 6, 70), Week('accumulation', 4, 6, 72.5), Week('accumulation', 5, 5, 75), Week('deload', 3, 5, 60),
+    Week('intensification', 5, 4, 80), Week('intensification', 5, 3, 82.5), Week('intensification', 6, 3, 85), Week('deload', 3, 3, 65),
+    Week('realization', 4, 3, 87.5), Week('realization', 4, 2, 90), Week('realization', 3, 1, 92.5), Week('deload', 2, 3, 60),
+]
+HYPERTROPHY_BLOCK = [
+    Week('accumulation', 3, 12, 60), Week('accumulation', 4, 10, 65), Week('accumulation', 4, 10, 67.5), Week('deload', 2, 10, 55),
+    Week('intensification', 4, 8, 70), Week('intensification', 4, 8, 72.5), Week('intensification', 5, 6, 75), Week('deload', 2, 8, 60),
+    Week('realization', 4, 6, 77.5), Week('realization', 4, 6, 80), Week('realization', 4, 5, 82.5), Week('deload', 2, 6, 60),
+]
+GENERAL_BLOCK = [
+    Week('accumulation', 3, 10, 60), Week('accumulation', 3, 10, 62.5), Week('accumulation', 3, 8, 65), Week('deload', 2, 8, 55),
+    Week('intensification', 3, 8, 67.5), Week('intensification', 3, 8, 70), Week('intensification', 4, 6, 72.5), Week('deload', 2, 6, 60),
+    Week('realization', 4, 6, 75), Week('realization', 4, 5, 77.5), Week('realization', 4, 5, 80), Week('deload', 2, 5, 60),
+]
+
+# Goal values from both the onboarding and goals-setup forms
+GOAL_BLOCKS = {
+    'strength': ('Strength', STRENGTH_BLOCK),
+    'strength_building': ('Strength', STRENGTH_BLOCK),
+    'build_muscle': ('Hypertrophy', HYPERTROPHY_BLOCK),
+    'muscle_growth': ('Hypertrophy', HYPERTROPHY_BLOCK),
+}
+DEFAULT_BLOCK = ('General Fitness', GENERAL_BLOCK)
+
+LIFT_NAMES = {
+    'squat': 'Back Squat',
+    'bench_press': 'Bench Press',
+    'deadlift': 'Deadlift',
+    'overhead_press': 'Overhead Press',
+    'pull_ups': 'Pull-ups',
+}
+LIFT_1RM_FIELDS = {
+    'squat': 'squat_1rm',
+    'bench_press': 'bench_1rm',
+    'deadlift': 'deadlift_1rm',
+    'overhead_press': 'overhead_press_1rm',
+}
+DEFAULT_LIFTS = ['squat', 'bench_press', 'deadlift', 'overhead_press']
+ACCESSORIES = {
+    'squat': [('Romanian Deadlift', 3, 10), ('Hanging Leg Raise', 3, 12)],
+    'bench_press': [('Dumbbell Row', 3, 10), ('Triceps Dip', 3, 10)],
+    'deadlift': [('Bulgarian Split Squat', 3, 8), ('Back Extension', 3, 12)],
+    'overhead_press': [('Lateral Raise', 3, 12), ('Face Pull', 3, 15)],
+    'pull_ups': [('Barbell Row', 3, 8), ('Biceps Curl', 3, 12)],
+}
+WARM_UP = "5-10 minutes of easy cardio and mobility, then ramp-up sets of the first lift."
+COOL_DOWN = "5 minutes of easy walking and stretching for the muscles you trained."
+# Weekday offsets from Monday for each weekly frequency
+TRAINING_DAYS = {
+    2: [0, 3],
+    3: [0, 2, 4],
+    4: [0, 1, 3, 4],
+    5: [0, 1, 2, 4, 5],
+    6: [0, 1, 2, 3, 4, 5],
+}
+
+def normalize_lift(name: str) -> str:
+    return name.strip().lower().replace('-', '_').replace(' ', '_')
+
+def programme_inputs(profile, goals) -> Dict[str, Any]:
+    """Everything a programme is resolved against; a change here means a new version"""
+    lifts = [normalize_lift(l) for l in (goals.compound_lifts or [])] if goals else []
+    lifts = [l for l in dict.fromkeys(lifts) if l in LIFT_NAMES] or DEFAULT_LIFTS
+    days = (goals.target_sessions_per_week if goals else None) or getattr(profile, 'training_days_per_week', None) or 3
+    return {
+        'goal': normalize_lift(goals.workout_goal) if goals and goals.workout_goal else None,
+        'lifts': lifts,
+        'days_per_week': min(max(days, min(TRAINING_DAYS)), max(TRAINING_DAYS)),
+        'experience': getattr(profile, 'experience_level', None) or 'beginner',
+        'one_rep_maxes': {lift: getattr(profile, field, None) for lift, field in LIFT_1RM_FIELDS.items()},
+        'max_pull_ups': getattr(profile, 'max_pull_ups', None),
+    }
+
+def inputs_hash(inputs: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+def round_load(kg: float) -> float:
+    return round(kg / LOAD_INCREMENT) * LOAD_INCREMENT
+
+def rest_for(reps: int) -> int:
+    if reps <= 3:
+        return 180
+    if reps <= 6:
+        return 150
+    return 90 if reps <= 10 else 60
+
+def prescribe(lift: str, sets: int, reps: int, percent: float, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """One main-lift entry with its percentage resolved to kg (or reps, for pull-ups)"""
+    if inputs['experience'] == 'beginner':
+        percent -= BEGINNER_OFFSET
+    load_kg = None
+    if lift == 'pull_ups':
+        if inputs['max_pull_ups']:
+            reps = max(1, round(inputs['max_pull_ups'] * percent / 100))
+    elif inputs['one_rep_maxes'].get(lift):
+        load_kg = round_load(inputs['one_rep_maxes'][lift] * percent / 100)
+    return {'name': LIFT_NAMES[lift], 'lift': lift, 'sets': sets, 'reps': reps, 'percent_1rm': percent,
+            'load_kg': load_kg, 'rest_seconds': rest_for(reps)}
+
+def build_sessions(inputs: Dict[str, Any], start_date: date) -> List[Dict[str, Any]]:
+    """Lay out the whole block; pure, so the same inputs always give the same plan"""
+    _, block = GOAL_BLOCKS.get(inputs['goal'], DEFAULT_BLOCK)
+    lifts = inputs['lifts']
+    offsets = TRAINING_DAYS[inputs['days_per_week']]
+    sessions = []
+    slot = 0
+    for week_number, week in enumerate(block, start=1):
+        week_start = start_date + timedelta(weeks=week_number - 1)
+        for day_number, offset in enumerate(offsets, start=1):
+            main = lifts[slot % len(lifts)]
+            exercises = [prescribe(main, week.sets, week.reps, week.percent, inputs)]
+            if len(lifts) > 1:
+                secondary = lifts[(slot + 1) % len(lifts)]
+                exercises.append(prescribe(secondary, max(2, week.sets - 1), week.reps,
+                                           week.percent - SECONDARY_OFFSET, inputs))
+            for name, sets, reps in ACCESSORIES[main]:
+                exercises.append({'name': name, 'lift': None, 'sets': 2 if week.phase == 'deload' else sets,
+                                  'reps': reps, 'percent_1rm': None, 'load_kg': None, 'rest_seconds': 60})
+            sessions.append({'week': week_number, 'day': day_number, 'scheduled_date': week_start + timedelta(days=offset),
+                             'phase': week.phase, 'focus': f"{LIFT_NAMES[main]} focus", 'exercises': exercises})
+            slot += 1
+    return sessions
+
+def active_programme(user_id: int) -> Optional[Programme]:
+    return Programme.query.filter_by(user_id=user_id, status='active').order_by(Programme.version.desc()).first()
+
+def ensure_programme(user_id: int, profile, goals, today: Optional[date] = None) -> Optional[Programme]:
+    """Return the user's current programme, generating a new version if their 1RMs or goals changed.
+
+    New versions are added to the session but not committed; the caller's transaction owns them.
+    """
+    if not profile:
+        return None
+    today = today or date.today()
+    inputs = programme_inputs(profile, goals)
+    digest = inputs_hash(inputs)
+    current = active_programme(user_id)
+    in_block = current is not None and today < current.start_date + timedelta(weeks=current.weeks)
+    if in_block and current.inputs_hash == digest:
+        return current
+
+    # A mid-block change keeps the calendar, so the lifter carries on from the same week at the new loads
+    start_date = current.start_date if in_block else today - timedelta(days=today.weekday())
+    version = (db.session.query(db.func.max(Programme.version)).filter(Programme.user_id == user_id).scalar() or 0) + 1
+    label, block = GOAL_BLOCKS.get(inputs['goal'], DEFAULT_BLOCK)
+    if current:
+        current.status = 'superseded'
+    programme = Programme(user_id=user_id, name=f"{len(block)}-Week {label} Block", version=version, weeks=len(block),
+                          start_date=start_date, status='active', inputs_hash=digest, inputs=inputs)
+    programme.sessions = [ProgrammeSession(**s) for s in build_sessions(inputs, start_date)]
+    if in_block:
+        # Sessions already served stay linked to their workouts in the new version
+        served = {s.scheduled_date: s.workout_id for s in current.sessions if s.workout_id}
+        for programme_session in programme.sessions:
+            programme_session.workout_id = served.get(programme_session.scheduled_date)
+    db.session.add(programme)
+    logging.info(f"Generated programme v{version} for user {user_id} starting {start_date.isoformat()}")
+    return programme
+
+def session_for(programme: Optional[Programme], day: date) -> Optional[ProgrammeSession]:
+    if programme is None:
+        return None
+    if programme.id is None:
+        return next((s for s in programme.sessions if s.scheduled_date == day), None)
+    return ProgrammeSession.query.filter_by(programme_id=programme.id, scheduled_date=day).first()
+
+def format_session(programme_session: ProgrammeSession, exercises: Optional[List[Dict[str, Any]]] = None) -> str:
+    """Plain-text rendering of a stored session (or of exercises adjusted from it), in the same shape as the coach's replies"""
+    return format_exercises(f"Week {programme_session.week}, day {programme_session.day} "
+                            f"({programme_session.phase}): {programme_session.focus}",
+                            programme_session.exercises if exercises is None else exercises)
+
+def format_exercises(heading: str, exercises: List[Dict[str, Any]], warm_up: str = WARM_UP,
+                     cool_down: str = COOL_DOWN, notes: Optional[str] = None) -> str:
+    lines = [heading, "", f"Warm-up: {warm_up}", ""]
+    for exercise in exercises:
+        line = f"- {exercise['name']}: {exercise['sets']} x {exercise['reps']}"
+        percent = exercise['percent_1rm'] if exercise['lift'] != 'pull_ups' else None
+        if exercise['load_kg']:
+            line += f" at {exercise['load_kg']:g}kg" + (f" ({percent:g}% of 1RM)" if percent else "")
+        elif percent:
+            line += f" at {percent:g}% of 1RM"
+        if exercise['rest_seconds']:
+            line += f", rest {exercise['rest_seconds']}s"
+        if exercise.get('notes'):
+            line += f" ({exercise['notes']})"
+        lines.append(line)
+    lines += ["", f"Cool-down: {cool_down}"]
+    if notes:
+        lines += ["", notes]
+    return "\n".join(lines)
@@ -0,0 +1,72 @@
+import math
+import logging
+from collections import namedtuple
+from functools import lru_cache
+from typing import Optional, List, Dict, Tuple
+
+try:
+    import tiktoken
+except ImportError:  # fall back to a character estimate
+    tiktoken = None
+
+CHARS_PER_TOKEN = 4  # rough English average, used without tiktoken
+TOKENIZER_ENCODING = 'o200k_base'  # gpt-4o family
+
+Section = namedtuple('Section', 'name priority text summary')
+# Per-request accounting; sections maps name -> (tokens, 'full' | 'summary' | 'dropped')
+PromptReport = namedtuple('PromptReport', 'system_tokens sections context_tokens budget')
+
+@lru_cache(maxsize=1)
+def _encoding():
+    return tiktoken.get_encoding(TOKENIZER_ENCODING) if tiktoken else None
+
+def count_tokens(text: str) -> int:
+    encoding = _encoding()
+    if encoding is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(encoding.encode(text))
+
+@lru_cache(maxsize=32)
+def _static_tokens(text: str) -> int:
+    return count_tokens(text)
+
+class PromptBuilder:
+    """Assembles a chat prompt from prioritized context sections under a hard token budget.
+
+    The system prompt is static, so it always comes first and forms an identical prefix across requests,
+    which is what OpenAI's automatic prompt caching keys on. Its token count is computed once per process.
+    Sections are admitted in priority order (0 is required and never dropped); one that doesn't fit falls
+    back to its summary, then is dropped. Admitted sections keep the order they were added in.
+    """
+
+    def __init__(self, system: str, budget: int):
+        self.system = system
+        self.budget = budget
+        self.sections: List[Section] = []
+
+    def add(self, name: str, text: Optional[str], priority: int, summary: Optional[str] = None) -> 'PromptBuilder':
+        if text:
+            self.sections.append(Section(name, priority, text, summary))
+        return self
+
+    def build(self) -> Tuple[List[Dict[str, str]], PromptReport]:
+        remaining = self.budget
+        chosen, report = {}, {}
+        for section in sorted(self.sections, key=lambda s: s.priority):
+            tokens = count_tokens(section.text)
+            if tokens <= remaining or section.priority == 0:
+                chosen[section.name], report[section.name] = section.text, (tokens, 'full')
+            elif section.summary and count_tokens(section.summary) <= remaining:
+                tokens = count_tokens(section.summary)
+                chosen[section.name], report[section.name] = section.summary, (tokens, 'summary')
+            else:
+                report[section.name] = (tokens, 'dropped')
+                continue
+            remaining -= tokens
+
+        context = "\n\n".join(chosen[s.name] for s in self.sections if s.name in chosen)
+        messages = [{"role": "system", "content": self.system}, {"role": "user", "content": context}]
+        used = self.budget - remaining
+        if used > self.budget:
+            logging.warning(f"Required prompt sections exceed the {self.budget} token budget: {used}")
+        return messages, PromptReport(_static_tokens(self.system), report, used, self.budget)
@@ -0,0 +1,158 @@
+import time
+from datetime import date
+from typing import Optional, Iterable, List, Dict, Any
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import select, update
+from models import db, User, Workout, Exercise, PersonalRecord, PersonalBest
+from strength import E1RM_MAX_REPS, estimate_1rm
+
+RECORD_UNITS = {
+    'max_weight': 'kg',
+    'max_reps': 'reps',
+    'estimated_1rm': 'kg',
+    'fastest_time': 'seconds',
+    'longest_distance': 'km',
+}
+LOWER_IS_BETTER = {'fastest_time'}
+WEIGHT_STEP = 0.5  # kg; max_reps is tracked per weight rounded to this
+DISTANCE_STEP = 0.1  # km; fastest_time is tracked per distance rounded to this
+FLAG_CHUNK = 1000
+
+def exercise_key(name: str) -> str:
+    return ' '.join(name.lower().split())[:100]
+
+def _positive(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0
+
+def _step(value: float, step: float) -> float:
+    return round(round(value / step) * step, 2)
+
+def candidates(exercise: Dict[str, Any]) -> Dict[tuple, float]:
+    """The exercise's best value for each (record_type, qualifier) it can set"""
+    best = {}
+
+    def offer(record_type, qualifier, value):
+        key = (record_type, qualifier)
+        current = best.get(key)
+        if current is None or (value < current if record_type in LOWER_IS_BETTER else value > current):
+            best[key] = value
+
+    weights = exercise.get('weight_per_set') or []
+    for position, reps in enumerate(exercise.get('reps_per_set') or []):
+        if not _positive(reps):
+            continue
+        weight = weights[position] if position < len(weights) else None
+        if _positive(weight):
+            offer('max_weight', 0.0, weight)
+            offer('max_reps', _step(weight, WEIGHT_STEP), reps)
+            if reps <= E1RM_MAX_REPS:
+                offer('estimated_1rm', 0.0, round(estimate_1rm(weight, reps), 1))
+        else:
+            offer('max_reps', 0.0, reps)  # bodyweight
+
+    distance, seconds = exercise.get('distance_km'), exercise.get('time_seconds')
+    if _positive(distance):
+        offer('longest_distance', 0.0, distance)
+        if _positive(seconds):
+            offer('fastest_time', _step(distance, DISTANCE_STEP), seconds)
+    return best
+
+def _qualifier_note(record_type: str, qualifier: float) -> Optional[str]:
+    if record_type == 'max_reps':
+        return f"at {qualifier:g}kg" if qualifier else "bodyweight"
+    if record_type == 'fastest_time':
+        return f"over {qualifier:g}km"
+    return None
+
+class RecordIndex:
+    """A user's current bests, keyed by (exercise_key, record_type, qualifier).
+
+    The first value seen for a key is stored as a baseline; only later improvements become PersonalRecords.
+    """
+
+    def __init__(self, user_id: int, bests: Iterable[PersonalBest] = ()):
+        self.user_id = user_id
+        self.bests = {(b.exercise_key, b.record_type, b.qualifier): b for b in bests}
+        self.added: List[PersonalBest] = []
+
+    @classmethod
+    def load(cls, user_id: int, names: Iterable[str]) -> 'RecordIndex':
+        keys = {exercise_key(name) for name in names}
+        return cls(user_id, PersonalBest.query.filter(PersonalBest.user_id == user_id,
+                                                      PersonalBest.exercise_key.in_(keys)))
+
+    def observe(self, exercise: Dict[str, Any], day: date, workout_id: Optional[int]) -> List[PersonalRecord]:
+        """Compare one exercise's sets with the bests; returns new records and sets exercise['personal_record']"""
+        key = exercise_key(exercise['exercise_name'])
+        records = []
+        for (record_type, qualifier), value in candidates(exercise).items():
+            best = self.bests.get((key, record_type, qualifier))
+            if best is None:
+                best = PersonalBest(user_id=self.user_id, exercise_key=key, record_type=record_type,
+                                    qualifier=qualifier, value=value, date_achieved=day)
+                self.bests[(key, record_type, qualifier)] = best
+                self.added.append(best)
+                continue
+            if value < best.value if record_type in LOWER_IS_BETTER else value > best.value:
+                record = PersonalRecord(user_id=self.user_id, exercise_name=exercise['exercise_name'],
+                                        record_type=record_type, value=value, unit=RECORD_UNITS[record_type],
+                                        date_achieved=day, workout_id=workout_id,
+                                        notes=_qualifier_note(record_type, qualifier))
+                best.value, best.date_achieved, best.record = value, day, record
+                records.append(record)
+        exercise['personal_record'] = bool(records)
+        return records
+
+def detect_records(user_id: int, workout_id: int, day: date, exercises: List[Dict[str, Any]]) -> List[PersonalRecord]:
+    """Incremental PR check for exercise mappings about to be inserted; adds everything to the current transaction"""
+    index = RecordIndex.load(user_id, [e['exercise_name'] for e in exercises])
+    records = []
+    for exercise in exercises:
+        records += index.observe(exercise, day, workout_id)
+    db.session.add_all(index.added + records)
+    return records
+
+def recompute_user(user_id: int) -> int:
+    """Rebuild a user's PRs and bests from every set they logged, e.g. after an import; returns PR count"""
+    workout_ids = select(Workout.id).where(Workout.user_id == user_id)
+    PersonalBest.query.filter_by(user_id=user_id).delete()
+    PersonalRecord.query.filter_by(user_id=user_id).delete()
+    db.session.execute(update(Exercise).where(Exercise.workout_id.in_(workout_ids), Exercise.personal_record.is_(True))
+                       .values(personal_record=False))
+
+    rows = db.session.execute(
+        select(Exercise.id, Exercise.exercise_name, Exercise.reps_per_set, Exercise.weight_per_set,
+               Exercise.distance_km, Exercise.time_seconds, Workout.id.label('workout_id'), Workout.date_completed)
+        .join(Workout, Exercise.workout_id == Workout.id)
+        .where(Workout.user_id == user_id, Exercise.performed.is_(True))
+        .order_by(Workout.date_completed, Workout.id, Exercise.id)
+    )
+    index = RecordIndex(user_id)
+    records, flagged = [], []
+    for row in rows:
+        exercise = dict(row._mapping)
+        found = index.observe(exercise, row.date_completed, row.workout_id)
+        if found:
+            records += found
+            flagged.append(row.id)
+
+    db.session.add_all(index.added + records)
+    for start in range(0, len(flagged), FLAG_CHUNK):
+        db.session.execute(update(Exercise).where(Exercise.id.in_(flagged[start:start + FLAG_CHUNK]))
+                           .values(personal_record=True))
+    return len(records)
+
+@click.command('recompute-records')
+@click.option('--user-id', type=int, default=None, help='Only this user (default: everyone).')
+@with_appcontext
+def recompute_records_command(user_id):
+    """Rebuild personal records from full exercise history, e.g. after importing data."""
+    started = time.time()
+    user_ids = [user_id] if user_id else list(db.session.scalars(select(User.id).order_by(User.id)))
+    total = 0
+    for uid in user_ids:
+        total += recompute_user(uid)
+        db.session.commit()
+    elapsed = time.time() - started
+    click.echo(f"Recomputed {total} personal records for {len(user_ids)} users in {elapsed:.1f}s")
@@ -0,0 +1,82 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+from flask import current_app, render_template, request, session
+from metrics import record_cache_lookup
+from tracing import span
+
+# Templates whose output depends only on the key below, never on the user
+CACHEABLE_TEMPLATES = {'auth.html', 'profile_setup.html', 'goals_setup.html'}
+
+class RenderCache:
+    """In-memory LRU of rendered template output for static, anonymous-safe pages"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Hashable, str]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(self, key: Hashable, render: Callable[[], str]) -> str:
+        with self.lock:
+            html = self.entries.get(key)
+            if html is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                record_cache_lookup('render', True)
+                return html
+
+        html = render()
+        with self.lock:
+            self.misses += 1
+            record_cache_lookup('render', False)
+            self.entries[key] = html
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return html
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+        logging.debug("Render cache cleared")
+
+# Global render cache instance
+render_cache = RenderCache()
+
+def _enabled() -> bool:
+    app = current_app
+    # Template edits must show up immediately while developing
+    return app.config.get('RENDER_CACHE_ENABLED', not (app.debug or app.config.get('TEMPLATES_AUTO_RELOAD')))
+
+def _flash_state() -> tuple:
+    return tuple(tuple(flash) for flash in session.get('_flashes', ()))
+
+def _locale() -> Optional[str]:
+    return request.accept_languages.best
+
+def render_cached_template(template_name: str, **context) -> str:
+    """Render a template through the page cache when it is safe to do so.
+
+    The key covers the template, the request locale and any pending flash
+    messages. Passing context means the page is personalized, so the cache
+    is bypassed, as it is for templates not listed in CACHEABLE_TEMPLATES.
+    """
+    if context or template_name not in CACHEABLE_TEMPLATES or not _enabled():
+        return render_template(template_name, **context)
+
+    flashes = _flash_state()
+    key = (template_name, _locale(), request.script_root, flashes)
+    with span('cache.render', template=template_name) as lookup:
+        def render():
+            lookup.set_tag('hit', False)
+            return render_template(template_name)
+
+        lookup.set_tag('hit', True)
+        html = render_cache.get_or_render(key, render)
+
+    # A cache hit skips the template's get_flashed_messages() call, so consume them here
+    if flashes:
+        session.pop('_flashes', None)
+    return html
@@ -0,0 +1,106 @@
+import os
+import time
+import logging
+import threading
+from functools import wraps
+from flask import g, has_request_context, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, exc
+from sqlalchemy.sql.dml import UpdateBase
+from db_config import build_engine_options
+
+REPLICA_BIND = 'replica'
+REPLICA_DATABASE_URL = os.environ.get('REPLICA_DATABASE_URL')
+# After a user writes, their reads stay on the primary this long so replica lag can't hide the write
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', '5'))
+# How long a failed replica is skipped before it is tried again
+REPLICA_RETRY_AFTER = int(os.environ.get('REPLICA_RETRY_AFTER', '30'))
+
+class ReplicaHealth:
+    """Per-process circuit breaker for the replica engine"""
+
+    def __init__(self):
+        self.down_until = 0.0
+        self.lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+    def mark_down(self, reason) -> None:
+        with self.lock:
+            if self.available:
+                logging.warning(f"Read replica unavailable, using primary for {REPLICA_RETRY_AFTER}s: {reason}")
+            self.down_until = time.monotonic() + REPLICA_RETRY_AFTER
+
+# Global replica health instance
+replica_health = ReplicaHealth()
+
+class RoutingSession(Session):
+    """Sends reads from @read_replica views to the replica bind; flushes and DML always go to the primary"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and not isinstance(clause, UpdateBase)
+                and has_request_context() and g.get('db_replica') and replica_health.available):
+            return self._db.engines[REPLICA_BIND]
+        return super().get_bind(mapper, clause=clause, bind=bind, **kwargs)
+
+def _note_write(db_session, flush_context):
+    if has_request_context():
+        g.db_wrote = True
+
+event.listen(RoutingSession, 'after_flush', _note_write)
+
+def recently_wrote() -> bool:
+    return time.time() - session.get('db_write_at', 0) < REPLICA_STICKY_SECONDS
+
+def _remember_write(response):
+    # Stored in the session so stickiness follows the user to whichever worker serves them next
+    if g.get('db_wrote'):
+        session['db_write_at'] = time.time()
+    return response
+
+def read_replica(view):
+    """Serve a read-only view from the replica, falling back to the primary if the replica fails"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        from models import db
+
+        g.db_replica = REPLICA_BIND in db.engines and replica_health.available and not recently_wrote()
+        if not g.db_replica:
+            return view(*args, **kwargs)
+
+        response = view(*args, **kwargs)
+        # Views turn exceptions into 500s, so the engine's error hook tells us the replica was at fault
+        if g.pop('replica_failed', False):
+            db.session.rollback()
+            g.db_replica = False
+            return view(*args, **kwargs)
+        return response
+    return wrapper
+
+# Errors that say something about the query rather than the replica's health
+QUERY_ERRORS = (exc.ProgrammingError, exc.DataError, exc.IntegrityError)
+QUERY_CANCELED = '57014'  # Postgres statement_timeout; the primary would time out too
+
+def _on_replica_error(context):
+    error = context.sqlalchemy_exception
+    if getattr(context.original_exception, 'pgcode', None) == QUERY_CANCELED:
+        return
+    if context.is_disconnect or (isinstance(error, exc.DBAPIError) and not isinstance(error, QUERY_ERRORS)):
+        replica_health.mark_down(context.original_exception)
+        if has_request_context():
+            g.replica_failed = True
+
+def replica_binds() -> dict:
+    """SQLALCHEMY_BINDS entry for the replica, sized and tuned like the primary"""
+    if not REPLICA_DATABASE_URL:
+        return {}
+    return {REPLICA_BIND: {'url': REPLICA_DATABASE_URL, **build_engine_options(REPLICA_DATABASE_URL)}}
+
+def init_replica(app, db) -> None:
+    app.after_request(_remember_write)
+    with app.app_context():
+        if REPLICA_BIND in db.engines:
+            event.listen(db.engines[REPLICA_BIND], 'handle_error', _on_replica_error)
+            logging.info("Routing read-only views to the read replica")
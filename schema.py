@@ -0,0 +1,69 @@
+import time
+import logging
+from typing import List
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.schema import CreateColumn
+from models import db
+
+def missing_columns(engine) -> List:
+    """Model columns absent from tables that already exist; create_all only creates whole tables"""
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+    missing = []
+    for table in db.metadata.sorted_tables:
+        if table.name in existing_tables:
+            present = {column['name'] for column in inspector.get_columns(table.name)}
+            missing += [column for column in table.columns if column.name not in present]
+    return missing
+
+def upgrade_schema(engine) -> List[str]:
+    """Add new columns and indexes to existing tables. Idempotent, and additive only; returns what was added"""
+    added = []
+    for column in missing_columns(engine):
+        name = f"{column.table.name}.{column.name}"
+        if column.primary_key or (not column.nullable and column.server_default is None):
+            logging.error(f"Cannot add {name} to an existing table: it needs a server default")
+            continue
+        ddl = CreateColumn(column).compile(dialect=engine.dialect)
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {column.table.name} ADD COLUMN {ddl}"))
+            added.append(name)
+        except SQLAlchemyError as e:
+            # Another worker starting at the same time may have added it first
+            if column.name not in {c['name'] for c in inspect(engine).get_columns(column.table.name)}:
+                raise
+            logging.debug(f"{name} was added concurrently: {e}")
+    inspector = inspect(engine)
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                try:
+                    index.create(engine, checkfirst=True)
+                    added.append(index.name)
+                except SQLAlchemyError as e:
+                    logging.warning(f"Could not create index {index.name}: {e}")
+    if added:
+        logging.info(f"Schema upgraded: added {', '.join(added)}")
+    return added
+
+def init_schema(app, db) -> None:
+    with app.app_context():
+        db.create_all()
+        upgrade_schema(db.engine)
+
+@click.command('upgrade-schema')
+@with_appcontext
+def upgrade_schema_command():
+    """Create missing tables, then add new columns and indexes to existing ones. Safe to re-run."""
+    started = time.time()
+    db.create_all()
+    added = upgrade_schema(db.engine)
+    click.echo(f"Added {len(added)} columns/indexes in {time.time() - started:.1f}s"
+               + (f": {', '.join(added)}" if added else ""))
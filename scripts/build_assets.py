@@ -0,0 +1,109 @@
+"""Build fingerprinted, precompressed static assets into static/dist.
+
+Steps:
+  1. Compile and purge Tailwind CSS with the standalone CLI (TAILWIND_BIN, default `tailwindcss`)
+  2. Vendor the pinned Chart.js build into static/vendor if it is missing
+  3. Minify app.js with esbuild when it is on PATH
+  4. Write content-hashed copies plus .gz/.br variants and a manifest.json
+
+Run with: python scripts/build_assets.py
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import urllib.request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATIC = os.path.join(ROOT, 'static')
+DIST = os.path.join(STATIC, 'dist')
+
+CHART_JS_VERSION = '4.4.1'
+CHART_JS_URL = f'https://cdn.jsdelivr.net/npm/chart.js@{CHART_JS_VERSION}/dist/chart.umd.min.js'
+CHART_JS_PATH = 'vendor/chart.umd.min.js'
+
+# Source paths (relative to static/) that get fingerprinted
+ASSETS = ['css/tailwind.css', 'css/style.css', 'js/app.js', CHART_JS_PATH]
+MINIFY = {'js/app.js'}
+
+def build_tailwind():
+    tailwind = os.environ.get('TAILWIND_BIN', 'tailwindcss')
+    if not shutil.which(tailwind):
+        sys.exit(f"Tailwind CLI '{tailwind}' not found; install the standalone binary or set TAILWIND_BIN")
+    subprocess.run([
+        tailwind,
+        '-c', os.path.join(ROOT, 'tailwind.config.js'),
+        '-i', os.path.join(STATIC, 'css', 'tailwind.input.css'),
+        '-o', os.path.join(STATIC, 'css', 'tailwind.css'),
+        '--minify'
+    ], cwd=ROOT, check=True)
+
+def vendor_chart_js():
+    path = os.path.join(STATIC, CHART_JS_PATH)
+    if os.path.exists(path):
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    print(f"Downloading Chart.js {CHART_JS_VERSION}")
+    with urllib.request.urlopen(CHART_JS_URL, timeout=30) as response, open(path, 'wb') as handle:
+        handle.write(response.read())
+
+def read_source(name):
+    path = os.path.join(STATIC, name)
+    esbuild = shutil.which('esbuild')
+    if name in MINIFY and esbuild:
+        return subprocess.run([esbuild, path, '--minify'], check=True, capture_output=True).stdout
+    if name in MINIFY:
+        print(f"esbuild not found, {name} is shipped unminified")
+    with open(path, 'rb') as handle:
+        return handle.read()
+
+def write_asset(name, content):
+    """Write name.<hash>.ext and its precompressed variants, returning the dist-relative path"""
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    base, extension = os.path.splitext(name)
+    hashed = f"{base}.{digest}{extension}"
+    path = os.path.join(DIST, hashed)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    with open(path, 'wb') as handle:
+        handle.write(content)
+    with open(path + '.gz', 'wb') as handle:
+        handle.write(gzip.compress(content, compresslevel=9, mtime=0))
+    if brotli:
+        with open(path + '.br', 'wb') as handle:
+            handle.write(brotli.compress(content, quality=11))
+    return hashed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--skip-tailwind', action='store_true', help='Reuse an existing static/css/tailwind.css')
+    args = parser.parse_args()
+
+    if not args.skip_tailwind:
+        build_tailwind()
+    vendor_chart_js()
+    if not brotli:
+        print("brotli not installed, skipping .br variants")
+
+    shutil.rmtree(DIST, ignore_errors=True)
+    manifest = {}
+    for name in ASSETS:
+        content = read_source(name)
+        manifest[name] = f"dist/{write_asset(name, content)}"
+        print(f"  {name} -> {manifest[name]} ({len(content)} bytes)")
+
+    with open(os.path.join(DIST, 'manifest.json'), 'w') as handle:
+        json.dump(manifest, handle, indent=2, sort_keys=True)
+    print(f"Wrote {len(manifest)} assets to {DIST}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+import os
+import logging
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import select
+from models import db, Workout, Exercise, CheckIn, BodyMeasurement, PersonalRecord
+
+# orjson is optional - install it to enable the fast encoder backend
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_BACKEND = os.environ.get("JSON_BACKEND", "orjson" if orjson else "stdlib")
+
+def _default(o: Any) -> Any:
+    """Encode dates as ISO strings, matching the models' to_dict() output"""
+    if isinstance(o, (date, datetime)):
+        return o.isoformat()
+    return DefaultJSONProvider.default(o)
+
+def use_orjson() -> bool:
+    """Whether the orjson backend is installed and selected"""
+    return orjson is not None and JSON_BACKEND == "orjson"
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that encodes with orjson when available"""
+
+    default = staticmethod(_default)
+
+    def _orjson_options(self, pretty: bool = False) -> int:
+        options = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if pretty:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if not use_orjson() or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self._orjson_options()).decode()
+
+    def response(self, *args: Any, **kwargs: Any):
+        if not use_orjson():
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        pretty = self.compact is False or (self.compact is None and self._app.debug)
+        body = orjson.dumps(obj, default=self.default, option=self._orjson_options(pretty))
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+def encode_series(points: Sequence[Tuple[date, Any]], columnar: bool = False):
+    """Encode date-ordered (date, value) points as objects or delta-encoded parallel arrays"""
+    if not columnar:
+        return [{'date': point_date.isoformat(), 'value': value} for point_date, value in points]
+
+    if not points:
+        return {'start': None, 'dates': [], 'values': []}
+
+    # dates[] holds day offsets from the previous point, starting at 0
+    start = previous = points[0][0]
+    offsets = []
+    values = []
+    for point_date, value in points:
+        offsets.append((point_date - previous).days)
+        values.append(value)
+        previous = point_date
+
+    return {'start': start.isoformat(), 'dates': offsets, 'values': values}
+
+class ModelSerializer:
+    """Precompiled serializer that builds to_dict() payloads straight from SQL rows"""
+
+    def __init__(self, model, fields: Sequence[str], empty_defaults: Optional[Dict[str, Any]] = None):
+        self.model = model
+        self.fields = tuple(fields)
+        self.columns = tuple(getattr(model, field) for field in self.fields)
+        self.empty_defaults = empty_defaults or {}
+        self._convert = self._compile()
+
+    def _compile(self):
+        """Build the row converter once so per-row work is a single dict build"""
+        fields = self.fields
+
+        if not self.empty_defaults:
+            return lambda row: dict(zip(fields, row))
+
+        # JSON columns fall back to an empty container, like `self.exercises or []`
+        fallbacks = tuple(
+            (index, type(self.empty_defaults[field]))
+            for index, field in enumerate(fields) if field in self.empty_defaults
+        )
+
+        def convert(row):
+            values = list(row)
+            for index, factory in fallbacks:
+                if not values[index]:
+                    values[index] = factory()
+            return dict(zip(fields, values))
+
+        return convert
+
+    def select(self):
+        """Select only the serialized columns, skipping ORM hydration"""
+        return select(*self.columns)
+
+    def rows(self, *criteria, order_by=None, limit: Optional[int] = None) -> List[Tuple]:
+        """Fetch column tuples matching the given criteria"""
+        stmt = self.select().where(*criteria)
+        if order_by is not None:
+            stmt = stmt.order_by(order_by)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        return db.session.execute(stmt).all()
+
+    def to_dict(self, row: Tuple) -> Dict[str, Any]:
+        return self._convert(row)
+
+    def serialize(self, rows: Iterable[Tuple]) -> List[Dict[str, Any]]:
+        convert = self._convert
+        return [convert(row) for row in rows]
+
+    def serialize_tuples(self, rows: Iterable[Tuple]) -> Dict[str, Any]:
+        """Column names once plus one list per row, for compact payloads"""
+        return {'columns': list(self.fields), 'rows': [list(row) for row in rows]}
+
+    def query(self, *criteria, order_by=None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        return self.serialize(self.rows(*criteria, order_by=order_by, limit=limit))
+
+workout_serializer = ModelSerializer(Workout, [
+    'id', 'workout_name', 'workout_type', 'date_completed', 'duration_minutes', 'exercises',
+    'notes', 'difficulty_rating', 'energy_level_before', 'energy_level_after', 'calories_burned'
+], empty_defaults={'exercises': []})
+
+# Exercises carry their workout id so exported rows can be joined back up
+exercise_serializer = ModelSerializer(Exercise, [
+    'id', 'workout_id', 'exercise_name', 'exercise_type', 'muscle_groups', 'sets_completed', 'reps_per_set',
+    'weight_per_set', 'distance_km', 'time_seconds', 'rest_between_sets', 'personal_record', 'performed', 'notes'
+], empty_defaults={'muscle_groups': [], 'reps_per_set': [], 'weight_per_set': []})
+
+checkin_serializer = ModelSerializer(CheckIn, [
+    'id', 'date', 'energy_level', 'motivation_level', 'sleep_quality', 'stress_level',
+    'muscle_soreness', 'mood', 'notes', 'planned_workout', 'workout_completed'
+])
+
+measurement_serializer = ModelSerializer(BodyMeasurement, [
+    'id', 'date', 'weight_kg', 'body_fat_percentage', 'muscle_mass_kg', 'measurements',
+    'progress_photos', 'notes'
+], empty_defaults={'measurements': {}, 'progress_photos': []})
+
+personal_record_serializer = ModelSerializer(PersonalRecord, [
+    'id', 'exercise_name', 'record_type', 'value', 'unit', 'date_achieved', 'notes'
+])
+
+logging.debug(f"JSON encoder backend: {'orjson' if use_orjson() else 'stdlib'}")
@@ -0,0 +1,266 @@
+import os
+import time
+import hashlib
+import logging
+import secrets
+import threading
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timedelta
+from typing import Optional, Tuple, Dict, Any
+import click
+from flask.cli import with_appcontext
+from flask.sessions import SecureCookieSession, SecureCookieSessionInterface, SessionInterface
+from flask.json.tag import TaggedJSONSerializer
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from models import db, StoredSession
+from metrics import record_cache_lookup
+
+# server: the cookie holds an opaque id and the data lives in the LRU + database store; cookie: Flask's signed cookie
+SESSION_STORE = os.environ.get('SESSION_STORE', 'server')
+SESSION_CACHE_SIZE = int(os.environ.get('SESSION_CACHE_SIZE', '10000'))  # decoded sessions kept per worker
+# Sliding expiry is written back to the database at most this often per session (seconds)
+SESSION_TOUCH_INTERVAL = int(os.environ.get('SESSION_TOUCH_INTERVAL', '300'))
+# Anonymous sessions may be served from the LRU without a database check for this long (seconds)
+SESSION_CACHE_MAX_AGE = float(os.environ.get('SESSION_CACHE_MAX_AGE', '5'))
+# Logged-in sessions likewise, on safe (GET/HEAD/OPTIONS) requests only; this bounds how long a logout
+# elsewhere can take to reach this worker's reads. 0 checks every request
+SESSION_VERIFY_INTERVAL = float(os.environ.get('SESSION_VERIFY_INTERVAL', '2'))
+SAFE_METHODS = {'GET', 'HEAD', 'OPTIONS'}
+SID_BYTES = 32
+SID_LENGTH = 43  # URL-safe base64 of SID_BYTES
+
+CachedSession = namedtuple('CachedSession', 'version expires_at data raw checked_at')
+serializer = TaggedJSONSerializer()
+
+def sid_digest(sid: str) -> str:
+    return hashlib.sha256(sid.encode()).hexdigest()
+
+def parse_cookie(value: Optional[str]) -> Tuple[Optional[str], int]:
+    """(session id, version) from a '<sid>.<version>' cookie; (None, 0) for anything else"""
+    sid, _, version = (value or '').rpartition('.')
+    if len(sid) != SID_LENGTH or not version.isdigit():
+        return None, 0
+    return sid, int(version)
+
+class ServerSession(SecureCookieSession):
+    """Session dict tracked like Flask's cookie session, plus where it lives in the store"""
+
+    def __init__(self, initial=None, sid: Optional[str] = None, version: int = 0,
+                 expires_at: Optional[datetime] = None, raw: Optional[str] = None):
+        super().__init__(initial)
+        self.sid = sid
+        self.version = version
+        self.expires_at = expires_at
+        self.raw = raw  # what was loaded, for merging with a concurrent write
+        self.user_at_open = self.get('_user_id')
+
+class SessionCache:
+    """Per-worker LRU of decoded sessions, keyed by session id"""
+
+    def __init__(self, max_entries: int = SESSION_CACHE_SIZE):
+        self.entries: 'OrderedDict[str, CachedSession]' = OrderedDict()
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+
+    def get(self, sid: str) -> Optional[CachedSession]:
+        with self.lock:
+            entry = self.entries.get(sid)
+            if entry is not None:
+                self.entries.move_to_end(sid)
+            return entry
+
+    def put(self, sid: str, entry: CachedSession) -> None:
+        with self.lock:
+            self.entries[sid] = entry
+            self.entries.move_to_end(sid)
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def discard(self, sid: str) -> None:
+        with self.lock:
+            self.entries.pop(sid, None)
+
+class ServerSessionInterface(SessionInterface):
+    """Server-side sessions: an opaque '<sid>.<version>' cookie, an LRU per worker, and the sessions table.
+
+    The LRU saves decoding and most existence checks: a cached logged-in session is confirmed against the stored
+    version (two columns, no data) on every unsafe request, and on reads once it is SESSION_VERIFY_INTERVAL old.
+    A logout or id rotation on any worker therefore blocks writes at once and reads within that interval.
+    Anonymous sessions are re-checked after SESSION_CACHE_MAX_AGE. The cookie's version can only send a request to
+    the database, never vouch for a cached copy. Writes are optimistic: if another worker saved first, this
+    request's changes are merged onto the stored data key by key. Expiry slides with use, matching
+    PERMANENT_SESSION_LIFETIME. The id rotates on login and logout, and signed-cookie sessions from before the
+    switch are migrated on their first request.
+    """
+
+    serializer = serializer
+
+    def __init__(self, cache: Optional[SessionCache] = None):
+        self.cache = cache or SessionCache()
+        self.legacy = SecureCookieSessionInterface()
+        self.table = StoredSession.__table__
+
+    def open_session(self, app, request) -> ServerSession:
+        value = request.cookies.get(self.get_cookie_name(app))
+        sid, version = parse_cookie(value)
+        if sid:
+            session = self.load(sid, version, verify=request.method not in SAFE_METHODS)
+            if session is not None:
+                return session
+        elif value and app.secret_key:
+            legacy = self.legacy.open_session(app, request)
+            if legacy:
+                session = ServerSession(dict(legacy))
+                session.modified = True  # stored under a fresh id on the way out
+                return session
+        return ServerSession()
+
+    def load(self, sid: str, version: int, verify: bool = False) -> Optional[ServerSession]:
+        now = datetime.utcnow()
+        digest = sid_digest(sid)
+        cached = self.cache.get(sid)
+        hit = cached is not None and cached.version >= version and cached.expires_at > now
+        if hit:
+            max_age = SESSION_VERIFY_INTERVAL if '_user_id' in cached.data else SESSION_CACHE_MAX_AGE
+            verify = verify or time.monotonic() - cached.checked_at >= max_age
+            if not verify:
+                record_cache_lookup('session', True)
+                return ServerSession(dict(cached.data), sid, cached.version, cached.expires_at, cached.raw)
+        try:
+            with db.engine.connect() as conn:
+                if hit:
+                    stored = conn.execute(select(self.table.c.version, self.table.c.expires_at)
+                                          .where(self.table.c.id == digest, self.table.c.expires_at > now)).first()
+                    hit = stored is not None and stored.version == cached.version
+                    if hit:
+                        cached = cached._replace(expires_at=stored.expires_at, checked_at=time.monotonic())
+                        self.cache.put(sid, cached)
+                record_cache_lookup('session', hit)
+                if hit:
+                    return ServerSession(dict(cached.data), sid, cached.version, cached.expires_at, cached.raw)
+                row = conn.execute(select(self.table.c.data, self.table.c.version, self.table.c.expires_at)
+                                   .where(self.table.c.id == digest, self.table.c.expires_at > now)).first()
+        except SQLAlchemyError as e:
+            logging.error(f"Error loading session: {e}")
+            return None
+        if row is None:
+            self.cache.discard(sid)
+            return None
+        data = self.serializer.loads(row.data)
+        self.cache.put(sid, CachedSession(row.version, row.expires_at, data, row.data, time.monotonic()))
+        return ServerSession(dict(data), sid, row.version, row.expires_at, row.data)
+
+    def save_session(self, app, session: ServerSession, response) -> None:
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        secure = self.get_cookie_secure(app)
+        partitioned = self.get_cookie_partitioned(app)
+        samesite = self.get_cookie_samesite(app)
+        httponly = self.get_cookie_httponly(app)
+
+        if session.accessed:
+            response.vary.add("Cookie")
+
+        try:
+            if not session:
+                if session.modified:
+                    if session.sid:
+                        self.delete(session.sid)
+                    response.delete_cookie(name, domain=domain, path=path, secure=secure, partitioned=partitioned,
+                                           samesite=samesite, httponly=httponly)
+                    response.vary.add("Cookie")
+                return
+
+            expires_at = datetime.utcnow() + app.permanent_session_lifetime
+            if session.modified or session.sid is None:
+                # New id on login and logout, so an id seen before authentication is useless after it
+                if session.sid and session.get('_user_id') != session.user_at_open:
+                    self.delete(session.sid)
+                    session.sid = None
+                self.store(session, expires_at)
+            elif expires_at - session.expires_at > timedelta(seconds=SESSION_TOUCH_INTERVAL):
+                self.touch(session, expires_at)
+        except SQLAlchemyError as e:
+            logging.error(f"Error saving session: {e}")
+            return
+
+        if session.sid and self.should_set_cookie(app, session):
+            response.set_cookie(name, f"{session.sid}.{session.version}", expires=self.get_expiration_time(app, session),
+                                httponly=httponly, domain=domain, path=path, secure=secure, partitioned=partitioned,
+                                samesite=samesite)
+            response.vary.add("Cookie")
+
+    def store(self, session: ServerSession, expires_at: datetime) -> None:
+        data = dict(session)
+        raw = self.serializer.dumps(data)
+        with db.engine.begin() as conn:
+            if session.sid is None:
+                session.sid, session.version = secrets.token_urlsafe(SID_BYTES), 1
+                conn.execute(insert(self.table).values(id=sid_digest(session.sid), data=raw, version=1,
+                                                       expires_at=expires_at))
+            else:
+                digest = sid_digest(session.sid)
+                saved = conn.execute(update(self.table)
+                                     .where(self.table.c.id == digest, self.table.c.version == session.version)
+                                     .values(data=raw, version=session.version + 1, expires_at=expires_at))
+                if saved.rowcount:
+                    session.version += 1
+                else:
+                    data, raw = self._merge(conn, session, digest, data, expires_at)
+        session.expires_at = expires_at
+        self.cache.put(session.sid, CachedSession(session.version, expires_at, data, raw, time.monotonic()))
+
+    def _merge(self, conn, session: ServerSession, digest: str, data: Dict[str, Any],
+               expires_at: datetime) -> Tuple[Dict[str, Any], str]:
+        """Another worker saved since this request loaded the session: apply only this request's changes"""
+        row = conn.execute(select(self.table.c.data, self.table.c.version)
+                           .where(self.table.c.id == digest).with_for_update()).first()
+        if row is None:
+            # Deleted or expired meanwhile; keep this request's copy under the same id
+            raw = self.serializer.dumps(data)
+            conn.execute(insert(self.table).values(id=digest, data=raw, version=1, expires_at=expires_at))
+            session.version = 1
+            return data, raw
+
+        original = self.serializer.loads(session.raw) if session.raw else {}
+        merged = self.serializer.loads(row.data)
+        for key in original.keys() - data.keys():
+            merged.pop(key, None)
+        merged.update((key, value) for key, value in data.items() if original.get(key, object()) != value)
+        raw = self.serializer.dumps(merged)
+        conn.execute(update(self.table).where(self.table.c.id == digest)
+                     .values(data=raw, version=row.version + 1, expires_at=expires_at))
+        session.version = row.version + 1
+        return merged, raw
+
+    def touch(self, session: ServerSession, expires_at: datetime) -> None:
+        """Slide the expiry without a new version, so cached copies elsewhere stay valid"""
+        with db.engine.begin() as conn:
+            conn.execute(update(self.table).where(self.table.c.id == sid_digest(session.sid))
+                         .values(expires_at=expires_at))
+        session.expires_at = expires_at
+        cached = self.cache.get(session.sid)
+        if cached is not None and cached.version == session.version:
+            self.cache.put(session.sid, cached._replace(expires_at=expires_at))
+
+    def delete(self, sid: str) -> None:
+        self.cache.discard(sid)
+        with db.engine.begin() as conn:
+            conn.execute(delete(self.table).where(self.table.c.id == sid_digest(sid)))
+
+def init_sessions(app, db) -> None:
+    if SESSION_STORE == 'server':
+        app.session_interface = ServerSessionInterface()
+        logging.info(f"Using server-side sessions (LRU of {SESSION_CACHE_SIZE} per worker)")
+
+@click.command('purge-sessions')
+@with_appcontext
+def purge_sessions_command():
+    """Delete expired server-side sessions. Run daily."""
+    started = time.time()
+    with db.engine.begin() as conn:
+        purged = conn.execute(delete(StoredSession.__table__)
+                              .where(StoredSession.__table__.c.expires_at <= datetime.utcnow())).rowcount
+    click.echo(f"Purged {purged} expired sessions in {time.time() - started:.1f}s")
@@ -31,9 +31,17 @@ document.addEventListener('DOMContentLoaded', function() {
     
     // Log Workout functionality will use startWorkoutFlow() function defined below
     
-    // Load saved goals if they exist
+    // Server-rendered state seeds the dashboard cache, so no request is needed on load
+    const initialState = readInitialState();
+    if (initialState) {
+        dashboardRequest = Promise.resolve(initialState);
+    }
+    
+    // Load saved goals, preferring the ones stored on the server
     const savedGoals = localStorage.getItem('userGoals');
-    if (savedGoals) {
+    if (initialState && initialState.goals && initialState.goals.workout_goal) {
+        updateGoalsDisplay(initialState.goals);
+    } else if (savedGoals) {
         try {
             const goalsData = JSON.parse(savedGoals);
             updateGoalsDisplay(goalsData);
@@ -42,16 +50,6 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
     
-    // Try to load progress data, but don't fail if it's not available
-    try {
-        loadProgressData();
-    } catch (error) {
-        console.log('Progress data not available:', error);
-    }
-    
-    // Initialize Strava integration
-    initializeStrava();
-    
     // Check if profile setup is visible (indicates new user)
     const profileSetup = document.getElementById('profile-setup');
     if (profileSetup && profileSetup.style.display !== 'none') {
@@ -62,27 +60,9 @@ document.addEventListener('DOMContentLoaded', function() {
         showMainApp();
         showTab('today');
         
-        // Try to load user data, but don't block if it fails
-        fetch('/get-user-data', {
-            credentials: 'same-origin'
-        })
-        .then(response => {
-            if (response.ok) {
-                return response.json();
-            }
-            throw new Error('Failed to load user data');
-        })
-        .then(data => {
-            console.log('User data loaded:', data);
-            // Update UI with loaded data if available
-            if (data.profile) {
-                updateProfileDisplay(data.profile);
-            }
-        })
-        .catch(error => {
-            console.log('User data not available, using defaults:', error);
-            // Continue with default UI - don't hide the app
-        });
+        // Apply profile, stats, progress and Strava data (a single request
+        // only when the page was rendered without initial state)
+        loadDashboard();
     }
 });
 
@@ -228,6 +208,9 @@ async function handleProfileSubmission(event) {
         const data = await response.json();
         
         if (response.ok) {
+            // Profile changed, drop the cached dashboard payload
+            dashboardRequest = null;
+            
             // Check if we're editing or creating
             const title = document.querySelector('#profile-setup h1');
             const isProgrammeUpdate = document.querySelector('#profile-setup[data-programme-update]');
@@ -410,14 +393,8 @@ function showEditProfile() {
 
 async function populateProfileForm() {
     try {
-        // Get complete user data from backend
-        const response = await fetch('/get-user-data');
-        if (!response.ok) {
-            console.error('Failed to load user data for profile editing');
-            return;
-        }
-        
-        const userData = await response.json();
+        // Get complete user data from the dashboard payload
+        const userData = await getDashboardData();
         const profile = userData.profile || {};
         
         // Populate basic fields
@@ -621,7 +598,9 @@ async function handleCheckinSubmission(event) {
         
         if (response.ok) {
             displayWorkout(data.reply);
+            if (data.workout) updateWorkoutPreview(data.workout);
             updateStats(data.stats);
+            dashboardRequest = null;
             statusInput.value = '';
             showSuccess('Your personalized workout is ready!');
         } else {
@@ -636,7 +615,7 @@ async function handleCheckinSubmission(event) {
     }
 }
 
-function displayWorkout(workoutText) {
+function displayWorkout(workoutText, scroll = true) {
     if (workoutContent) {
         // Format the workout text for better display
         let formattedWorkout = workoutText
@@ -656,7 +635,19 @@ function displayWorkout(workoutText) {
     
     if (workoutCard) {
         workoutCard.style.display = 'block';
-        workoutCard.scrollIntoView({ behavior: 'smooth', block: 'start' });
+        if (scroll) {
+            workoutCard.scrollIntoView({ behavior: 'smooth', block: 'start' });
+        }
+    }
+}
+
+function updateWorkoutPreview(workout) {
+    const workoutTitle = document.getElementById('workout-title');
+    const workoutSummary = document.getElementById('workout-summary');
+    
+    if (workoutTitle) workoutTitle.textContent = workout.focus;
+    if (workoutSummary) {
+        workoutSummary.textContent = workout.exercises.map(exercise => exercise.name).join(', ');
     }
 }
 
@@ -723,8 +714,7 @@ function showSuccess(message) {
 // Utility Functions
 function formatWorkoutHistory() {
     // This could be used to format and display workout history
-    fetch('/get-user-data')
-        .then(response => response.json())
+    getDashboardData()
         .then(data => {
             const historyContainer = document.getElementById('workout-history');
             if (historyContainer && data.history) {
@@ -782,40 +772,88 @@ function showProgressTab(tabName) {
     loadProgressTabData(tabName);
 }
 
-function loadProgressData() {
-    // Load overview stats with fallback
-    fetch('/api/progress/overview', {
-        credentials: 'same-origin'
-    })
+// Dashboard data shared by all tabs, embedded in the page or fetched once
+let dashboardRequest = null;
+
+function readInitialState() {
+    const element = document.getElementById('initial-state');
+    if (!element) return null;
+    try {
+        return JSON.parse(element.textContent);
+    } catch (e) {
+        console.error('Error reading initial state:', e);
+        return null;
+    }
+}
+
+function getDashboardData(refresh = false) {
+    if (!dashboardRequest || refresh) {
+        dashboardRequest = fetch('/api/dashboard', {
+            credentials: 'same-origin'
+        })
         .then(response => {
             if (response.ok) {
                 return response.json();
             }
-            throw new Error('Progress data not available');
+            throw new Error('Dashboard data not available');
         })
+        .catch(error => {
+            dashboardRequest = null;
+            throw error;
+        });
+    }
+    return dashboardRequest;
+}
+
+function loadDashboard(refresh = false) {
+    return getDashboardData(refresh)
         .then(data => {
-            if (data.stats) {
-                document.getElementById('total-workouts').textContent = data.stats.total_workouts || 0;
-                document.getElementById('current-streak').textContent = data.stats.current_streak || 0;
-                document.getElementById('personal-records').textContent = data.stats.personal_records || 0;
-                document.getElementById('consistency').textContent = Math.round(data.workout_consistency || 0) + '%';
+            console.log('Dashboard data loaded:', data);
+            if (data.profile) {
+                updateProfileDisplay(data.profile);
+            }
+            updateProgressStats(data.overview);
+            if (data.latest_workout && data.latest_workout.notes &&
+                    data.latest_workout.date_completed === new Date().toLocaleDateString('en-CA')) {
+                // Today's workout was already generated
+                displayWorkout(data.latest_workout.notes, false);
+            }
+            if (data.recovery && data.recovery.connected && data.recovery.metrics) {
+                displayStravaMetrics(data.recovery.metrics);
+                updateStravaStatus(true);
+            } else if (data.recovery && data.recovery.connected) {
+                // Embedded state leaves Strava metrics to a lazy fetch
+                checkStravaConnection();
+            } else {
+                updateStravaStatus(false);
             }
+            return data;
         })
         .catch(error => {
-            console.log('Progress data not available, using defaults:', error);
-            // Set default values
-            const totalWorkouts = document.getElementById('total-workouts');
-            const currentStreak = document.getElementById('current-streak');
-            const personalRecords = document.getElementById('personal-records');
-            const consistency = document.getElementById('consistency');
-            
-            if (totalWorkouts) totalWorkouts.textContent = '0';
-            if (currentStreak) currentStreak.textContent = '0';
-            if (personalRecords) personalRecords.textContent = '0';
-            if (consistency) consistency.textContent = '0%';
+            console.log('Dashboard data not available, using defaults:', error);
+            updateProgressStats(null);
+            updateStravaStatus(false);
         });
 }
 
+function updateProgressStats(overview) {
+    const totalWorkouts = document.getElementById('total-workouts');
+    const currentStreak = document.getElementById('current-streak');
+    const personalRecords = document.getElementById('personal-records');
+    const consistency = document.getElementById('consistency');
+    const stats = (overview && overview.stats) || {};
+    
+    if (totalWorkouts) totalWorkouts.textContent = stats.total_workouts || 0;
+    if (currentStreak) currentStreak.textContent = stats.current_streak || 0;
+    if (personalRecords) personalRecords.textContent = stats.personal_records || 0;
+    if (consistency) consistency.textContent = Math.round((overview && overview.workout_consistency) || 0) + '%';
+}
+
+function loadProgressData() {
+    // Refresh the stats cards from a fresh dashboard payload
+    return loadDashboard(true);
+}
+
 function updateProfileDisplay(profile) {
     // Update profile display elements if they exist
     const profileName = document.getElementById('profile-name');
@@ -897,9 +935,9 @@ function loadWellnessData() {
 }
 
 function loadOverviewData() {
-    fetch('/api/progress/overview')
-        .then(response => response.json())
-        .then(data => {
+    getDashboardData()
+        .then(dashboard => {
+            const data = dashboard.overview || {};
             if (data.weekly_workout_data) {
                 createWeeklyChart(data.weekly_workout_data);
             }
@@ -970,11 +1008,6 @@ function populateRecentWorkouts(workouts) {
     });
 }
 
-// Add progress data loading to main initialization
-document.addEventListener('DOMContentLoaded', function() {
-    loadProgressData();
-});
-
 // Handle offline/online status
 window.addEventListener('online', function() {
     showSuccess('Connection restored');
@@ -1,17 +1,22 @@
 import os
+import time
 import requests
 import logging
 from datetime import datetime, timedelta
 from flask import session, url_for, request, redirect
 import json
+from metrics import record_strava_call, strava_endpoint_label
+from tracing import span, inject_headers
 
 class StravaAPI:
     def __init__(self):
         self.client_id = os.environ.get('STRAVA_CLIENT_ID')
         self.client_secret = os.environ.get('STRAVA_CLIENT_SECRET')
-        self.base_url = 'https://www.strava.com/api/v3'
-        self.auth_url = 'https://www.strava.com/oauth/authorize'
-        self.token_url = 'https://www.strava.com/oauth/token'
+        # Overridable so load tests can point at a local stub server
+        strava_host = os.environ.get('STRAVA_BASE_URL', 'https://www.strava.com')
+        self.base_url = f'{strava_host}/api/v3'
+        self.auth_url = f'{strava_host}/oauth/authorize'
+        self.token_url = f'{strava_host}/oauth/token'
         
     def get_authorization_url(self, redirect_uri):
         """Generate Strava OAuth authorization URL"""
@@ -36,7 +41,8 @@ class StravaAPI:
         }
         
         try:
-            response = requests.post(self.token_url, data=data)
+            with span('strava POST oauth/token', kind='CLIENT', **{'peer.service': 'strava'}):
+                response = requests.post(self.token_url, data=data, headers=inject_headers({}))
             response.raise_for_status()
             token_data = response.json()
             
@@ -66,7 +72,8 @@ class StravaAPI:
         }
         
         try:
-            response = requests.post(self.token_url, data=data)
+            with span('strava POST oauth/token', kind='CLIENT', **{'peer.service': 'strava'}):
+                response = requests.post(self.token_url, data=data, headers=inject_headers({}))
             response.raise_for_status()
             token_data = response.json()
             
@@ -102,17 +109,23 @@ class StravaAPI:
         if not access_token:
             return None
             
-        headers = {'Authorization': f'Bearer {access_token}'}
+        headers = inject_headers({'Authorization': f'Bearer {access_token}'})
         url = f"{self.base_url}/{endpoint}"
         
+        started = time.perf_counter()
+        response = None
         try:
-            response = requests.get(url, headers=headers)
+            with span(f"strava GET {strava_endpoint_label(endpoint)}", kind='CLIENT', **{'peer.service': 'strava'}) as call:
+                response = requests.get(url, headers=headers)
+                call.set_tag('http.status_code', response.status_code)
             response.raise_for_status()
             return response.json()
             
         except requests.exceptions.RequestException as e:
             logging.error(f"Error making Strava API request to {endpoint}: {e}")
             return None
+        finally:
+            record_strava_call(endpoint, time.perf_counter() - started, response)
     
     def get_athlete_stats(self):
         """Get athlete statistics"""
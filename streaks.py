@@ -0,0 +1,69 @@
+import os
+from datetime import date
+from typing import Optional, List, Dict
+from sqlalchemy import Date, Integer, case, cast, func, literal, select, true
+from models import db, Workout
+
+# Rest days allowed between workouts before a daily streak breaks
+STREAK_REST_DAYS = int(os.environ.get('STREAK_REST_DAYS', '0'))
+EPOCH = date(1970, 1, 5)  # a Monday, so day numbers // 7 are ISO weeks
+
+def _day_number(column, dialect: str):
+    if dialect == 'sqlite':
+        return cast(func.julianday(column) - func.julianday(EPOCH.isoformat()), Integer)
+    return cast(column - literal(EPOCH, Date), Integer)  # Postgres: date - date is a day count
+
+def _streaks_sql(user_id: int, unit, current_unit: int, max_gap: int):
+    """(longest, current) over the islands of distinct `unit` values, as a one-row subquery (gaps-and-islands)"""
+    units = select(unit.label('n')).where(Workout.user_id == user_id).distinct().subquery()
+    gap = units.c.n - func.lag(units.c.n).over(order_by=units.c.n)
+    flagged = select(units.c.n, case((gap <= max_gap, 0), else_=1).label('starts')).subquery()
+    numbered = select(flagged.c.n, func.sum(flagged.c.starts).over(order_by=flagged.c.n).label('island')).subquery()
+    islands = (select(func.max(numbered.c.n).label('last'), func.count().label('length'))
+               .group_by(numbered.c.island).subquery())
+    return select(
+        func.coalesce(func.max(islands.c.length), 0).label('longest'),
+        func.coalesce(func.max(case((islands.c.last >= current_unit - max_gap, islands.c.length))), 0).label('current'),
+    ).subquery()
+
+def _streaks_python(numbers: List[int], current_unit: int, max_gap: int):
+    longest = current = length = 0
+    previous = None
+    for n in numbers:
+        length = length + 1 if previous is not None and n - previous <= max_gap else 1
+        longest = max(longest, length)
+        previous = n
+    if previous is not None and previous >= current_unit - max_gap:
+        current = length
+    return longest, current
+
+def compute_streaks(user_id: int, rest_days: int = STREAK_REST_DAYS, today: Optional[date] = None,
+                    in_sql: Optional[bool] = None) -> Dict[str, int]:
+    """Current and longest daily and weekly streaks over distinct workout dates.
+
+    A daily streak survives up to rest_days days off between workouts; a weekly streak needs a workout every
+    calendar week. Current streaks stay alive until the allowed gap after the last workout has passed. Runs as
+    one window-function query on Postgres; other databases (SQLite in development) use the Python fallback.
+    """
+    today = today or date.today()
+    dialect = db.session.get_bind().dialect.name
+    in_sql = dialect == 'postgresql' if in_sql is None else in_sql
+    today_number = (today - EPOCH).days
+
+    if in_sql:
+        day = _day_number(Workout.date_completed, dialect)
+        daily = _streaks_sql(user_id, day, today_number, rest_days + 1)
+        weekly = _streaks_sql(user_id, day // 7, today_number // 7, 1)
+        longest, current, longest_weekly, current_weekly = db.session.execute(
+            select(daily.c.longest, daily.c.current, weekly.c.longest, weekly.c.current)
+            .select_from(daily.join(weekly, true()))
+        ).one()
+    else:
+        dates = db.session.scalars(select(Workout.date_completed).where(Workout.user_id == user_id)
+                                   .distinct().order_by(Workout.date_completed)).all()
+        days = [(d - EPOCH).days for d in dates]
+        longest, current = _streaks_python(days, today_number, rest_days + 1)
+        longest_weekly, current_weekly = _streaks_python(sorted({n // 7 for n in days}), today_number // 7, 1)
+
+    return {'current_streak': current, 'longest_streak': longest,
+            'current_weekly_streak': current_weekly, 'longest_weekly_streak': longest_weekly}
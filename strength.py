@@ -0,0 +1,182 @@
+import os
+import time
+from collections import defaultdict, deque
+from datetime import date, timedelta
+from typing import Optional, Iterable, Tuple, List, Dict, Any
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import select
+from models import db, User, UserProfile, Workout, Exercise, StrengthEstimate, DraftWorkout
+from programmes import LIFT_1RM_FIELDS, round_load
+
+STANDARD_FORMULAS = {
+    'epley': lambda weight, reps: weight * (1 + reps / 30),
+    'brzycki': lambda weight, reps: weight * 36 / (37 - reps),
+    'lombardi': lambda weight, reps: weight * reps ** 0.10,
+}
+FORMULAS = {**STANDARD_FORMULAS,
+            'mean': lambda weight, reps: sum(f(weight, reps) for f in STANDARD_FORMULAS.values()) / len(STANDARD_FORMULAS)}
+E1RM_FORMULA = os.environ.get('E1RM_FORMULA', 'epley')
+E1RM_MAX_REPS = 10  # rep-max formulas lose accuracy beyond this
+ROLLING_DAYS = int(os.environ.get('E1RM_ROLLING_DAYS', '42'))
+# Profile 1RMs follow the rolling estimate once it moves this far (fraction) from them
+SIGNIFICANT_CHANGE = float(os.environ.get('E1RM_SIGNIFICANT_CHANGE', '0.025'))
+# Logged sets are mostly programme work at submaximal percentages, so by default the profile only moves up;
+# it moves down only for lifts tested near-maximally (NEAR_MAX_REPS or fewer at NEAR_MAX_SHARE of the current max)
+E1RM_AUTO_DECREASE = os.environ.get('E1RM_AUTO_DECREASE', '0') == '1'
+NEAR_MAX_REPS = 3
+NEAR_MAX_SHARE = 0.9
+
+LIFT_ALIASES = {
+    'squat': 'squat', 'back squat': 'squat', 'barbell squat': 'squat', 'barbell back squat': 'squat',
+    'bench press': 'bench_press', 'bench': 'bench_press', 'barbell bench press': 'bench_press',
+    'flat bench press': 'bench_press',
+    'deadlift': 'deadlift', 'conventional deadlift': 'deadlift', 'sumo deadlift': 'deadlift',
+    'barbell deadlift': 'deadlift',
+    'overhead press': 'overhead_press', 'ohp': 'overhead_press', 'military press': 'overhead_press',
+    'strict press': 'overhead_press', 'barbell overhead press': 'overhead_press',
+}
+
+def estimate_1rm(weight: float, reps: int, formula: str = E1RM_FORMULA) -> float:
+    """Estimated one-rep max from a set; a single is its own 1RM"""
+    return weight if reps == 1 else FORMULAS[formula](weight, reps)
+
+def lift_for(exercise_name: str) -> Optional[str]:
+    return LIFT_ALIASES.get(' '.join(exercise_name.lower().replace('-', ' ').split()))
+
+def daily_bests(rows: Iterable[Tuple]) -> Dict[Tuple[str, date], Tuple[float, Optional[int]]]:
+    """Best e1RM per (lift, day) from (day, exercise_name, reps_per_set, weight_per_set, workout_id) rows, in one pass"""
+    bests = {}
+    for day, name, reps_per_set, weight_per_set, workout_id in rows:
+        lift = lift_for(name)
+        if lift is None or not reps_per_set or not weight_per_set:
+            continue
+        estimates = [estimate_1rm(weight, reps) for reps, weight in zip(reps_per_set, weight_per_set)
+                     if isinstance(reps, int) and 0 < reps <= E1RM_MAX_REPS and isinstance(weight, (int, float)) and weight > 0]
+        if estimates:
+            best = round(max(estimates), 1)
+            if best > bests.get((lift, day), (0, None))[0]:
+                bests[(lift, day)] = (best, workout_id)
+    return bests
+
+def rolling_series(bests: Dict[Tuple[str, date], Tuple[float, Optional[int]]]) -> List[Dict[str, Any]]:
+    """Rolling maximum over ROLLING_DAYS for every lift's daily series, using a monotonic queue per lift"""
+    by_lift = defaultdict(list)
+    for (lift, day), (value, workout_id) in bests.items():
+        by_lift[lift].append((day, value, workout_id))
+
+    series = []
+    window = timedelta(days=ROLLING_DAYS)
+    for lift, points in by_lift.items():
+        points.sort()
+        queue = deque()  # (day, value) with decreasing values
+        for day, value, workout_id in points:
+            while queue and queue[-1][1] <= value:
+                queue.pop()
+            queue.append((day, value))
+            while queue[0][0] <= day - window:
+                queue.popleft()
+            series.append(dict(lift=lift, date=day, e1rm_kg=value, rolling_e1rm_kg=queue[0][1], workout_id=workout_id))
+    return series
+
+def update_estimates(user_id: int, workout_id: int, day: date, exercises: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Fold one workout's sets into the time series; returns the newest rolling e1RM for each lift it trained"""
+    bests = daily_bests((day, e['exercise_name'], e.get('reps_per_set'), e.get('weight_per_set'), workout_id)
+                        for e in exercises)
+    if not bests:
+        return {}
+    lifts = {lift for lift, _ in bests}
+    window = timedelta(days=ROLLING_DAYS)
+    # A back-dated workout also changes the rolling value of every point up to ROLLING_DAYS after it
+    nearby = StrengthEstimate.query.filter(StrengthEstimate.user_id == user_id, StrengthEstimate.lift.in_(lifts),
+                                           StrengthEstimate.date > day - window,
+                                           StrengthEstimate.date < day + window).all()
+    for (lift, _), (value, _) in bests.items():
+        points = [p for p in nearby if p.lift == lift]
+        point = next((p for p in points if p.date == day), None)
+        if point is None:
+            point = StrengthEstimate(user_id=user_id, lift=lift, date=day, e1rm_kg=value, workout_id=workout_id)
+            db.session.add(point)
+            points.append(point)
+        elif value > point.e1rm_kg:
+            point.e1rm_kg, point.workout_id = value, workout_id
+        for later in points:
+            if later.date >= day:
+                later.rolling_e1rm_kg = max(p.e1rm_kg for p in points if later.date - window < p.date <= later.date)
+
+    latest = {}
+    for lift in lifts:
+        newest = (StrengthEstimate.query.filter_by(user_id=user_id, lift=lift)
+                  .order_by(StrengthEstimate.date.desc()).first())
+        latest[lift] = newest.rolling_e1rm_kg
+    return latest
+
+def near_maximal_lifts(profile: Optional[UserProfile], exercises: List[Dict[str, Any]]) -> set:
+    """Lifts with a logged set heavy enough to show the profile 1RM may really have dropped"""
+    tested = set()
+    for exercise in exercises:
+        lift = lift_for(exercise['exercise_name'])
+        current = getattr(profile, LIFT_1RM_FIELDS[lift], None) if lift and profile else None
+        if current and any(isinstance(weight, (int, float)) and 0 < reps <= NEAR_MAX_REPS
+                           and weight >= current * NEAR_MAX_SHARE
+                           for reps, weight in zip(exercise.get('reps_per_set') or [], exercise.get('weight_per_set') or [])):
+            tested.add(lift)
+    return tested
+
+def refresh_profile_maxes(profile: Optional[UserProfile], latest: Dict[str, float],
+                          tested: Iterable[str] = ()) -> Dict[str, Tuple[Optional[float], float]]:
+    """Move profile 1RMs to the rolling estimates that changed significantly; returns {field: (old, new)}.
+
+    Estimates below the profile only count for lifts in tested (see near_maximal_lifts) or with E1RM_AUTO_DECREASE.
+    """
+    changed = {}
+    if profile is None:
+        return changed
+    tested = set(tested)
+    for lift, estimate in latest.items():
+        field = LIFT_1RM_FIELDS[lift]
+        old, new = getattr(profile, field), round_load(estimate)
+        if old and abs(new - old) / old < SIGNIFICANT_CHANGE:
+            continue
+        if old and new < old and lift not in tested and not E1RM_AUTO_DECREASE:
+            continue
+        setattr(profile, field, new)
+        changed[field] = (old, new)
+    if changed:
+        # Tomorrow's pre-generated draft was written against the old maxes
+        DraftWorkout.query.filter(DraftWorkout.user_id == profile.user_id, DraftWorkout.for_date >= date.today(),
+                                  DraftWorkout.status == 'ready').delete(synchronize_session=False)
+    return changed
+
+def recompute_estimates(user_id: int) -> Dict[str, float]:
+    """Rebuild a user's whole e1RM series from their logged sets; returns the latest rolling estimate per lift"""
+    StrengthEstimate.query.filter_by(user_id=user_id).delete()
+    rows = db.session.execute(
+        select(Workout.date_completed, Exercise.exercise_name, Exercise.reps_per_set, Exercise.weight_per_set, Workout.id)
+        .join(Workout, Exercise.workout_id == Workout.id)
+        .where(Workout.user_id == user_id, Exercise.performed.is_(True), Exercise.weight_per_set.isnot(None))
+    )
+    series = rolling_series(daily_bests(rows))
+    db.session.bulk_insert_mappings(StrengthEstimate, [dict(point, user_id=user_id) for point in series])
+    latest = {}
+    for point in sorted(series, key=lambda p: p['date']):
+        latest[point['lift']] = point['rolling_e1rm_kg']
+    return latest
+
+@click.command('recompute-strength')
+@click.option('--user-id', type=int, default=None, help='Only this user (default: everyone).')
+@click.option('--update-profiles/--no-update-profiles', default=False,
+              help='Also move profile 1RMs that differ significantly from the latest estimates.')
+@with_appcontext
+def recompute_strength_command(user_id, update_profiles):
+    """Rebuild the estimated-1RM time series from full history, e.g. after importing data."""
+    started = time.time()
+    user_ids = [user_id] if user_id else list(db.session.scalars(select(User.id).order_by(User.id)))
+    updated = 0
+    for uid in user_ids:
+        latest = recompute_estimates(uid)
+        if update_profiles and refresh_profile_maxes(UserProfile.query.filter_by(user_id=uid).first(), latest):
+            updated += 1
+        db.session.commit()
+    click.echo(f"Recomputed e1RM series for {len(user_ids)} users in {time.time() - started:.1f}s; "
+               f"{updated} profiles updated")
@@ -0,0 +1,28 @@
+/** Tailwind build config used by scripts/build_assets.py */
+module.exports = {
+    darkMode: 'class',
+    // Class names are also built in app.js template strings, so scan it too
+    content: ['./templates/**/*.html', './static/js/**/*.js'],
+    theme: {
+        extend: {
+            colors: {
+                'thrshld': {
+                    'primary': '#ffffff',
+                    'secondary': '#e5e7eb',
+                    'accent': '#3b82f6',
+                    'gray-light': '#000000',
+                    'gray-medium': '#9ca3af',
+                    'gray-dark': '#374151',
+                    'bg-primary': '#000000',
+                    'bg-secondary': '#111111',
+                },
+                // Used by goals_setup.html
+                primary: '#ff6b35',
+                secondary: '#1a1a1a',
+            },
+            fontFamily: {
+                'sans': ['-apple-system', 'BlinkMacSystemFont', 'Inter', 'Segoe UI', 'Roboto', 'sans-serif'],
+            }
+        }
+    }
+}
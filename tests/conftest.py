@@ -0,0 +1,55 @@
+import os
+import sys
+import tempfile
+
+# app.py reads its configuration at import time, so point it at throwaway SQLite files first
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+DATA_DIR = tempfile.mkdtemp(prefix='thrshld-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(DATA_DIR, 'primary.db')}"
+os.environ['REPLICA_DATABASE_URL'] = f"sqlite:///{os.path.join(DATA_DIR, 'replica.db')}"
+os.environ.setdefault('SESSION_SECRET', 'test')
+os.environ['OPENAI_API_BASE'] = 'http://127.0.0.1:9'  # nothing listens there; the coach is never reached
+
+import pytest
+from flask_login.utils import _create_identifier
+from app import app as flask_app, db
+
+@pytest.fixture(scope='session')
+def app():
+    flask_app.config['TESTING'] = True
+    with flask_app.app_context():
+        db.create_all()
+        # Models carry no bind key, so create_all leaves the replica empty
+        db.metadata.create_all(db.engines['replica'])
+    return flask_app
+
+@pytest.fixture
+def user(app):
+    """A fresh account with a profile, goals and 1RMs"""
+    from models import User, UserProfile, UserGoals
+    with app.app_context():
+        account = User(email=f"lifter{User.query.count() + 1}@example.com", password_hash='!')
+        db.session.add(account)
+        db.session.flush()
+        db.session.add(UserProfile(user_id=account.id, name='Lifter', experience_level='intermediate',
+                                   training_days_per_week=3, squat_1rm=100, bench_1rm=80, deadlift_1rm=140,
+                                   overhead_press_1rm=50))
+        db.session.add(UserGoals(user_id=account.id, workout_goal='strength', compound_lifts=['squat', 'bench']))
+        db.session.commit()
+        return account.id
+
+def logged_in_client(app, user_id):
+    test_client = app.test_client()
+    with app.test_request_context(environ_base=test_client.environ_base):
+        identifier = _create_identifier()  # session_protection is 'strong'
+    with test_client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+        session['_id'] = identifier
+    return test_client
+
+@pytest.fixture
+def client(app, user):
+    """Test client logged in as user"""
+    return logged_in_client(app, user)
@@ -0,0 +1,42 @@
+from datetime import date
+from models import db, User, Workout, Exercise
+from programmes import ensure_programme, session_for
+
+def schedule_today(app, user_id):
+    """Make sure the user's programme has a session today; returns its exercises as planned"""
+    with app.app_context():
+        account = db.session.get(User, user_id)
+        programme = ensure_programme(user_id, account.profile, account.goals)
+        planned = session_for(programme, date.today()) or programme.sessions[0]
+        planned.scheduled_date = date.today()
+        db.session.commit()
+        return planned.exercises
+
+def test_low_readiness_eases_the_stored_session(app, client, user):
+    planned = schedule_today(app, user)
+    response = client.post('/api/check-in', json={'status': 'Exhausted, slept badly'})
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['reply'].startswith("Adjusted for today's check-in")
+
+    with app.app_context():
+        workout = db.session.get(Workout, body['workout_id'])
+        rows = {row.exercise_name: row for row in Exercise.query.filter_by(workout_id=workout.id)}
+    for before, after in zip(planned, body['workout']['exercises']):
+        row = rows[before['name']]
+        assert row.performed is False
+        if before['lift']:
+            assert after['sets'] == max(1, before['sets'] - 1) == row.sets_completed
+            if before['load_kg']:
+                assert after['load_kg'] < before['load_kg']
+                assert row.weight_per_set == [after['load_kg']] * after['sets']
+                assert f"{after['sets']} x {after['reps']} at {after['load_kg']:g}kg" in body['reply']
+        else:
+            assert after == before
+    assert workout.exercises == body['workout']['exercises']
+
+def test_normal_check_in_serves_the_session_as_planned(app, client, user):
+    planned = schedule_today(app, user)
+    body = client.post('/api/check-in', json={'status': 'Feeling fine'}).get_json()
+    assert body['workout']['exercises'] == planned
+    assert 'adjusted' not in body['workout']
@@ -0,0 +1,17 @@
+import pytest
+
+from compression import accepted_encodings
+
+@pytest.mark.parametrize('header, expected', [
+    ('', set()),
+    ('gzip, deflate, br', {'gzip', 'deflate', 'br'}),
+    ('br;q=0, gzip', {'gzip'}),
+    ('gzip;q=0.5, br;q=1.0', {'gzip', 'br'}),
+    ('GZIP; Q=0', set()),
+    ('gzip;q=oops', set()),
+    ('*', {'*', 'br', 'gzip'}),
+    ('*;q=0.1, br;q=0', {'*', 'gzip'}),
+    ('identity, *;q=0', {'identity'}),
+])
+def test_accepted_encodings_honour_q_values(header, expected):
+    assert accepted_encodings(header) == expected
@@ -0,0 +1,36 @@
+import json
+import os
+from datetime import date
+from sqlalchemy import func, select
+from models import db, User, CheckIn, Workout
+from importer import import_file
+from conftest import ROOT
+
+def counts(email):
+    user_id = db.session.scalar(select(User.id).where(User.email == email))
+    return (db.session.scalar(select(func.count()).select_from(CheckIn).where(CheckIn.user_id == user_id)),
+            db.session.scalar(select(func.count()).select_from(Workout).where(Workout.user_id == user_id)))
+
+def test_rerunning_an_edited_document_only_adds_new_entries(app, tmp_path):
+    with open(os.path.join(ROOT, 'user_data.json'), encoding='utf-8') as f:
+        document = json.load(f)
+    path = tmp_path / 'user_data.json'
+    path.write_text(json.dumps(document))
+    email = 'legacy-import@example.com'
+
+    with app.app_context():
+        import_file(str(path), 'user_data', email, date(2024, 1, 1))
+        check_ins, workouts = counts(email)
+        assert (check_ins, workouts) == (len(document['check_ins']), len(document['history']))
+
+        # Unchanged file, and a later --date for undated entries: nothing new
+        totals = import_file(str(path), 'user_data', email, date(2024, 2, 1))
+        assert totals['rows'] == 0
+        assert counts(email) == (check_ins, workouts)
+
+        document['check_ins'].append({'status': 'Legs still sore from Monday', 'date': '2024-01-03'})
+        document['stats']['completed_workouts'] += 1
+        path.write_text(json.dumps(document))
+        totals = import_file(str(path), 'user_data', email, date(2024, 1, 1))
+        assert counts(email) == (check_ins + 1, workouts)
+        assert totals['skipped'] == check_ins + workouts
@@ -0,0 +1,35 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+import metrics
+
+def test_metrics_refused_without_a_configured_token(app, monkeypatch):
+    monkeypatch.setattr(metrics, 'METRICS_TOKEN', None)
+    client = app.test_client()
+    assert client.get('/metrics').status_code == 403
+    assert client.get('/metrics', headers={'Authorization': 'Bearer '}).status_code == 403
+
+def test_metrics_require_the_configured_token(app, monkeypatch):
+    monkeypatch.setattr(metrics, 'METRICS_TOKEN', 'scrape-secret')
+    client = app.test_client()
+    assert client.get('/metrics').status_code == 401
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    response = client.get('/metrics', headers={'Authorization': 'Bearer scrape-secret'})
+    assert response.status_code == (503 if metrics.generate_latest is None else 200)
+
+def test_pool_checkout_timing_survives_dispose(tmp_path):
+    if metrics.generate_latest is None:
+        pytest.skip('prometheus_client is not installed')
+    url = f"sqlite:///{tmp_path / 'pool.db'}"
+    engine = create_engine(url, **metrics.timed_pool_options(url, {'poolclass': QueuePool}))
+
+    def checkouts():
+        return metrics.REGISTRY.get_sample_value('thrshld_db_pool_checkout_wait_seconds_count') or 0
+
+    before = checkouts()
+    engine.connect().close()
+    engine.dispose()
+    engine.connect().close()
+    assert checkouts() == before + 2
+    assert type(engine.pool).__name__ == 'TimedQueuePool'
@@ -0,0 +1,62 @@
+from datetime import date, timedelta
+from models import db, User, CheckIn, Exercise, DraftWorkout
+from programmes import ensure_programme, session_for
+from pregenerate import DraftResult, active_user_ids, gather_requests, store_drafts
+from conftest import logged_in_client
+
+DRAFT = {'focus': 'Full body', 'warm_up': 'Row 5 minutes', 'cool_down': 'Walk and stretch', 'notes': None,
+         'exercises': [{'name': 'Back Squat', 'lift': 'squat', 'sets': 4, 'reps': 5, 'percent_1rm': 75,
+                        'load_kg': 100, 'rest_seconds': 150, 'notes': None},
+                       {'name': 'Plank', 'lift': None, 'sets': 3, 'reps': 1, 'percent_1rm': None,
+                        'load_kg': None, 'rest_seconds': 60, 'notes': '45 seconds'}]}
+
+def new_account(app, active_on):
+    with app.app_context():
+        account = User(email=f"drafted{User.query.count() + 1}@example.com", password_hash='!')
+        db.session.add(account)
+        db.session.flush()
+        db.session.add(CheckIn(user_id=account.id, date=active_on, notes='Felt good'))
+        db.session.commit()
+        return account.id
+
+def test_users_inside_a_programme_block_get_no_draft(app, user):
+    tomorrow = date.today() + timedelta(days=1)
+    without_programme = new_account(app, date.today())
+    with app.app_context():
+        account = db.session.get(User, user)
+        db.session.add(CheckIn(user_id=user, date=date.today(), notes='Fine'))
+        programme = ensure_programme(user, account.profile, account.goals)
+        db.session.commit()
+        # Whether tomorrow is a session or a rest day, the programme's calendar decides
+        rest_day = next(day for day in (tomorrow + timedelta(days=n) for n in range(7))
+                        if session_for(programme, day) is None)
+        for day in (tomorrow, rest_day):
+            ids = active_user_ids(day, 14)
+            assert user not in ids
+            assert without_programme in ids
+
+def test_drafts_use_the_structured_check_in_prompt(app):
+    user_id = new_account(app, date.today())
+    with app.app_context():
+        [request] = gather_requests([user_id], date.today() + timedelta(days=1))
+    assert request.prompt[0]['role'] == 'system'
+    assert 'JSON' in request.prompt[0]['content']
+    assert any('Felt good' in message['content'] for message in request.prompt)
+
+def test_served_draft_is_structured_and_can_be_logged(app):
+    user_id = new_account(app, date.today() - timedelta(days=1))
+    with app.app_context():
+        store_drafts([DraftResult(user_id, DRAFT, {'prompt_tokens': 10, 'completion_tokens': 5}, None)], date.today())
+    client = logged_in_client(app, user_id)
+
+    body = client.post('/api/check-in', json={'status': 'Sore and tired'}).get_json()
+    assert body['reply'].startswith("Adjusted for today's check-in")
+    squat = body['workout']['exercises'][0]
+    assert (squat['sets'], squat['load_kg']) == (3, 90)
+    with app.app_context():
+        assert Exercise.query.filter_by(workout_id=body['workout_id']).count() == 2
+        assert DraftWorkout.query.filter_by(user_id=user_id).one().status == 'served'
+
+    response = client.post(f"/api/workouts/{body['workout_id']}/log",
+                           json={'exercises': [{'name': 'Back Squat', 'reps_per_set': [5, 5, 5], 'weight_per_set': [90, 90, 90]}]})
+    assert response.status_code == 200
@@ -0,0 +1,47 @@
+from datetime import date
+import pytest
+from sqlalchemy import delete, insert, text
+from models import db, PersonalRecord
+from replica import REPLICA_BIND, replica_health
+
+@pytest.fixture(autouse=True)
+def healthy_replica(app):
+    replica_health.down_until = 0.0
+    yield
+    replica_health.down_until = 0.0
+    with app.app_context():
+        db.metadata.create_all(db.engines[REPLICA_BIND])
+
+def add_record(app, engine_name, user, exercise_name):
+    """A personal record in only one of the two databases, so a response shows which one served it"""
+    with app.app_context():
+        engine = db.engines[engine_name]
+        with engine.begin() as conn:
+            conn.execute(delete(PersonalRecord.__table__).where(PersonalRecord.__table__.c.user_id == user))
+            conn.execute(insert(PersonalRecord.__table__).values(user_id=user, exercise_name=exercise_name,
+                                                                   record_type='max_weight', value=100, unit='kg',
+                                                                   date_achieved=date.today()))
+
+def strength_exercises(client):
+    response = client.get('/api/progress/strength')
+    assert response.status_code == 200
+    return set(response.get_json()['personal_records'])
+
+@pytest.fixture
+def split_records(app, user):
+    add_record(app, None, user, 'Primary Squat')
+    add_record(app, REPLICA_BIND, user, 'Replica Squat')
+
+def test_read_replica_view_reads_the_replica(client, split_records):
+    assert strength_exercises(client) == {'Replica Squat'}
+
+def test_reads_stay_on_the_primary_after_a_write(client, split_records):
+    assert client.post('/api/check-in', json={'status': 'Feeling fine'}).status_code == 200
+    assert strength_exercises(client) == {'Primary Squat'}
+
+def test_falls_back_to_the_primary_when_the_replica_fails(app, client, split_records):
+    with app.app_context():
+        with db.engines[REPLICA_BIND].begin() as conn:
+            conn.execute(text(f"DROP TABLE {PersonalRecord.__tablename__}"))
+    assert strength_exercises(client) == {'Primary Squat'}
+    assert not replica_health.available
@@ -0,0 +1,20 @@
+from sqlalchemy import create_engine, inspect, text
+from schema import upgrade_schema
+
+def test_adds_new_columns_and_indexes_to_an_existing_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        # exercises and workouts as they were before the performed flag and the keyset indexes
+        conn.execute(text("CREATE TABLE workouts (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, "
+                          "workout_name VARCHAR(100) NOT NULL, date_completed DATE NOT NULL)"))
+        conn.execute(text("CREATE TABLE exercises (id INTEGER PRIMARY KEY, workout_id INTEGER NOT NULL, "
+                          "exercise_name VARCHAR(100) NOT NULL)"))
+        conn.execute(text("INSERT INTO exercises (workout_id, exercise_name) VALUES (1, 'Back Squat')"))
+
+    added = upgrade_schema(engine)
+    assert 'exercises.performed' in added
+    assert 'ix_workouts_user_date_completed' in added
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT performed FROM exercises")).scalar() in (0, False)
+    assert 'ix_workouts_user_date_completed' in {i['name'] for i in inspect(engine).get_indexes('workouts')}
+    assert upgrade_schema(engine) == []
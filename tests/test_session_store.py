@@ -0,0 +1,81 @@
+import pytest
+
+import session_store
+from session_store import ServerSessionInterface, SessionCache
+
+@pytest.fixture
+def verify_every_request(monkeypatch):
+    monkeypatch.setattr(session_store, 'SESSION_VERIFY_INTERVAL', 0)
+
+def request_with(app, interface, cookie=None, change=None, method='GET'):
+    """Run one request's open/save cycle through interface; returns (session seen, cookie sent back)"""
+    environ = {'HTTP_COOKIE': f"session={cookie}"} if cookie else {}
+    with app.test_request_context('/', method=method, environ_base=environ) as context:
+        opened = interface.open_session(app, context.request)
+        seen = dict(opened)
+        if change:
+            change(opened)
+        response = app.response_class()
+        interface.save_session(app, opened, response)
+        set_cookie = response.headers.get('Set-Cookie', '')
+        sent = set_cookie.split(';', 1)[0].split('=', 1)[1] if set_cookie.startswith('session=') else None
+        return seen, sent
+
+def log_in(s):
+    s.update(_user_id='7', _fresh=True)
+
+def log_out(s):
+    s.clear()
+
+def test_logout_revokes_cached_copy_on_other_workers(app, verify_every_request):
+    worker_a, worker_b = ServerSessionInterface(SessionCache()), ServerSessionInterface(SessionCache())
+    _, cookie = request_with(app, worker_a, change=log_in)
+    seen, _ = request_with(app, worker_b, cookie)
+    assert seen['_user_id'] == '7'  # worker B now holds the session in its LRU
+
+    request_with(app, worker_a, cookie, change=log_out)
+    seen, _ = request_with(app, worker_b, cookie)
+    assert '_user_id' not in seen
+
+    # The version is client-controlled and must not make a stale cached copy acceptable
+    sid = cookie.rpartition('.')[0]
+    seen, _ = request_with(app, worker_b, f"{sid}.0")
+    assert '_user_id' not in seen
+
+def test_rotated_id_is_revoked_on_other_workers(app, verify_every_request):
+    worker_a, worker_b = ServerSessionInterface(SessionCache()), ServerSessionInterface(SessionCache())
+    _, anonymous = request_with(app, worker_a, change=lambda s: s.update(next='/dashboard'))
+    request_with(app, worker_b, anonymous)
+    _, logged_in = request_with(app, worker_a, anonymous, change=log_in)
+    assert logged_in.rpartition('.')[0] != anonymous.rpartition('.')[0]
+
+    seen, _ = request_with(app, worker_b, logged_in)
+    assert seen['_user_id'] == '7'
+    request_with(app, worker_a, logged_in, change=log_out)
+    assert '_user_id' not in request_with(app, worker_b, logged_in)[0]
+
+def test_newer_write_on_another_worker_is_seen(app, verify_every_request):
+    worker_a, worker_b = ServerSessionInterface(SessionCache()), ServerSessionInterface(SessionCache())
+    _, cookie = request_with(app, worker_a, change=log_in)
+    request_with(app, worker_b, cookie)
+    _, cookie = request_with(app, worker_a, cookie, change=lambda s: s.update(db_write_at=1.0))
+    seen, _ = request_with(app, worker_b, cookie)
+    assert seen['db_write_at'] == 1.0
+
+def test_logout_reaches_cached_reads_within_the_verify_interval(app, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(session_store.time, 'monotonic', lambda: clock[0])
+    worker_a, worker_b = ServerSessionInterface(SessionCache()), ServerSessionInterface(SessionCache())
+    _, cookie = request_with(app, worker_a, change=log_in)
+    request_with(app, worker_b, cookie)
+    request_with(app, worker_a, cookie, change=log_out)
+
+    # Reads trust worker B's LRU until the interval passes; writes are always checked
+    assert request_with(app, worker_b, cookie)[0]['_user_id'] == '7'
+    assert '_user_id' not in request_with(app, worker_b, cookie, method='POST')[0]
+
+    _, cookie = request_with(app, worker_a, change=log_in)
+    request_with(app, worker_b, cookie)
+    request_with(app, worker_a, cookie, change=log_out)
+    clock[0] += session_store.SESSION_VERIFY_INTERVAL
+    assert '_user_id' not in request_with(app, worker_b, cookie)[0]
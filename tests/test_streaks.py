@@ -0,0 +1,58 @@
+import random
+from datetime import date, timedelta
+import pytest
+from sqlalchemy import insert
+from models import db, User, Workout
+from streaks import compute_streaks
+
+TODAY = date(2026, 3, 18)  # a Wednesday
+
+def history(app, days):
+    """A new user with one workout on each of days (repeats allowed); returns the user id"""
+    with app.app_context():
+        account = User(email=f"streak{User.query.count() + 1}@example.com", password_hash='!')
+        db.session.add(account)
+        db.session.flush()
+        if days:
+            db.session.execute(insert(Workout.__table__), [
+                dict(user_id=account.id, workout_name='Session', workout_type='logged', date_completed=day)
+                for day in days])
+        db.session.commit()
+        return account.id
+
+def both(app, user_id, rest_days=0):
+    with app.app_context():
+        in_sql = compute_streaks(user_id, rest_days, TODAY, in_sql=True)
+        in_python = compute_streaks(user_id, rest_days, TODAY, in_sql=False)
+    assert in_sql == in_python
+    return in_python
+
+def ago(*offsets):
+    return [TODAY - timedelta(days=n) for n in offsets]
+
+@pytest.mark.parametrize('days, rest_days, expected', [
+    ([], 0, (0, 0, 0, 0)),
+    (ago(0), 0, (1, 1, 1, 1)),
+    (ago(1), 0, (1, 1, 1, 1)),  # yesterday's workout keeps the streak alive today
+    (ago(2), 0, (0, 1, 1, 1)),
+    (ago(2), 1, (1, 1, 1, 1)),  # ... unless a rest day is allowed
+    (ago(0, 0, 1, 1, 2), 0, (3, 3, 1, 1)),  # duplicate days count once
+    (ago(1, 2, 3, 10, 11, 12, 13, 14), 0, (3, 5, 3, 3)),
+    (ago(0, 2, 4, 6), 1, (4, 4, 2, 2)),  # gaps within the allowance span today
+    (ago(30, 31, 32), 0, (0, 3, 0, 2)),  # Saturday to Monday: two calendar weeks
+])
+def test_edge_cases(app, days, rest_days, expected):
+    streaks = both(app, history(app, days), rest_days)
+    assert (streaks['current_streak'], streaks['longest_streak'],
+            streaks['current_weekly_streak'], streaks['longest_weekly_streak']) == expected
+
+def test_sql_and_python_agree_on_random_histories(app):
+    rng = random.Random(48)
+    for _ in range(150):
+        span = rng.choice([7, 30, 120, 400])
+        days = ago(*(rng.randrange(span) for _ in range(rng.randrange(0, span // 2 + 2))))
+        # Sometimes a burst of consecutive days ending today or yesterday
+        if rng.random() < 0.3:
+            end = rng.choice([0, 1, 2])
+            days += ago(*range(end, end + rng.randrange(1, 15)))
+        both(app, history(app, days), rng.choice([0, 0, 1, 2]))
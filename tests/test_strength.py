@@ -0,0 +1,45 @@
+from datetime import date, timedelta
+from models import db, User, Workout, StrengthEstimate
+from strength import update_estimates
+
+def add_workout(app, user, day):
+    with app.app_context():
+        workout = Workout(user_id=user, workout_name='Logged', workout_type='programme', date_completed=day)
+        db.session.add(workout)
+        db.session.commit()
+        return workout.id
+
+def squat_max(app, user):
+    with app.app_context():
+        return db.session.get(User, user).profile.squat_1rm
+
+def log_squat(client, workout_id, reps, weight):
+    response = client.post(f'/api/workouts/{workout_id}/log',
+                           json={'exercises': [{'name': 'Back Squat', 'reps_per_set': reps, 'weight_per_set': weight}]})
+    assert response.status_code == 200
+
+def test_submaximal_work_does_not_lower_the_profile_max(app, client, user):
+    log_squat(client, add_workout(app, user, date.today()), [5, 5, 5], [70, 70, 70])
+    assert squat_max(app, user) == 100
+
+def test_near_maximal_sets_can_lower_the_profile_max(app, client, user):
+    log_squat(client, add_workout(app, user, date.today()), [1, 1], [90, 92.5])
+    assert squat_max(app, user) == 92.5
+
+def test_heavier_estimates_raise_the_profile_max(app, client, user):
+    log_squat(client, add_workout(app, user, date.today()), [5], [100])
+    assert squat_max(app, user) == 117.5
+
+def test_back_dated_workout_updates_later_rolling_values(app, user):
+    today, earlier, old = date.today(), date.today() - timedelta(days=10), date.today() - timedelta(days=60)
+    workouts = {day: add_workout(app, user, day) for day in (today, earlier, old)}
+    squat = lambda weight: [{'exercise_name': 'Back Squat', 'reps_per_set': [1], 'weight_per_set': [weight]}]
+    with app.app_context():
+        assert update_estimates(user, workouts[today], today, squat(100)) == {'squat': 100}
+        # Ten days earlier and heavier: today's rolling value and the returned latest both move
+        assert update_estimates(user, workouts[earlier], earlier, squat(120)) == {'squat': 120}
+        # Earlier still, but outside today's window: only its own point changes
+        assert update_estimates(user, workouts[old], old, squat(150)) == {'squat': 120}
+        rolling = dict(db.session.execute(db.select(StrengthEstimate.date, StrengthEstimate.rolling_e1rm_kg)
+                                          .filter_by(user_id=user, lift='squat')).all())
+        assert rolling == {today: 120, earlier: 120, old: 150}
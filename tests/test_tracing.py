@@ -0,0 +1,27 @@
+from flask import g
+import tracing
+
+TRACEPARENT = '00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01'
+
+def start(app, headers):
+    with app.test_request_context('/', headers=headers):
+        tracing._start_trace()
+        return g.get('trace_root')
+
+def test_client_sampled_flag_does_not_force_a_trace(app, monkeypatch):
+    monkeypatch.setattr(tracing, 'TRACE_SAMPLE_RATE', 0.0)
+    monkeypatch.setattr(tracing, 'TRACE_TRUST_TOKEN', 'upstream-secret')
+    assert start(app, {'traceparent': TRACEPARENT}) is None
+    assert start(app, {'traceparent': TRACEPARENT, 'X-Trace-Token': 'guess'}) is None
+
+def test_untrusted_caller_keeps_its_trace_id_when_sampled_locally(app, monkeypatch):
+    monkeypatch.setattr(tracing, 'TRACE_SAMPLE_RATE', 1.0)
+    monkeypatch.setattr(tracing, 'TRACE_TRUST_TOKEN', None)
+    root = start(app, {'traceparent': TRACEPARENT.replace('-01', '-00')})
+    assert root.trace.trace_id == '4bf92f3577b34da6a3ce929d0e0e4736'
+    assert root.parent_id == '00f067aa0ba902b7'
+
+def test_trusted_upstream_decides_sampling(app, monkeypatch):
+    monkeypatch.setattr(tracing, 'TRACE_SAMPLE_RATE', 0.0)
+    monkeypatch.setattr(tracing, 'TRACE_TRUST_TOKEN', 'upstream-secret')
+    assert start(app, {'traceparent': TRACEPARENT, 'X-Trace-Token': 'upstream-secret'}) is not None
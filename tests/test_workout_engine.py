@@ -0,0 +1,52 @@
+import json
+from datetime import date, timedelta
+from types import SimpleNamespace
+import pytest
+from coach import WORKOUT_SCHEMA, parse_workout
+from programmes import GOAL_BLOCKS
+from workout_engine import INTENSITY_OFFSETS, local_workout
+
+TYPES = {'string': str, 'integer': int, 'number': (int, float), 'array': list, 'object': dict, 'null': type(None)}
+LOCAL_ONLY = {'phase', 'programme', 'readiness'}
+
+def schema_errors(value, schema, path='workout'):
+    """The subset of JSON Schema that WORKOUT_SCHEMA uses: type, enum, required, properties, items"""
+    kinds = schema['type'] if isinstance(schema['type'], list) else [schema['type']]
+    if isinstance(value, bool) or not isinstance(value, tuple(TYPES[kind] for kind in kinds)):
+        return [f"{path}: {value!r} is not {'/'.join(kinds)}"]
+    if 'enum' in schema and value not in schema['enum']:
+        return [f"{path}: {value!r} not in enum"]
+    errors = []
+    if isinstance(value, dict):
+        errors += [f"{path}: missing {key}" for key in schema['required'] if key not in value]
+        errors += [f"{path}: unexpected {key}" for key in value.keys() - schema['properties'].keys()]
+        for key, item in value.items():
+            if key in schema['properties']:
+                errors += schema_errors(item, schema['properties'][key], f"{path}.{key}")
+    elif isinstance(value, list):
+        for i, item in enumerate(value):
+            errors += schema_errors(item, schema['items'], f"{path}[{i}]")
+    return errors
+
+def profile(intensity, experience='intermediate'):
+    return SimpleNamespace(experience_level=experience, preferred_intensity=intensity, training_days_per_week=4,
+                           squat_1rm=180, bench_1rm=120, deadlift_1rm=220, overhead_press_1rm=75, max_pull_ups=15)
+
+@pytest.mark.parametrize('goal', sorted(GOAL_BLOCKS) + [None])
+@pytest.mark.parametrize('intensity', sorted(INTENSITY_OFFSETS))
+def test_local_workout_matches_the_coach_schema(goal, intensity):
+    goals = SimpleNamespace(workout_goal=goal, compound_lifts=['squat', 'bench_press', 'deadlift', 'overhead_press', 'pull_ups'],
+                            target_sessions_per_week=4)
+    start = date(2025, 1, 6)
+    for offset in range(84):
+        for status in ('Exhausted and sore', 'Feeling fine', 'Fresh and motivated'):
+            workout = local_workout(profile(intensity), goals, status, start + timedelta(days=offset))
+            shared = {key: value for key, value in workout.items() if key not in LOCAL_ONLY}
+            assert schema_errors(shared, WORKOUT_SCHEMA) == []
+            # The coach's validator accepts the local session unchanged
+            assert parse_workout(json.dumps(shared)) == shared
+
+def test_beginner_without_maxes_still_validates():
+    bare = SimpleNamespace(experience_level='beginner', preferred_intensity=None)
+    workout = local_workout(bare, None, 'ok', date(2025, 3, 3))
+    assert parse_workout(json.dumps({k: v for k, v in workout.items() if k not in LOCAL_ONLY}))['exercises'] == workout['exercises']
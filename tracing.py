@@ -0,0 +1,247 @@
+import os
+import hmac
+import json
+import time
+import queue
+import atexit
+import random
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, List
+import requests
+from flask import g, request
+from sqlalchemy import event
+
+# Fraction of requests traced; 0 disables tracing and its SQL hooks entirely
+TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE', '0'))
+# 'file' appends Zipkin v2 JSON spans to TRACE_FILE; 'zipkin' posts them to TRACE_COLLECTOR_URL
+TRACE_EXPORTER = os.environ.get('TRACE_EXPORTER', 'file')
+TRACE_FILE = os.environ.get('TRACE_FILE', 'traces.ndjson')
+TRACE_COLLECTOR_URL = os.environ.get('TRACE_COLLECTOR_URL', 'http://127.0.0.1:9411/api/v2/spans')
+SERVICE_NAME = os.environ.get('TRACE_SERVICE_NAME', 'thrshld')
+# Upstreams that send this in X-Trace-Token may force (or suppress) sampling with traceparent's sampled flag;
+# anyone else's flag is ignored and TRACE_SAMPLE_RATE applies, so clients can't make every request traced
+TRACE_TRUST_TOKEN = os.environ.get('TRACE_TRUST_TOKEN')
+
+MAX_STATEMENT_LENGTH = 500
+EXPORT_BATCH = 512
+EXPORT_INTERVAL = 2.0  # seconds
+QUEUE_LIMIT = 10000  # spans; beyond this they are dropped rather than slowing requests
+
+class Span:
+    """One timed operation within a trace, exported in Zipkin v2 format"""
+    __slots__ = ('trace', 'span_id', 'parent_id', 'name', 'kind', 'start_ns', 'duration_ns', 'tags')
+
+    def __init__(self, trace, name, parent_id=None, kind=None, tags=None):
+        self.trace = trace
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.duration_ns = None
+        self.tags = {k: str(v) for k, v in (tags or {}).items() if v is not None}
+
+    def set_tag(self, key, value):
+        self.tags[key] = str(value)
+
+    def finish(self):
+        self.duration_ns = time.time_ns() - self.start_ns
+        self.trace.spans.append(self)
+
+    def to_zipkin(self):
+        data = {
+            'traceId': self.trace.trace_id,
+            'id': self.span_id,
+            'name': self.name,
+            'timestamp': self.start_ns // 1000,
+            'duration': max(1, (self.duration_ns or 0) // 1000),
+            'localEndpoint': {'serviceName': SERVICE_NAME},
+            'tags': self.tags,
+        }
+        if self.parent_id:
+            data['parentId'] = self.parent_id
+        if self.kind:
+            data['kind'] = self.kind
+        return data
+
+class Trace:
+    """The finished spans of one sampled request, exported together"""
+    __slots__ = ('trace_id', 'spans')
+
+    def __init__(self, trace_id=None):
+        self.trace_id = trace_id or f"{random.getrandbits(128):032x}"
+        self.spans: List[Span] = []
+
+class _NoopSpan:
+    """Yielded when the current request isn't sampled, so call sites never branch"""
+    span_id = None
+
+    def set_tag(self, key, value):
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: ContextVar[Optional[Span]] = ContextVar('current_span', default=None)
+
+@contextmanager
+def span(name, kind=None, **tags):
+    """Time a block as a child of the active span; free when the request isn't sampled"""
+    parent = _current_span.get()
+    if parent is None:
+        yield NOOP_SPAN
+        return
+
+    child = Span(parent.trace, name, parent.span_id, kind, tags)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except Exception as e:
+        child.set_tag('error', type(e).__name__)
+        raise
+    finally:
+        _current_span.reset(token)
+        child.finish()
+
+def inject_headers(headers: dict) -> dict:
+    """Add a W3C traceparent header so downstream services can join the trace"""
+    current = _current_span.get()
+    if current is not None:
+        headers['traceparent'] = f"00-{current.trace.trace_id}-{current.span_id}-01"
+    return headers
+
+def parse_traceparent(value: Optional[str]):
+    """Return (trace_id, parent_span_id, sampled) from a traceparent header, or None"""
+    try:
+        version, trace_id, parent_id, flags = value.split('-')
+        int(trace_id, 16), int(parent_id, 16)
+    except (AttributeError, ValueError):
+        return None
+    if len(trace_id) != 32 or len(parent_id) != 16:
+        return None
+    return trace_id, parent_id, bool(int(flags, 16) & 1)
+
+class SpanExporter:
+    """Background batcher that writes finished traces to a file or a Zipkin-compatible collector"""
+
+    def __init__(self, exporter: str, path: str, url: str):
+        self.exporter = exporter
+        self.path = path
+        self.url = url
+        self.queue: "queue.Queue[Trace]" = queue.Queue(maxsize=QUEUE_LIMIT)
+        self.thread = None
+        self.lock = threading.Lock()
+        self.dropped = 0
+
+    def submit(self, trace: Trace) -> None:
+        # Started lazily so each gunicorn worker gets its own thread after fork
+        if self.thread is None:
+            with self.lock:
+                if self.thread is None:
+                    self.thread = threading.Thread(target=self._run, name='span-exporter', daemon=True)
+                    self.thread.start()
+                    atexit.register(self.flush)
+        try:
+            self.queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _drain(self) -> List[dict]:
+        spans = []
+        while len(spans) < EXPORT_BATCH:
+            try:
+                trace = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            spans.extend(s.to_zipkin() for s in trace.spans)
+        return spans
+
+    def _write(self, spans: List[dict]) -> None:
+        try:
+            if self.exporter == 'zipkin':
+                requests.post(self.url, json=spans, timeout=5)
+            else:
+                with open(self.path, 'a') as handle:
+                    handle.write(''.join(json.dumps(s) + '\n' for s in spans))
+        except (OSError, requests.exceptions.RequestException) as e:
+            logging.warning(f"Dropped {len(spans)} spans: {e}")
+
+    def flush(self) -> None:
+        spans = self._drain()
+        while spans:
+            self._write(spans)
+            spans = self._drain()
+
+    def _run(self):
+        while True:
+            time.sleep(EXPORT_INTERVAL)
+            self.flush()
+
+# Global exporter instance
+span_exporter = SpanExporter(TRACE_EXPORTER, TRACE_FILE, TRACE_COLLECTOR_URL)
+
+def trusted_upstream() -> bool:
+    supplied = request.headers.get('X-Trace-Token')
+    return bool(TRACE_TRUST_TOKEN and supplied) and hmac.compare_digest(supplied, TRACE_TRUST_TOKEN)
+
+def _start_trace():
+    incoming = parse_traceparent(request.headers.get('traceparent'))
+    if incoming:
+        trace_id, parent_id, sampled = incoming
+        if not trusted_upstream():
+            # Keep the ids so a locally sampled trace still joins the caller's
+            sampled = random.random() < TRACE_SAMPLE_RATE
+    else:
+        trace_id, parent_id, sampled = None, None, random.random() < TRACE_SAMPLE_RATE
+    if not sampled:
+        _current_span.set(None)
+        return
+
+    root = Span(Trace(trace_id), f"{request.method} {request.url_rule.rule if request.url_rule else 'unmatched'}",
+                parent_id, 'SERVER', {'http.method': request.method, 'http.path': request.path})
+    g.trace_root = root
+    _current_span.set(root)
+
+def _tag_response(response):
+    root = g.get('trace_root')
+    if root is not None:
+        root.set_tag('http.status_code', response.status_code)
+    return response
+
+def _finish_trace(exc):
+    root = g.pop('trace_root', None)
+    if root is None:
+        return
+    if exc is not None:
+        root.set_tag('error', type(exc).__name__)
+    # Streamed responses tear down from another context, so clear rather than reset
+    _current_span.set(None)
+    root.finish()
+    span_exporter.submit(root.trace)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    parent = _current_span.get()
+    if parent is not None and context is not None:
+        context._trace_span = Span(parent.trace, 'sql', parent.span_id, 'CLIENT',
+                                   {'db.statement': statement[:MAX_STATEMENT_LENGTH]})
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    child = getattr(context, '_trace_span', None)
+    if child is not None:
+        context._trace_span = None
+        child.finish()
+
+def init_tracing(app, db) -> None:
+    if TRACE_SAMPLE_RATE <= 0:
+        logging.debug("Tracing disabled (TRACE_SAMPLE_RATE=0)")
+        return
+
+    app.before_request(_start_trace)
+    app.after_request(_tag_response)
+    app.teardown_request(_finish_trace)
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(db.engine, 'after_cursor_execute', _after_cursor_execute)
+    logging.info(f"Tracing {TRACE_SAMPLE_RATE:.2%} of requests to {TRACE_EXPORTER}")
@@ -1,38 +1,22 @@
 import logging
-from datetime import date, timedelta
 from typing import Dict, Any
 from models import Workout, PersonalRecord
+from streaks import compute_streaks
 
 def get_user_stats(user_id: int) -> Dict[str, Any]:
     """Get user statistics"""
     try:
         total_workouts = Workout.query.filter_by(user_id=user_id).count()
-        
-        # Calculate current streak
-        recent_workouts = Workout.query.filter_by(user_id=user_id)\
-                                     .order_by(Workout.date_completed.desc())\
-                                     .limit(30).all()
-        
-        current_streak = 0
-        if recent_workouts:
-            current_date = date.today()
-            for workout in recent_workouts:
-                if workout.date_completed == current_date or workout.date_completed == current_date - timedelta(days=1):
-                    current_streak += 1
-                    current_date = workout.date_completed - timedelta(days=1)
-                else:
-                    break
-        
         personal_records = PersonalRecord.query.filter_by(user_id=user_id).count()
-        
         return {
             'total_workouts': total_workouts,
-            'current_streak': current_streak,
+            **compute_streaks(user_id),
             'personal_records': personal_records
         }
     except Exception as e:
         logging.error(f"Error getting user stats: {e}")
-        return {'total_workouts': 0, 'current_streak': 0, 'personal_records': 0}
+        return {'total_workouts': 0, 'current_streak': 0, 'longest_streak': 0, 'current_weekly_streak': 0,
+                'longest_weekly_streak': 0, 'personal_records': 0}
 
 def validate_profile_data(profile_data: Dict[str, Any]) -> tuple[bool, str]:
     """Validate profile data and return (is_valid, error_message)"""
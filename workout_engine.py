@@ -0,0 +1,154 @@
+import os
+import re
+import logging
+from datetime import date, timedelta
+from typing import Optional, Tuple, List, Dict, Any
+import requests
+from coach import (LOW_READINESS, WorkoutFormatError, build_user_context, build_checkin_messages,
+                   build_commentary_prompt, request_completion, request_workout)
+from models import Workout, CheckIn
+from metrics import record_prompt
+from tracing import span
+from programmes import (GOAL_BLOCKS, DEFAULT_BLOCK, LIFT_NAMES, ACCESSORIES, SECONDARY_OFFSET,
+                        WARM_UP, COOL_DOWN, programme_inputs, prescribe, format_exercises)
+
+# ai: the coach writes the workout, with the local engine as fallback; local: the engine writes it and the coach only comments
+WORKOUT_ENGINE = os.environ.get("WORKOUT_ENGINE", "ai")
+# Check-ins wait this long for the coach before serving the local workout instead
+CHECKIN_AI_TIMEOUT = float(os.environ.get("CHECKIN_AI_TIMEOUT", "10"))
+COMMENTARY_TIMEOUT = float(os.environ.get("COMMENTARY_TIMEOUT", "5"))
+COMMENTARY_MAX_TOKENS = 150
+# History offered to the prompt builder, which summarizes or drops what doesn't fit its budget
+HISTORY_DAYS = 28
+HISTORY_WORKOUTS = 30
+HISTORY_CHECKINS = 7
+
+HIGH_READINESS = re.compile(r"\b(great|amazing|energi[sz]ed|fresh|strong|rested|slept well|motivated|pumped)\b",
+                            re.IGNORECASE)
+# Percentage points added to every prescription by preferred intensity
+INTENSITY_OFFSETS = {'low': -5, 'moderate': 0, 'high': 2.5, 'extreme': 5}
+HIGH_READINESS_OFFSET = 2.5
+
+def parse_readiness(status: str) -> str:
+    """low, normal or high, from the wording of the check-in"""
+    if LOW_READINESS.search(status):
+        return 'low'
+    return 'high' if HIGH_READINESS.search(status) else 'normal'
+
+def local_workout(profile, goals, status: str, today: Optional[date] = None) -> Dict[str, Any]:
+    """Rule-based session with every WORKOUT_SCHEMA field the coach returns, plus its phase, programme and readiness.
+
+    Deterministic and well under 10 ms.
+    """
+    today = today or date.today()
+    inputs = programme_inputs(profile, goals)
+    label, block = GOAL_BLOCKS.get(inputs['goal'], DEFAULT_BLOCK)
+    readiness = parse_readiness(status)
+
+    # Walk the goal's block by ISO week, dropping to the wave's deload week on a bad day
+    index = (today.isocalendar()[1] - 1) % len(block)
+    week = block[index // 4 * 4 + 3] if readiness == 'low' else block[index]
+    offset = INTENSITY_OFFSETS.get(getattr(profile, 'preferred_intensity', None) or 'moderate', 0)
+    if readiness == 'high' and week.phase != 'deload':
+        offset += HIGH_READINESS_OFFSET
+
+    lifts = inputs['lifts']
+    slot = today.toordinal()
+    main = lifts[slot % len(lifts)]
+    exercises = [{**prescribe(main, week.sets, week.reps, week.percent + offset, inputs), 'notes': None}]
+    if len(lifts) > 1:
+        exercises.append({**prescribe(lifts[(slot + 1) % len(lifts)], max(2, week.sets - 1), week.reps,
+                                      week.percent + offset - SECONDARY_OFFSET, inputs), 'notes': None})
+    for name, sets, reps in ACCESSORIES[main]:
+        exercises.append({'name': name, 'lift': None, 'sets': 2 if week.phase == 'deload' else sets,
+                          'reps': reps, 'percent_1rm': None, 'load_kg': None, 'rest_seconds': 60, 'notes': None})
+    return {'focus': f"{LIFT_NAMES[main]} focus", 'warm_up': WARM_UP, 'exercises': exercises, 'cool_down': COOL_DOWN,
+            'notes': None, 'phase': week.phase, 'programme': label, 'readiness': readiness}
+
+def format_local_workout(workout: Dict[str, Any]) -> str:
+    return format_exercises(f"{workout['programme']} ({workout['phase']}): {workout['focus']}", workout['exercises'],
+                            workout['warm_up'], workout['cool_down'])
+
+def format_ai_workout(workout: Dict[str, Any]) -> str:
+    return format_exercises(workout['focus'], workout['exercises'], workout['warm_up'], workout['cool_down'],
+                            workout['notes'])
+
+def exercise_mappings(workout_id: int, exercises: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Exercise rows for a prescribed session, ready for one bulk insert"""
+    return [dict(workout_id=workout_id, exercise_name=e['name'], exercise_type='compound' if e['lift'] else None,
+                 sets_completed=e['sets'], reps_per_set=[e['reps']] * e['sets'],
+                 weight_per_set=[e['load_kg']] * e['sets'] if e['load_kg'] else [],
+                 rest_between_sets=e['rest_seconds'], notes=e.get('notes'))
+            for e in exercises]
+
+def _logged_numbers(values, low, high, integer=False) -> bool:
+    return isinstance(values, list) and all(
+        not isinstance(v, bool) and isinstance(v, int if integer else (int, float)) and low <= v <= high for v in values)
+
+def logged_exercise_mappings(workout_id: int, exercises: Any) -> List[Dict[str, Any]]:
+    """Exercise rows for sets the user reports having done; raises WorkoutFormatError on bad input.
+
+    Each entry is {name, reps_per_set, weight_per_set?, distance_km?, time_seconds?, notes?}; weight_per_set,
+    when given, has one load (kg, or null for bodyweight) per set.
+    """
+    if not isinstance(exercises, list) or not exercises:
+        raise WorkoutFormatError("exercises must be a non-empty list")
+    mappings = []
+    for exercise in exercises:
+        if not isinstance(exercise, dict) or not isinstance(exercise.get('name'), str) or not exercise['name'].strip():
+            raise WorkoutFormatError("Exercise without a name")
+        name = exercise['name'].strip()[:100]
+        reps = exercise.get('reps_per_set') or []
+        weights = exercise.get('weight_per_set') or []
+        if len(reps) > 20 or not _logged_numbers(reps, 1, 100, integer=True):
+            raise WorkoutFormatError(f"{name}: reps_per_set must be up to 20 rep counts of 1-100")
+        if weights and (len(weights) != len(reps) or not _logged_numbers([w for w in weights if w is not None], 0, 1000)):
+            raise WorkoutFormatError(f"{name}: weight_per_set needs one load of 0-1000kg (or null) per set")
+        distance, seconds = exercise.get('distance_km'), exercise.get('time_seconds')
+        if distance is not None and not _logged_numbers([distance], 0, 1000):
+            raise WorkoutFormatError(f"{name}: distance_km must be between 0 and 1000")
+        if seconds is not None and not _logged_numbers([seconds], 0, 86400, integer=True):
+            raise WorkoutFormatError(f"{name}: time_seconds must be between 0 and 86400")
+        if not reps and distance is None and seconds is None:
+            raise WorkoutFormatError(f"{name}: log reps_per_set or a distance/time")
+        mappings.append(dict(workout_id=workout_id, exercise_name=name, sets_completed=len(reps) or None,
+                             reps_per_set=reps, weight_per_set=weights, distance_km=distance, time_seconds=seconds,
+                             notes=exercise.get('notes') or None, performed=True))
+    return mappings
+
+def recent_history(user_id: int, today: Optional[date] = None) -> Tuple[List[Workout], List[CheckIn]]:
+    """Workouts and earlier check-ins for the coaching prompt, newest first"""
+    today = today or date.today()
+    workouts = (Workout.query.filter(Workout.user_id == user_id, Workout.date_completed >= today - timedelta(days=HISTORY_DAYS))
+                .order_by(Workout.date_completed.desc(), Workout.id.desc()).limit(HISTORY_WORKOUTS).all())
+    checkins = (CheckIn.query.filter(CheckIn.user_id == user_id, CheckIn.date >= today - timedelta(days=7), CheckIn.date < today)
+                .order_by(CheckIn.date.desc(), CheckIn.id.desc()).limit(HISTORY_CHECKINS).all())
+    return workouts, checkins
+
+def generate_workout(user_id: int, profile, goals, status: str) -> Tuple[str, Dict[str, Any], str]:
+    """Today's workout for a check-in without a stored session; returns (reply, structured workout, source)"""
+    if WORKOUT_ENGINE == 'local':
+        workout = local_workout(profile, goals, status)
+        reply = format_local_workout(workout)
+        try:
+            note, _ = request_completion(build_commentary_prompt(build_user_context(profile, goals), status, reply),
+                                         timeout=COMMENTARY_TIMEOUT, max_tokens=COMMENTARY_MAX_TOKENS)
+            reply += f"\n\nCoach's note: {note.strip()}"
+        except requests.exceptions.RequestException as e:
+            logging.info(f"Serving local workout without commentary: {e}")
+        return reply, workout, 'local'
+
+    try:
+        with span('prompt build') as build:
+            messages, report = build_checkin_messages(profile, goals, status, *recent_history(user_id))
+            build.set_tag('prompt.context_tokens', report.context_tokens)
+            build.set_tag('prompt.system_tokens', report.system_tokens)
+        record_prompt(report)
+        logging.debug(f"Check-in prompt for user {user_id}: {report.system_tokens} system + "
+                      f"{report.context_tokens}/{report.budget} context tokens {report.sections}")
+        workout, _ = request_workout(messages, timeout=CHECKIN_AI_TIMEOUT)
+        return format_ai_workout(workout), workout, 'ai'
+    except (requests.exceptions.RequestException, WorkoutFormatError) as e:
+        logging.warning(f"AI workout unavailable, serving the local workout: {e}")
+        workout = local_workout(profile, goals, status)
+        return format_local_workout(workout), workout, 'local_fallback'